@@ -13,6 +13,7 @@ django.setup()
 
 from customers.models import Customer
 from employees.models import Employee
+from materials.models import Material
 from orders.models import Order
 
 def create_sample_data():
@@ -92,7 +93,10 @@ def create_sample_data():
         'repair',
     ]
     
-    material_codes = ['MAT-001', 'MAT-002', 'MAT-003', 'MAT-004', 'MAT-005', 'MAT-006']
+    materials = [
+        Material.objects.get_or_create(code=code, defaults={'name': code, 'unit_price': Decimal('20000')})[0]
+        for code in ['MAT-001', 'MAT-002', 'MAT-003', 'MAT-004', 'MAT-005', 'MAT-006']
+    ]
     
     orders_created = 0
     order_counter = 1
@@ -144,7 +148,7 @@ def create_sample_data():
             customer=customer,
             order_number=order_number,
             item_type=item_type,
-            material_code=random.choice(material_codes),
+            material=random.choice(materials),
             assigned_tailor=assigned_tailor,
             assigned_cutter=assigned_cutter,
             assigned_trouser_maker=assigned_trouser_maker,
@@ -56,6 +56,9 @@ class Customer(models.Model):
         verbose_name = "Үйлчлүүлэгч"
         verbose_name_plural = "Үйлчлүүлэгчид"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='customer_created_id_idx'),
+        ]
     
     def __str__(self):
         if self.last_name:
@@ -1,3 +1,56 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.models import Order
+from .models import Customer
+
+
+class CustomerDetailConditionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+        cls.url = reverse('customers:customer_detail', args=[cls.customer.pk])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def add_order(self):
+        today = timezone.now().date()
+        Order.objects.create(
+            customer=self.customer, order_number=f'ORD-COND-{Order.objects.count()}', item_type='men_suit',
+            total_amount=100000, start_date=today, due_date=today + timedelta(days=14),
+        )
+
+    def test_page_carries_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_unchanged_page_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_new_order_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.add_order()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_differs_per_user(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_login(User.objects.create_superuser('other', 'other@example.com', 'pass'))
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
 
-# Create your tests here.
+    def test_missing_customer_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('customers:customer_detail', args=[0])).status_code, 404)
@@ -6,12 +6,17 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.urls import reverse_lazy
 from django.db import models
 from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import last_modified, require_http_methods
 from .models import Customer
 from .forms import CustomerForm
+from orders.workflows import FINAL_STATUS
+from tailor_system.conditional import conditional_page
+from tailor_system.pagination import KeysetPaginationMixin
 
 
-class CustomerListView(LoginRequiredMixin, ListView):
+class CustomerListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Customer
     template_name = 'customers/customer_list.html'
     context_object_name = 'customers'
@@ -58,6 +63,16 @@ class CustomerListView(LoginRequiredMixin, ListView):
         return context
 
 
+def customer_timestamps(request, pk):
+    """Modification times of everything shown on the customer detail page"""
+    row = Customer.objects.filter(pk=pk).values('updated_at').annotate(
+        orders_updated=models.Max('order__updated_at'),
+        order_count=models.Count('order'),
+    ).order_by('pk').first()
+    return list(row.values()) if row else None
+
+
+@method_decorator(conditional_page(customer_timestamps), name='get')
 class CustomerDetailView(LoginRequiredMixin, DetailView):
     model = Customer
     template_name = 'customers/customer_detail.html'
@@ -73,8 +88,8 @@ class CustomerDetailView(LoginRequiredMixin, DetailView):
         
         # Calculate statistics
         context['total_orders'] = orders.count()
-        context['completed_orders'] = orders.filter(current_status='seamstress_finished').count()
-        context['active_orders'] = orders.exclude(current_status='seamstress_finished').count()
+        context['completed_orders'] = orders.filter(current_status=FINAL_STATUS).count()
+        context['active_orders'] = orders.exclude(current_status=FINAL_STATUS).count()
         
         return context
 
@@ -168,7 +183,13 @@ def search_customers(request):
     return JsonResponse({'customers': results})
 
 
+def customer_updated_at(request, pk):
+    return Customer.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+
+
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@last_modified(customer_updated_at)
 def get_customer(request, pk):
     """Get customer details as JSON"""
     try:
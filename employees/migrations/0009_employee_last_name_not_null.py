@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+def blank_missing_last_names(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    Employee.objects.filter(last_name__isnull=True).update(last_name='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_alter_employee_last_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(blank_missing_last_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='employee',
+            name='last_name',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='Овог'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['is_active', 'last_name', 'first_name', 'id'], name='employee_active_name_idx'),
+        ),
+    ]
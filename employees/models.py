@@ -17,7 +17,8 @@ class Employee(models.Model):
     ]
     
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Хэрэглэгч")
-    last_name = models.CharField(max_length=100, blank=True, null=True, verbose_name="Овог")
+    # '' rather than NULL when missing, so the list can page on (last_name, first_name, id)
+    last_name = models.CharField(max_length=100, blank=True, default='', verbose_name="Овог")
     first_name = models.CharField(max_length=100, verbose_name="Нэр", default='')
     phone = models.CharField(max_length=20, verbose_name="Утасны дугаар", default='')
     employee_type = models.CharField(
@@ -35,6 +36,10 @@ class Employee(models.Model):
         verbose_name = "Ажилтан"
         verbose_name_plural = "Ажилтнууд"
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Active employee list, paged by name (employees.views.EmployeeListView)
+            models.Index(fields=['is_active', 'last_name', 'first_name', 'id'], name='employee_active_name_idx'),
+        ]
     
     def __str__(self):
         if self.last_name:
@@ -1,3 +1,54 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from tailor_system.pagination import encode_cursor
+from .models import Employee
+
+
+class EmployeeListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        names = [('', 'Бат'), ('', 'Сараа'), ('', 'Алтан'), ('Дорж', 'Болд'), ('Батын', 'Номин')]
+        for index in range(25):
+            last_name, first_name = names[index % len(names)]
+            Employee.objects.create(
+                first_name=first_name, last_name=last_name, phone=f'9900{index:04d}', employee_type='cutter',
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def walk(self):
+        """Employee ids of every page, following the next links"""
+        ids = []
+        cursor = None
+        while True:
+            response = self.client.get(reverse('employees:employee_list'), {'cursor': cursor} if cursor else {})
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            ids.extend(employee.pk for employee in page)
+            if not page.has_next():
+                return ids, response
+            cursor = page.next_cursor
+
+    def test_pages_cover_employees_without_last_name(self):
+        ids, _ = self.walk()
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), set(Employee.objects.filter(is_active=True).values_list('pk', flat=True)))
+
+    def test_previous_page_returns_same_rows(self):
+        first = self.client.get(reverse('employees:employee_list')).context['page_obj']
+        second = self.client.get(reverse('employees:employee_list'), {'cursor': first.next_cursor}).context['page_obj']
+        back = self.client.get(reverse('employees:employee_list'), {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual([e.pk for e in back], [e.pk for e in first])
+
+    def test_cursor_with_null_value_is_not_found(self):
+        cursor = encode_cursor('next', [None, 'Бат', 1])
+        response = self.client.get(reverse('employees:employee_list'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_malformed_cursor_is_not_found(self):
+        response = self.client.get(reverse('employees:employee_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
@@ -10,6 +10,8 @@ from django.db.models import Avg, Count, Q
 from .models import Employee
 from .forms import EmployeeForm
 from orders.models import Order, EmployeeRating
+from orders.workflows import FINAL_STATUS
+from tailor_system.pagination import KeysetPaginationMixin
 
 
 class SuperuserRequiredMixin(LoginRequiredMixin):
@@ -21,14 +23,16 @@ class SuperuserRequiredMixin(LoginRequiredMixin):
         return super().dispatch(request, *args, **kwargs)
 
 
-class EmployeeListView(SuperuserRequiredMixin, ListView):
+class EmployeeListView(SuperuserRequiredMixin, KeysetPaginationMixin, ListView):
     model = Employee
     template_name = 'employees/employee_list.html'
     context_object_name = 'employees'
     paginate_by = 20
+    # Served by employee_active_name_idx
+    keyset_ordering = ('last_name', 'first_name', 'id')
     
     def get_queryset(self):
-        queryset = Employee.objects.filter(is_active=True).order_by('last_name', 'first_name')
+        queryset = Employee.objects.filter(is_active=True)
         
         # Search functionality
         search_query = self.request.GET.get('search')
@@ -58,12 +62,13 @@ class EmployeeListView(SuperuserRequiredMixin, ListView):
         context['active_employees'] = all_employees.filter(is_active=True).count()
         context['inactive_employees'] = all_employees.filter(is_active=False).count()
         
-        # Count by employee type
+        # Count by employee type, in one grouped query
+        counts = dict(all_employees.order_by().values('employee_type').annotate(count=Count('id')).values_list('employee_type', 'count'))
         context['summary_by_type'] = {}
         for emp_type, label in Employee.EMPLOYEE_TYPE_CHOICES:
             # Replace spaces with underscores for template access
             key = label.replace(' ', '_')
-            context['summary_by_type'][key] = all_employees.filter(employee_type=emp_type).count()
+            context['summary_by_type'][key] = counts.get(emp_type, 0)
         
         # Calculate total oёдолчин
         context['total_sewers'] = (
@@ -94,8 +99,8 @@ class EmployeeDetailView(SuperuserRequiredMixin, DetailView):
         
         # Order statistics
         context['total_orders'] = assigned_orders.count()
-        context['completed_orders'] = assigned_orders.filter(current_status='seamstress_finished').count()
-        context['in_progress_orders'] = assigned_orders.exclude(current_status='seamstress_finished').count()
+        context['completed_orders'] = assigned_orders.filter(current_status=FINAL_STATUS).count()
+        context['in_progress_orders'] = assigned_orders.exclude(current_status=FINAL_STATUS).count()
         
         # Get employee ratings
         ratings = EmployeeRating.objects.filter(employee=employee)
@@ -0,0 +1,15 @@
+// Public landing page
+module.exports = {
+    content: {
+        relative: true,
+        files: ['../templates/landing.html'],
+    },
+    theme: {
+        extend: {
+            fontFamily: {
+                'serif': ['PT Serif', 'Georgia', 'serif'],
+                'sans': ['PT Serif', 'Georgia', 'serif'],
+            },
+        }
+    }
+}
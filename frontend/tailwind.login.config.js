@@ -0,0 +1,7 @@
+// Login page, on the default theme
+module.exports = {
+    content: {
+        relative: true,
+        files: ['../templates/login.html'],
+    },
+}
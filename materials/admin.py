@@ -1,21 +1,38 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import IntegrityError
+from django.http import HttpResponseRedirect
+from .forms import MaterialForm
 from .models import Material
 
 
+class LowStockFilter(admin.SimpleListFilter):
+    title = 'Нөөц'
+    parameter_name = 'low_stock'
+
+    def lookups(self, request, model_admin):
+        return [('1', 'Бага нөөцтэй')]
+
+    def queryset(self, request, queryset):
+        if self.value() == '1':
+            return queryset.low_stock()
+        return queryset
+
+
 @admin.register(Material)
 class MaterialAdmin(admin.ModelAdmin):
-    list_display = ['name', 'unit_price', 'stock_quantity', 'supplier', 'is_low_stock', 'created_at']
-    list_filter = ['supplier', 'created_at']
-    search_fields = ['name', 'description', 'supplier']
+    form = MaterialForm
+    list_display = ['code', 'name', 'unit_price', 'stock_quantity', 'reserved_quantity', 'available_quantity', 'supplier', 'created_at']
+    list_filter = [LowStockFilter, 'supplier', 'created_at']
+    search_fields = ['code', 'name', 'description', 'supplier']
     ordering = ['name']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['reserved_quantity', 'available_quantity', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Үндсэн мэдээлэл', {
-            'fields': ('name', 'description')
+            'fields': ('code', 'name', 'description')
         }),
         ('Үнэ болон нөөц', {
-            'fields': ('unit_price', 'unit', 'stock_quantity')
+            'fields': ('unit_price', 'unit', 'stock_quantity', 'reserved_quantity', 'available_quantity')
         }),
         ('Нийлүүлэгч', {
             'fields': ('supplier',)
@@ -25,8 +42,11 @@ class MaterialAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
-    
-    def is_low_stock(self, obj):
-        return obj.is_low_stock
-    is_low_stock.boolean = True
-    is_low_stock.short_description = 'Бага нөөц'
\ No newline at end of file
+
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except IntegrityError:
+            # Stock below the reservations (material_reserved_within_stock) despite the form's check
+            messages.error(request, 'Үлдэгдэл захиалгад нөөцөлсөн хэмжээнээс бага байж болохгүй. Дахин оролдоно уу.')
+            return HttpResponseRedirect(request.get_full_path())
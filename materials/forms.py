@@ -1,4 +1,6 @@
 from django import forms
+from django.db import transaction
+
 from .models import Material
 
 
@@ -6,10 +8,11 @@ class MaterialForm(forms.ModelForm):
     class Meta:
         model = Material
         fields = [
-            'name', 'description', 'unit_price', 'unit', 
+            'code', 'name', 'description', 'unit_price', 'unit', 
             'stock_quantity', 'supplier'
         ]
         widgets = {
+            'code': forms.TextInput(attrs={'class': 'form-control'}),
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'unit_price': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
@@ -17,3 +20,26 @@ class MaterialForm(forms.ModelForm):
             'stock_quantity': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'supplier': forms.TextInput(attrs={'class': 'form-control'}),
         }
+    
+    def clean_stock_quantity(self):
+        stock = self.cleaned_data['stock_quantity']
+        reserved = self.current_reserved_quantity()
+        if stock < reserved:
+            raise forms.ValidationError(
+                f'Захиалгад {reserved} {self.instance.unit} нөөцөлсөн тул үлдэгдэл үүнээс бага байж болохгүй.'
+            )
+        return stock
+
+    def current_reserved_quantity(self):
+        """Reservations as stored now, not when the form was opened.
+
+        Inside a transaction (the admin saves in one) the row stays locked until the
+        save, so no order can reserve in between and trip material_reserved_within_stock.
+        """
+        if not self.instance.pk:
+            return 0
+        materials = Material.objects.filter(pk=self.instance.pk)
+        if transaction.get_connection().in_atomic_block:
+            materials = materials.select_for_update()
+        reserved = materials.values_list('reserved_quantity', flat=True).first()
+        return self.instance.reserved_quantity if reserved is None else reserved
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:34
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='code',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True, verbose_name='Материалын код'),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='reserved_quantity',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10, verbose_name='Захиалгад нөөцөлсөн'),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='available_quantity',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('stock_quantity'), '-', models.F('reserved_quantity')), output_field=models.DecimalField(decimal_places=2, max_digits=10), verbose_name='Чөлөөт үлдэгдэл'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['available_quantity'], name='material_available_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='material',
+            constraint=models.CheckConstraint(condition=models.Q(('reserved_quantity__gte', 0), ('stock_quantity__gte', models.F('reserved_quantity'))), name='material_reserved_within_stock', violation_error_message='Үлдэгдэл захиалгад нөөцөлсөн хэмжээнээс бага байж болохгүй.'),
+        ),
+    ]
@@ -1,28 +1,66 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Q
+
+
+class MaterialQuerySet(models.QuerySet):
+    def low_stock(self):
+        """Materials whose unreserved stock is under MATERIAL_LOW_STOCK_THRESHOLD (uses material_available_idx)"""
+        return self.filter(available_quantity__lt=settings.MATERIAL_LOW_STOCK_THRESHOLD)
 
 
 class Material(models.Model):
+    code = models.CharField(max_length=100, unique=True, blank=True, null=True, verbose_name="Материалын код")
     name = models.CharField(max_length=100, verbose_name="Материалын нэр")
     description = models.TextField(blank=True, null=True, verbose_name="Тайлбар")
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Нэгжийн үнэ")
     unit = models.CharField(max_length=20, default="метр", verbose_name="Хэмжих нэгж")
     stock_quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Үлдэгдэл")
+    # Changed only through materials.stock
+    reserved_quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False, verbose_name="Захиалгад нөөцөлсөн")
+    # Stored by the database so low stock queries can use an index
+    available_quantity = models.GeneratedField(
+        expression=F('stock_quantity') - F('reserved_quantity'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+        verbose_name="Чөлөөт үлдэгдэл",
+    )
     supplier = models.CharField(max_length=100, blank=True, null=True, verbose_name="Нийлүүлэгч")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Бүртгэсэн огноо")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Сүүлд шинэчлэгдсэн огноо")
+
+    objects = MaterialQuerySet.as_manager()
     
     class Meta:
         verbose_name = "Материал"
         verbose_name_plural = "Материалууд"
         ordering = ['name']
+        indexes = [
+            # Low stock queries (MaterialQuerySet.low_stock)
+            models.Index(fields=['available_quantity'], name='material_available_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(reserved_quantity__gte=0) & Q(stock_quantity__gte=F('reserved_quantity')),
+                name='material_reserved_within_stock',
+                violation_error_message='Үлдэгдэл захиалгад нөөцөлсөн хэмжээнээс бага байж болохгүй.',
+            ),
+        ]
     
     def __str__(self):
+        if self.code:
+            return f"{self.code} - {self.name}"
         return f"{self.name} ({self.unit_price}₮/{self.unit})"
     
-    @property
-    def is_low_stock(self):
-        return self.stock_quantity < 10  # 10-аас бага бол бага гэж үзнэ
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # reserved_quantity changes only through materials.stock; never write back a stale copy
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated and field.name != 'reserved_quantity'
+            ]
+        super().save(*args, **kwargs)
     
     @property
     def total_value(self):
-        return self.stock_quantity * self.unit_price
\ No newline at end of file
+        return self.stock_quantity * self.unit_price
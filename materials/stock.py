@@ -0,0 +1,157 @@
+"""Fabric stock reservations.
+
+An order reserves its fabric (``Order.material_quantity`` of
+``Order.material``) when it is saved, and consumes it once it reaches the
+cutting step. Every change is a single conditional UPDATE of the material row,
+e.g. ``reserved_quantity = reserved_quantity + q WHERE stock_quantity >=
+reserved_quantity + q``, so the check and the write cannot be interleaved: of
+two orders taking the last metres at once, the second UPDATE matches no row and
+raises InsufficientStock instead of overselling.
+
+``Material.stock_quantity`` is what is on the shelf; ``reserved_quantity`` the
+part of it promised to orders that have not been cut yet.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Material
+
+
+# Fabric leaves the shelf once an order reaches this step or any later one (repairs: when finished)
+CONSUME_STATUS = 'cutter_cutting'
+
+
+class InsufficientStock(Exception):
+    """Not enough unreserved stock for a reservation, or not enough reserved stock to consume"""
+
+    def __init__(self, material_id, quantity):
+        self.material_id = material_id
+        self.quantity = quantity
+        material = Material.objects.filter(pk=material_id).first()
+        if material is None:
+            self.message = 'Материал олдсонгүй.'
+        else:
+            self.message = f'{material.name}: нөөц хүрэлцэхгүй байна (үлдэгдэл {material.available_quantity} {material.unit}, шаардлагатай {quantity}).'
+        super().__init__(self.message)
+
+
+def _update(material_id, **changes):
+    return Material.objects.filter(pk=material_id, **changes.pop('where', {})).update(updated_at=timezone.now(), **changes)
+
+
+def reserve(material_id, quantity):
+    """Set aside ``quantity`` of unreserved stock"""
+    if quantity > 0 and not _update(
+        material_id,
+        where={'stock_quantity__gte': F('reserved_quantity') + quantity},
+        reserved_quantity=F('reserved_quantity') + quantity,
+    ):
+        raise InsufficientStock(material_id, quantity)
+
+
+def release(material_id, quantity):
+    """Return a reservation to the unreserved stock"""
+    if quantity > 0:
+        # Never below zero, should the stored reservations have drifted
+        _update(material_id, reserved_quantity=Greatest(F('reserved_quantity') - quantity, Value(Decimal('0'))))
+
+
+def consume(material_id, quantity):
+    """Take a reserved ``quantity`` off the shelf"""
+    if quantity > 0 and not _update(
+        material_id,
+        where={'reserved_quantity__gte': quantity},
+        stock_quantity=F('stock_quantity') - quantity,
+        reserved_quantity=F('reserved_quantity') - quantity,
+    ):
+        raise InsufficientStock(material_id, quantity)
+
+
+def restock(material_id, quantity):
+    """Add a delivery to the stock"""
+    _update(material_id, stock_quantity=F('stock_quantity') + quantity)
+
+
+def reserve_for_order(order):
+    """Move the stored reservation of ``order`` to its current material and quantity.
+
+    Call inside a transaction just before saving the order. The stored row is
+    locked, so the reservation follows what was committed last rather than what
+    the form was opened with.
+    """
+    from orders.models import Order
+
+    held = (None, 0)
+    if order.pk:
+        stored = Order.objects.select_for_update().filter(pk=order.pk).values(
+            'material_id', 'material_quantity', 'material_consumed').first()
+        if stored:
+            # Consumed fabric is not given back by editing the order
+            order.material_consumed = stored['material_consumed']
+            if stored['material_consumed']:
+                return
+            held = (stored['material_id'], stored['material_quantity'])
+
+    wanted = (order.material_id, order.material_quantity or 0) if order.material_id else (None, 0)
+    if held[0] == wanted[0]:
+        change = wanted[1] - held[1]
+        if change > 0:
+            reserve(wanted[0], change)
+        elif change < 0:
+            release(held[0], -change)
+        return
+    if held[0]:
+        release(*held)
+    if wanted[0]:
+        reserve(*wanted)
+
+
+def release_for_order(order):
+    """Give back the reservation of an order that is deleted before its fabric was cut"""
+    if order.material_id and not order.material_consumed:
+        release(order.material_id, order.material_quantity)
+
+
+def _consumption(order, status):
+    """The (material_id, quantity) ``order`` would consume at ``status``, or None"""
+    from orders.workflows import STATUSES
+
+    if not order.material_id or not order.material_quantity or order.material_consumed:
+        return None
+    rank = {step.code: index for index, step in enumerate(STATUSES)}
+    if rank.get(status, -1) < rank[CONSUME_STATUS]:
+        return None
+    return order.material_id, order.material_quantity
+
+
+def check_consumption(order, status):
+    """Raise InsufficientStock when moving ``order`` to ``status`` would consume more than is reserved.
+
+    Locks the material row, so call it inside the transaction that then saves the status.
+    """
+    needed = _consumption(order, status)
+    if needed and not Material.objects.select_for_update().filter(pk=needed[0], reserved_quantity__gte=needed[1]).exists():
+        raise InsufficientStock(*needed)
+
+
+def consume_for_order(order):
+    """Consume the order's reservation once it has reached CONSUME_STATUS; True when this call did.
+
+    Orders without a quantity never held a reservation and are skipped: the CSV import
+    links the material of ledger orders for reference only and leaves the quantity at 0.
+    """
+    from orders.models import Order
+
+    if _consumption(order, order.current_status) is None:
+        return False
+    with transaction.atomic():
+        # Claims the order first, so a double-submitted advance consumes once
+        if not Order.objects.filter(pk=order.pk, material_consumed=False).update(material_consumed=True):
+            return False
+        consume(order.material_id, order.material_quantity)
+    order.material_consumed = True
+    return True
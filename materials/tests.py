@@ -1,3 +1,214 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.forms.models import model_to_dict
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from customers.models import Customer
+from orders.admin import OrderAdminForm
+from orders.images import DESIGN_IMAGE_FIELDS
+from orders.models import Order, OrderStatusHistory, ProcessStep
+from .forms import MaterialForm
+from .models import Material
+from .stock import InsufficientStock, consume, consume_for_order, release, reserve, reserve_for_order, restock
+
+
+class StockTests(TestCase):
+    def setUp(self):
+        self.material = Material.objects.create(code='WOOL-1', name='Ноос', unit_price=50000, stock_quantity=10)
+
+    def assertStock(self, stock, reserved):
+        self.material.refresh_from_db()
+        self.assertEqual((self.material.stock_quantity, self.material.reserved_quantity), (Decimal(stock), Decimal(reserved)))
+        self.assertEqual(self.material.available_quantity, Decimal(stock) - Decimal(reserved))
+
+    def test_reserve_within_stock(self):
+        reserve(self.material.pk, Decimal('4'))
+        reserve(self.material.pk, Decimal('6'))
+        self.assertStock(10, 10)
+
+    def test_reserve_beyond_available_changes_nothing(self):
+        reserve(self.material.pk, Decimal('8'))
+        with self.assertRaises(InsufficientStock) as raised:
+            reserve(self.material.pk, Decimal('3'))
+        self.assertIn('Ноос', raised.exception.message)
+        self.assertStock(10, 8)
+
+    def test_release_never_below_zero(self):
+        reserve(self.material.pk, Decimal('2'))
+        release(self.material.pk, Decimal('5'))
+        self.assertStock(10, 0)
+
+    def test_consume_takes_reserved_stock_only(self):
+        reserve(self.material.pk, Decimal('3'))
+        consume(self.material.pk, Decimal('3'))
+        self.assertStock(7, 0)
+        with self.assertRaises(InsufficientStock):
+            consume(self.material.pk, Decimal('1'))
+        self.assertStock(7, 0)
+
+    def test_restock(self):
+        restock(self.material.pk, Decimal('5'))
+        self.assertStock(15, 0)
+
+
+class OrderStockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+
+    def setUp(self):
+        self.material = Material.objects.create(code='WOOL-1', name='Ноос', unit_price=50000, stock_quantity=10)
+        self.other = Material.objects.create(code='LINEN-1', name='Маалинга', unit_price=30000, stock_quantity=10)
+        self.client.force_login(self.user)
+
+    def create_order(self, quantity, **fields):
+        today = timezone.now().date()
+        order = Order(
+            customer=self.customer, order_number=f'ORD-STOCK-{Order.objects.count()}', item_type='men_suit',
+            total_amount=100000, start_date=today, due_date=today + timedelta(days=14),
+            material=self.material, material_quantity=Decimal(quantity), **fields,
+        )
+        reserve_for_order(order)
+        order.save()
+        return order
+
+    def stock(self, material):
+        material.refresh_from_db()
+        return material.stock_quantity, material.reserved_quantity
+
+    def test_editing_order_moves_reservation(self):
+        order = self.create_order('3')
+        order.material_quantity = Decimal('5')
+        reserve_for_order(order)
+        order.save()
+        self.assertEqual(self.stock(self.material), (Decimal('10'), Decimal('5')))
+
+        order.material = self.other
+        reserve_for_order(order)
+        order.save()
+        self.assertEqual(self.stock(self.material), (Decimal('10'), Decimal('0')))
+        self.assertEqual(self.stock(self.other), (Decimal('10'), Decimal('5')))
+
+    def test_deleting_order_releases_reservation(self):
+        self.create_order('3').delete()
+        self.assertEqual(self.stock(self.material), (Decimal('10'), Decimal('0')))
+
+    def test_consumed_once(self):
+        order = self.create_order('3', current_status='cutter_cutting')
+        self.assertTrue(consume_for_order(order))
+        self.assertFalse(consume_for_order(Order.objects.get(pk=order.pk)))
+        self.assertEqual(self.stock(self.material), (Decimal('7'), Decimal('0')))
+
+    def test_not_consumed_before_cutting(self):
+        order = self.create_order('3', current_status='material_arrived')
+        self.assertFalse(consume_for_order(order))
+        self.assertEqual(self.stock(self.material), (Decimal('10'), Decimal('3')))
+
+    def test_advancing_to_cutting_consumes(self):
+        order = self.create_order('3', current_status='material_arrived')
+        self.client.post(reverse('orders:advance_status', args=[order.pk]))
+        order.refresh_from_db()
+        self.assertEqual(order.current_status, 'cutter_cutting')
+        self.assertTrue(order.material_consumed)
+        self.assertEqual(self.stock(self.material), (Decimal('7'), Decimal('0')))
+
+    def test_finishing_last_process_step_consumes(self):
+        order = self.create_order('3', current_status='material_arrived')
+        step = ProcessStep.objects.create(order=order, step_type='seamstress_finished', title='Дууссан', description='-')
+        response = self.client.post(reverse('orders:update_step', args=[order.pk]), {'step_id': step.pk, 'status': 'completed'})
+        self.assertTrue(response.json()['success'])
+        order.refresh_from_db()
+        self.assertEqual(order.current_status, 'seamstress_finished')
+        self.assertIsNotNone(order.completed_date)
+        self.assertTrue(order.material_consumed)
+        self.assertEqual(self.stock(self.material), (Decimal('7'), Decimal('0')))
+
+    def test_stock_form_checks_current_reservations(self):
+        form_material = Material.objects.get(pk=self.material.pk)
+        # Reserved after the form's copy of the material was loaded
+        self.create_order('6')
+        form = MaterialForm(instance=form_material, data={
+            'code': 'WOOL-1', 'name': 'Ноос', 'unit_price': '50000', 'unit': 'метр', 'stock_quantity': '5',
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('stock_quantity', form.errors)
+
+    def test_admin_rejects_stock_below_reservations(self):
+        self.create_order('6')
+        response = self.client.post(reverse('admin:materials_material_change', args=[self.material.pk]), {
+            'code': 'WOOL-1', 'name': 'Ноос', 'unit_price': '50000', 'unit': 'метр', 'stock_quantity': '5',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('stock_quantity', response.context['adminform'].form.errors)
+        self.assertEqual(self.stock(self.material), (Decimal('10'), Decimal('6')))
+
+    def drift(self):
+        """Lose the stored reservations so consuming the next order fails"""
+        Material.objects.filter(pk=self.material.pk).update(reserved_quantity=0)
+
+    def test_advance_without_stock_changes_nothing(self):
+        order = self.create_order('3', current_status='material_arrived')
+        self.drift()
+        response = self.client.post(reverse('orders:advance_status', args=[order.pk]), follow=True)
+        order.refresh_from_db()
+        self.assertEqual(order.current_status, 'material_arrived')
+        self.assertFalse(order.material_consumed)
+        self.assertFalse(OrderStatusHistory.objects.filter(order=order).exists())
+        self.assertEqual([m.level_tag for m in response.context['messages']], ['error'])
+        self.assertEqual(self.stock(self.material), (Decimal('10'), Decimal('0')))
+
+    def test_advance_writes_both_history_rows(self):
+        order = self.create_order('3', current_status='material_arrived')
+        self.client.post(reverse('orders:advance_status', args=[order.pk]))
+        self.assertEqual(
+            list(OrderStatusHistory.objects.filter(order=order).order_by('id').values_list('status', flat=True)),
+            ['material_arrived', 'cutter_cutting'],
+        )
+
+    def test_finishing_step_without_stock_changes_nothing(self):
+        order = self.create_order('3', current_status='material_arrived')
+        step = ProcessStep.objects.create(order=order, step_type='seamstress_finished', title='Дууссан', description='-')
+        self.drift()
+        response = self.client.post(reverse('orders:update_step', args=[order.pk]), {'step_id': step.pk, 'status': 'completed'})
+        self.assertFalse(response.json()['success'])
+        order.refresh_from_db()
+        step.refresh_from_db()
+        self.assertEqual(order.current_status, 'material_arrived')
+        self.assertIsNone(order.completed_date)
+        self.assertEqual(step.status, 'pending')
+
+    def test_move_to_status_keeps_instance_on_failure(self):
+        order = self.create_order('3', current_status='material_arrived')
+        self.drift()
+        with self.assertRaises(InsufficientStock):
+            order.move_to_status('cutter_cutting')
+        self.assertEqual(order.current_status, 'material_arrived')
+        self.assertEqual(Order.objects.get(pk=order.pk).current_status, 'material_arrived')
+
+    def test_admin_form_refuses_status_without_stock(self):
+        order = self.create_order('3', current_status='material_arrived')
+        self.drift()
+        image_fields = [name for name, _ in DESIGN_IMAGE_FIELDS]
+        data = {key: value for key, value in model_to_dict(order, exclude=image_fields).items() if value is not None}
+        data['current_status'] = 'cutter_cutting'
+        form = OrderAdminForm(data=data, instance=order)
+        self.assertFalse(form.is_valid())
+        self.assertIn('current_status', form.errors)
+
+        Material.objects.filter(pk=self.material.pk).update(reserved_quantity=3)
+        form = OrderAdminForm(data=data, instance=Order.objects.get(pk=order.pk))
+        self.assertTrue(form.is_valid(), form.errors)
 
-# Create your tests here.
+    def test_order_without_quantity_is_not_consumed(self):
+        # How imported ledger orders are stored: material linked, no quantity reserved
+        order = self.create_order('0', current_status='material_arrived')
+        self.client.post(reverse('orders:advance_status', args=[order.pk]))
+        order.refresh_from_db()
+        self.assertEqual(order.current_status, 'cutter_cutting')
+        self.assertFalse(order.material_consumed)
+        self.assertEqual(self.stock(self.material), (Decimal('10'), Decimal('0')))
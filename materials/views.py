@@ -1,11 +1,16 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.views.generic import ListView
+from django.utils.decorators import method_decorator
 from django.db.models import Count, Sum, Q
 from django.db import models
 from orders.models import Order
+from orders.workflows import FINAL_STATUS
+from tailor_system.db_router import read_from_replica
+from .models import Material
 
 
 class SuperuserRequiredMixin(LoginRequiredMixin):
@@ -17,49 +22,41 @@ class SuperuserRequiredMixin(LoginRequiredMixin):
         return super().dispatch(request, *args, **kwargs)
 
 
+@method_decorator(read_from_replica, name='dispatch')
 class MaterialListView(SuperuserRequiredMixin, ListView):
-    """Material report view based on Order material codes"""
+    """Materials with their stock and the orders made of them"""
     template_name = 'materials/material_list.html'
     context_object_name = 'materials'
     paginate_by = 20
     
     def get_queryset(self):
-        """Generate material statistics from Order material codes"""
-        from django.db.models import Count, Sum, Case, When, IntegerField, DecimalField
-        
-        # Get all orders with material codes
-        orders = Order.objects.exclude(material_code__isnull=True).exclude(material_code='')
+        materials = Material.objects.all()
         
         # Search functionality
         search_query = self.request.GET.get('search')
         if search_query:
-            orders = orders.filter(material_code__icontains=search_query)
-        
-        # Group by material code and calculate statistics
-        material_stats = orders.values('material_code').annotate(
-            total_orders=Count('id'),
-            completed_orders=Count('id', filter=Q(current_status='seamstress_finished')),
-            active_orders=Count('id', filter=~Q(current_status='seamstress_finished')),
-        ).order_by('-total_orders')
-        
-        # Add additional calculated fields
-        for material in material_stats:
-            # Check if material is frequently used (more than 2 orders)
-            material['is_frequently_used'] = material['total_orders'] >= 2
-        
-        return material_stats
+            materials = materials.filter(Q(code__icontains=search_query) | Q(name__icontains=search_query))
+        if self.request.GET.get('low_stock'):
+            materials = materials.low_stock()
+        
+        return materials.annotate(
+            total_orders=Count('orders'),
+            completed_orders=Count('orders', filter=Q(orders__current_status=FINAL_STATUS)),
+            active_orders=Count('orders', filter=~Q(orders__current_status=FINAL_STATUS)),
+        ).order_by('-total_orders', 'name')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Get summary statistics
-        all_orders = Order.objects.exclude(material_code__isnull=True).exclude(material_code='')
+        orders = Order.objects.filter(material__isnull=False)
         
         context['search_query'] = self.request.GET.get('search', '')
-        context['total_materials'] = all_orders.values('material_code').distinct().count()
-        context['total_orders_with_materials'] = all_orders.count()
-        context['completed_with_materials'] = all_orders.filter(
-            current_status='seamstress_finished'
-        ).count()
-        
-        return context
\ No newline at end of file
+        context['low_stock'] = bool(self.request.GET.get('low_stock'))
+        context['low_stock_threshold'] = settings.MATERIAL_LOW_STOCK_THRESHOLD
+        context['total_materials'] = Material.objects.count()
+        context['low_stock_materials'] = Material.objects.low_stock().count()
+        context['total_orders_with_materials'] = orders.count()
+        context['completed_with_materials'] = orders.filter(current_status=FINAL_STATUS).count()
+        
+        return context
@@ -1,7 +1,23 @@
+import io
 from decimal import Decimal
 
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import Q
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from .assignments import auto_assign
+from .forms import OrderImportForm
+from .importers import OrderImporter, IMPORT_COLUMNS
 from .models import Order, ProcessStep, OrderRating, EmployeeRating, OrderStatusHistory
+from .workflows import FINAL_STATUS
+from .workload import ASSIGNEE_FIELDS, invalidate_workload
+from employees.models import Employee
+from materials.stock import InsufficientStock, check_consumption, consume_for_order
+from tailor_system.pagination import KeysetPaginationAdminMixin
 
 
 class ProcessStepInline(admin.TabularInline):
@@ -23,21 +39,43 @@ class EmployeeRatingInline(admin.TabularInline):
     readonly_fields = ['created_at']
 
 
+class OrderAdminForm(forms.ModelForm):
+    """Refuse a status change whose fabric cannot be consumed"""
+
+    class Meta:
+        model = Order
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        status = cleaned_data.get('current_status')
+        if self.instance.pk and status and 'current_status' in self.changed_data:
+            # The admin saves in one transaction, so the locked material holds until save_model
+            try:
+                check_consumption(self.instance, status)
+            except InsufficientStock as error:
+                self.add_error('current_status', error.message)
+        return cleaned_data
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['order_number', 'customer', 'item_type', 'current_status', 'total_amount', 'advance_amount', 'remaining_amount_display', 'due_date', 'is_overdue', 'days_remaining_display', 'created_at']
+    form = OrderAdminForm
+    list_display = ['order_number', 'customer', 'item_type', 'current_status', 'progress_display', 'total_amount', 'advance_amount', 'remaining_amount_display', 'due_date', 'is_overdue', 'days_remaining_display', 'created_at']
     list_filter = ['current_status', 'item_type', 'customer__customer_type', 'created_at', 'due_date']
-    search_fields = ['order_number', 'customer__first_name', 'customer__last_name', 'item_type', 'material_code']
+    search_fields = ['order_number', 'customer__first_name', 'customer__last_name', 'item_type', 'material__code']
     ordering = ['-created_at']
-    readonly_fields = ['created_at', 'updated_at', 'order_number']
+    readonly_fields = ['created_at', 'updated_at', 'order_number', 'material', 'material_quantity', 'material_consumed']
     inlines = [ProcessStepInline, OrderStatusHistoryInline, EmployeeRatingInline]
+    actions = ['auto_assign_employees']
     
     fieldsets = (
         ('Үндсэн мэдээлэл', {
             'fields': ('order_number', 'customer', 'item_type', 'current_status')
         }),
         ('Материал', {
-            'fields': ('material_code',)
+            # Stock is reserved through the order form (materials.stock), not here
+            'fields': ('material', 'material_quantity', 'material_consumed')
         }),
         ('Ажилтнууд', {
             'fields': ('assigned_tailor', 'assigned_cutter', 'assigned_trouser_maker'),
@@ -60,6 +98,52 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
     
+    change_list_template = 'admin/orders/order/change_list.html'
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'current_status' in form.changed_data:
+            # Same stock rule as Order.move_to_status; OrderAdminForm already checked the stock
+            consume_for_order(obj)
+    
+    def get_urls(self):
+        urls = [
+            path('import-csv/', self.admin_site.admin_view(self.import_csv_view), name='orders_order_import_csv'),
+        ]
+        return urls + super().get_urls()
+    
+    def import_csv_view(self, request):
+        """Upload a CSV ledger and import it with OrderImporter"""
+        if not self.has_add_permission(request):
+            messages.error(request, 'Та захиалга нэмэх эрхгүй байна.')
+            return redirect('admin:orders_order_changelist')
+        
+        result = None
+        form = OrderImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            completed_by = Employee.objects.filter(user=request.user).first()
+            if completed_by is None:
+                completed_by = Employee.objects.filter(is_active=True).first()
+            
+            importer = OrderImporter(completed_by=completed_by, dry_run=form.cleaned_data['dry_run'])
+            stream = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            result = importer.run(stream)
+            
+            if result.created and not form.cleaned_data['dry_run']:
+                messages.success(request, f'{result.created} захиалга импортлогдлоо ({result.rows_per_second:,.0f} мөр/сек).')
+            if result.errors:
+                messages.warning(request, f'{len(result.errors)} мөр алдаатай байна.')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Захиалга CSV-ээс импортлох',
+            'form': form,
+            'result': result,
+            'columns': IMPORT_COLUMNS,
+        }
+        return TemplateResponse(request, 'admin/orders/order/import_csv.html', context)
+    
     def is_overdue(self, obj):
         return obj.is_overdue
     is_overdue.boolean = True
@@ -82,6 +166,34 @@ class OrderAdmin(admin.ModelAdmin):
         return f"{remaining:,.0f}₮"
     remaining_amount_display.short_description = 'Үлдэгдэл'
 
+    def auto_assign_employees(self, request, queryset):
+        """Fill empty assignee fields of the selected unfinished orders with the least loaded fitting employees"""
+        unassigned = Q()
+        for field in ASSIGNEE_FIELDS:
+            unassigned |= Q(**{f'{field}__isnull': True})
+        orders = list(queryset.exclude(current_status=FINAL_STATUS).filter(unassigned))
+
+        now = timezone.now()
+        changed, fields = auto_assign(orders, timezone.localdate())
+        for order in changed:
+            order.updated_at = now
+        with transaction.atomic():
+            Order.objects.bulk_update(changed, fields + ['updated_at'], batch_size=500)
+            transaction.on_commit(invalidate_workload, robust=True)
+
+        if changed:
+            self.message_user(request, f'{len(changed)} захиалгад ажилтан томилогдлоо.', messages.SUCCESS)
+        else:
+            self.message_user(request, 'Томилох боломжтой захиалга эсвэл ажилтан олдсонгүй.', messages.WARNING)
+    auto_assign_employees.short_description = 'Томилогдоогүй захиалгад ажилтан автоматаар томилох'
+
+    def progress_display(self, obj):
+        workflow = obj.workflow
+        index = workflow.index(obj.current_status)
+        step = f"{index + 1}/{len(workflow)}" if index is not None else "—"
+        return f"{step} ({workflow.progress(obj.current_status)}%)"
+    progress_display.short_description = 'Явц'
+
 
 @admin.register(ProcessStep)
 class ProcessStepAdmin(admin.ModelAdmin):
@@ -102,11 +214,13 @@ class OrderRatingAdmin(admin.ModelAdmin):
 
 
 @admin.register(OrderStatusHistory)
-class OrderStatusHistoryAdmin(admin.ModelAdmin):
+class OrderStatusHistoryAdmin(KeysetPaginationAdminMixin, admin.ModelAdmin):
     list_display = ['order', 'status', 'completed_by', 'completed_at']
+    list_select_related = ['order__customer', 'completed_by']
     list_filter = ['status', 'completed_at']
     search_fields = ['order__order_number', 'completed_by__first_name', 'completed_by__last_name', 'notes']
-    ordering = ['-completed_at']
+    ordering = ['-completed_at', '-id']
+    keyset_ordering = ('-completed_at', '-id')
     readonly_fields = ['completed_at']
     
     fieldsets = (
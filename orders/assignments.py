@@ -0,0 +1,133 @@
+"""Workload-balanced assignee suggestions.
+
+For each assignee field an item type needs, the employees whose
+``employee_type`` fits are ranked from the cached workload index
+(orders.workload) by
+
+    unfinished orders + OVERDUE_WEIGHT * overdue orders
+    - rating weight * (average rating - NEUTRAL_RATING)
+
+lowest first. The rating weighs less the sooner the order is due: with little
+time left a free pair of hands beats a better-rated but busy one.
+"""
+from .workload import ASSIGNEE_FIELDS, workload_index
+from .workflows import FINAL_STATUS
+
+
+CUTTERS = ['cutter']
+SHIRT_CUTTERS = ['shirt_cutter', 'cutter']
+
+# item_type -> assignee field -> employee types eligible for it, best fit first
+ASSIGNEE_TYPES = {
+    'men_suit': {'assigned_cutter': CUTTERS, 'assigned_tailor': ['jacket_sewer'], 'assigned_trouser_maker': ['trouser_sewer']},
+    'women_suit': {'assigned_cutter': CUTTERS, 'assigned_tailor': ['jacket_sewer'], 'assigned_trouser_maker': ['trouser_sewer']},
+    'wedding_dress': {'assigned_cutter': CUTTERS, 'assigned_tailor': ['jacket_sewer']},
+    'formal_dress': {'assigned_cutter': CUTTERS, 'assigned_tailor': ['jacket_sewer']},
+    'casual_shirt': {'assigned_cutter': SHIRT_CUTTERS, 'assigned_tailor': ['shirt_sewer']},
+    'trousers': {'assigned_cutter': CUTTERS, 'assigned_trouser_maker': ['trouser_sewer']},
+    'jacket': {'assigned_cutter': CUTTERS, 'assigned_tailor': ['jacket_sewer']},
+    'vest': {'assigned_cutter': CUTTERS, 'assigned_tailor': ['jacket_sewer']},
+    'coat': {'assigned_cutter': CUTTERS, 'assigned_tailor': ['jacket_sewer']},
+    'repair': {'assigned_tailor': ['jacket_sewer', 'trouser_sewer', 'shirt_sewer']},
+    'other': {'assigned_cutter': CUTTERS, 'assigned_tailor': ['jacket_sewer', 'shirt_sewer']},
+}
+
+OVERDUE_WEIGHT = 2
+NEUTRAL_RATING = 3
+SUGGESTIONS = 3
+
+
+def rating_weight(days_left):
+    """Up to 2 orders of workload per rating point with three weeks or more to go"""
+    if days_left is None:
+        return 1.0
+    return min(max(days_left, 0), 21) / 21 * 2
+
+
+def score(entry, weight):
+    rating = entry['rating'] if entry['rating'] is not None else NEUTRAL_RATING
+    return entry['active'] + OVERDUE_WEIGHT * entry['overdue'] - weight * (rating - NEUTRAL_RATING)
+
+
+def rank(field, item_type, days_left=None, index=None, exclude=()):
+    """Eligible employees for ``field`` on an ``item_type`` order, best first, as index entries with a score"""
+    types = ASSIGNEE_TYPES.get(item_type, {}).get(field)
+    if not types:
+        return []
+    index = workload_index() if index is None else index
+    weight = rating_weight(days_left)
+    candidates = [
+        {**entry, 'score': score(entry, weight)}
+        for entry in index.values()
+        if entry['is_active'] and entry['employee_type'] in types and entry['id'] not in exclude
+    ]
+    # A better fitting type wins a tie (shirt cutters for shirts)
+    candidates.sort(key=lambda entry: (entry['score'], types.index(entry['employee_type']), entry['first_name']))
+    return candidates
+
+
+def suggest(item_type, due_date=None, today=None, order=None):
+    """{field: ranked candidates} for every assignee field ``item_type`` uses.
+
+    ``order`` is the order being edited: it is not counted against its current assignees.
+    """
+    index = workload_index()
+    if order is not None and order.pk and order.current_status != FINAL_STATUS:
+        index = release(index, order, today)
+    days_left = (due_date - today).days if due_date and today else None
+    return {
+        field: rank(field, item_type, days_left, index)[:SUGGESTIONS]
+        for field in ASSIGNEE_FIELDS
+        if field in ASSIGNEE_TYPES.get(item_type, {})
+    }
+
+
+def release(index, order, today):
+    """A copy of ``index`` without ``order``'s load on its assignees"""
+    index = dict(index)
+    for field in ASSIGNEE_FIELDS:
+        employee_id = getattr(order, f'{field}_id')
+        if employee_id in index:
+            entry = index[employee_id] = {**index[employee_id], 'fields': dict(index[employee_id]['fields'])}
+            entry['active'] -= 1
+            entry['fields'][field] = entry['fields'].get(field, 1) - 1
+            if today and order.due_date < today:
+                entry['overdue'] -= 1
+    return index
+
+
+def take(index, employee_id, field, overdue):
+    """Count a new assignment in ``index`` so the next pick in a batch sees it"""
+    entry = index[employee_id] = {**index[employee_id], 'fields': dict(index[employee_id]['fields'])}
+    entry['active'] += 1
+    entry['overdue'] += 1 if overdue else 0
+    entry['fields'][field] = entry['fields'].get(field, 0) + 1
+
+
+def auto_assign(orders, today):
+    """Fill the empty assignee fields of unfinished ``orders``, most urgent first.
+
+    Returns the orders that changed (not saved) and the names of the fields that were set.
+    """
+    index = dict(workload_index())
+    changed, fields = [], set()
+    for order in sorted(orders, key=lambda order: (order.due_date, order.pk)):
+        if order.current_status == FINAL_STATUS:
+            continue
+        days_left = (order.due_date - today).days
+        picked = False
+        for field in ASSIGNEE_TYPES.get(order.item_type, {}):
+            if getattr(order, f'{field}_id'):
+                continue
+            # Nobody takes two roles on one order
+            taken = {getattr(order, f'{other}_id') for other in ASSIGNEE_FIELDS}
+            candidates = rank(field, order.item_type, days_left, index, exclude=taken)
+            if not candidates:
+                continue
+            setattr(order, f'{field}_id', candidates[0]['id'])
+            take(index, candidates[0]['id'], field, days_left < 0)
+            fields.add(field)
+            picked = True
+        if picked:
+            changed.append(order)
+    return changed, sorted(fields)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from tailor_system.assets import BUILD_STEPS, missing_collected, missing_sources
+
+
+@register(Tags.staticfiles)
+def vendor_assets_check(app_configs, **kwargs):
+    """The front-end build output is gitignored; name the step that makes it"""
+    missing = missing_sources()
+    if not missing:
+        return []
+    return [Warning(
+        f'Front-end assets are not built, pages load the CDN fallback: {", ".join(missing)}.',
+        hint=BUILD_STEPS.capitalize() + '.', id='orders.W002',
+    )]
+
+
+@register(Tags.staticfiles, deploy=True)
+def collected_assets_check(app_configs, **kwargs):
+    """Production should serve the collected, fingerprinted build rather than the CDN fallback"""
+    missing = missing_collected()
+    if not missing:
+        return []
+    return [Warning(
+        f'The staticfiles manifest has no entries for {", ".join(missing)}; pages load the CDN fallback.',
+        hint=f'{BUILD_STEPS.capitalize()} and "python manage.py collectstatic".', id='orders.W003',
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """Fragment and workload invalidations only reach other workers through a shared cache"""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend.endswith(('.LocMemCache', '.DummyCache')):
+        return [Warning(
+            f'The default cache ({backend}) is private to each worker process.',
+            hint='Set REDIS_URL or MEMCACHED_LOCATION when running more than one worker, '
+                 'otherwise cached order fragments stay stale in the other workers.',
+            id='orders.W001',
+        )]
+    return []
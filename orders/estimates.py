@@ -0,0 +1,144 @@
+"""Suggested due dates from past status durations and current workload.
+
+An order's remaining time is the sum, over the steps of its item type's
+workflow, of how long orders of that type usually stay in each step (the p90
+of ``reports.StatusTransition`` stays, so most orders finish in time). A stay
+ends when the next status is reached, and that status names who does the work
+(cutter or sewer); the stays of a busy assignee are stretched by their queue
+of unfinished orders relative to the average queue of cutters or sewers.
+
+Both inputs are precomputed and cached, so an estimate is a few dictionary
+lookups: the percentiles until ``manage.py refresh_status_durations`` (cron)
+replaces them, the queues in the workload index (orders.workload). Requests
+never compute the percentiles; until the command has run there is no estimate.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .workflows import FINAL_STATUS, status_label, workflow_for
+from .workload import workload_index
+
+
+STEPS_KEY = 'orders:estimates:steps'
+ROLE_FIELDS = {
+    'cutter': ['assigned_cutter'],
+    'sewer': ['assigned_tailor', 'assigned_trouser_maker'],
+}
+
+# The status that ends a stay -> assignee doing the work (cutters also mill after each fitting)
+STEP_ROLES = {
+    'cutter_cutting': 'cutter',
+    'tailor_first_completion': 'cutter',
+    'tailor_second_completion': 'cutter',
+    'seamstress_second_prep': 'sewer',
+    'seamstress_finished': 'sewer',
+}
+ROLE_LABELS = {'cutter': 'Эсгүүрчин', 'sewer': 'Оёдолчин'}
+
+
+def refresh_step_durations():
+    """Recompute and cache the usual stay per step from StatusTransition as last refreshed"""
+    from reports.analytics import percentiles
+
+    since = timezone.now() - timedelta(days=settings.DUE_DATE_HISTORY_DAYS)
+    steps = {
+        'item_types': {
+            key: p90 for key, (count, _, _, p90) in percentiles('item_type, status', since).items()
+            if count >= settings.DUE_DATE_MIN_SAMPLES
+        },
+        'statuses': {key: p90 for key, (_, _, _, p90) in percentiles('status', since).items()},
+    }
+    # Kept until the next refresh: stale durations beat no estimate when cron is late
+    cache.set(STEPS_KEY, steps, None)
+    return steps
+
+
+def step_durations():
+    """{'item_types': {(item_type, status): p90}, 'statuses': {status: p90}} in seconds, None before the first refresh"""
+    return cache.get(STEPS_KEY)
+
+
+def employee_queues():
+    """{'queues': {employee id: unfinished orders in any role}, 'averages': {role: usual queue}}"""
+    index = workload_index()
+    queues = {employee_id: entry['active'] for employee_id, entry in index.items() if entry['active']}
+    # Cutters and sewers are compared with their own kind; there are fewer cutters
+    averages = {}
+    for role, fields in ROLE_FIELDS.items():
+        members = [entry['active'] for entry in index.values() if any(field in entry['fields'] for field in fields)]
+        averages[role] = sum(members) / len(members) if members else 0
+    return {'queues': queues, 'averages': averages}
+
+
+def load_factor(employee_ids, queues, average):
+    """How much longer than usual the busiest of these employees takes (never below 1), and their queue"""
+    busiest = max((queues.get(employee_id, 0) for employee_id in employee_ids), default=None)
+    if busiest is None or not average:
+        return 1.0, busiest
+    return max(1.0, (busiest + 1) / (average + 1)), busiest
+
+
+def estimate_due_date(item_type, start_date, cutter_id=None, tailor_id=None, trouser_maker_id=None, order=None):
+    """Suggested due date for an order starting on ``start_date`` with these assignees.
+
+    ``order`` is the order being edited: it is not counted in its own assignees' queues.
+    """
+    steps = step_durations()
+    if steps is None:
+        return None
+    load = employee_queues()
+    queues = dict(load['queues'])
+    if order is not None and order.pk and order.current_status != FINAL_STATUS:
+        for fields in ROLE_FIELDS.values():
+            for field in fields:
+                employee_id = getattr(order, f'{field}_id')
+                if employee_id in queues:
+                    queues[employee_id] -= 1
+
+    assignees = {
+        'cutter': [cutter_id],
+        # Jacket and trousers are sewn side by side; the busier sewer sets the pace
+        'sewer': [tailor_id, trouser_maker_id],
+    }
+    factors = {
+        role: load_factor([employee_id for employee_id in ids if employee_id], queues, load['averages'][role])
+        for role, ids in assignees.items()
+    }
+
+    workflow = workflow_for(item_type)
+    seconds = 0
+    breakdown = []
+    for code in workflow.codes:
+        following = workflow.next(code)
+        if following is None:
+            break
+        usual = steps['item_types'].get((item_type, code), steps['statuses'].get(code))
+        if usual is None:
+            continue
+        role = STEP_ROLES.get(following)
+        factor = factors[role][0] if role else 1.0
+        seconds += usual * factor
+        breakdown.append({
+            'status': code, 'label': status_label(code), 'role': ROLE_LABELS.get(role, ''),
+            'days': round(usual * factor / 86400, 1),
+        })
+
+    if not breakdown:
+        return None
+    days = max(1, math.ceil(seconds / 86400))
+    return {
+        'due_date': start_date + timedelta(days=days),
+        'days': days,
+        'steps': breakdown,
+        'queues': {
+            role: {
+                'active_orders': busiest, 'average': round(load['averages'][role], 1),
+                'factor': round(factor, 2), 'label': ROLE_LABELS[role],
+            }
+            for role, (factor, busiest) in factors.items() if busiest is not None
+        },
+    }
@@ -0,0 +1,111 @@
+"""In-process broadcast of order status history events to Server-Sent Events clients.
+
+Every new ``OrderStatusHistory`` row is published once its transaction commits.
+Connected clients each get an asyncio queue; a ring buffer of recent events lets
+a reconnecting client resume from its ``Last-Event-ID`` without touching the
+database. Only events written by this process are seen, so live screens must
+be served by the same ASGI process that handles order updates.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def history_event(history):
+    """Event payload for one OrderStatusHistory row"""
+    order = history.order
+    employee = history.completed_by
+    return {
+        'id': history.pk,
+        'order_id': order.pk,
+        'order_number': order.order_number,
+        'status': history.status,
+        'status_display': history.get_status_display(),
+        'employee': employee.full_name if employee else None,
+        'completed_at': history.completed_at,
+        'notes': history.notes,
+        'current_status': order.current_status,
+        'current_status_display': order.status_display,
+        'status_color': order.get_status_color(),
+        'progress': order.progress_percentage,
+    }
+
+
+def format_event(event):
+    """Serialize an event in the text/event-stream wire format"""
+    data = json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f'id: {event["id"]}\nevent: status\ndata: {data}\n\n'
+
+
+def events_after(recent, after):
+    # Ids may skip (rows written by other processes or bulk imports), so only trust
+    # the buffer when it starts at or before the cursor
+    if not recent or recent[0]['id'] > after + 1:
+        return None
+    return [event for event in recent if event['id'] > after]
+
+
+class StatusEventHub:
+    """Fan out published events to every subscribed asyncio queue"""
+
+    def __init__(self, buffer_size=None, queue_size=100):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=buffer_size or getattr(settings, 'ORDER_EVENTS_BUFFER', 500))
+        self._subscribers = set()
+        self.queue_size = queue_size
+
+    def publish(self, event):
+        # Called from request threads; queues belong to the event loop of the streaming request
+        with self._lock:
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe(queue)
+
+    def _deliver(self, queue, event):
+        if queue.full():
+            # Too slow to keep up: end its stream, the browser reconnects and catches up
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        else:
+            queue.put_nowait(event)
+
+    def subscribe(self, after=None):
+        """Register a queue for live events.
+
+        Returns ``(queue, backlog)``; ``backlog`` holds buffered events newer than
+        ``after``, or is None when the buffer no longer reaches back that far.
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        # Snapshot and registration under one lock, so no event falls in between
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+            recent = list(self._recent)
+        return queue, ([] if after is None else events_after(recent, after))
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = {item for item in self._subscribers if item[1] is not queue}
+
+    def recent(self, after):
+        """Buffered events newer than ``after``, or None when that point is no longer buffered"""
+        with self._lock:
+            recent = list(self._recent)
+        return events_after(recent, after)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+hub = StatusEventHub()
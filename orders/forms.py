@@ -2,9 +2,33 @@ from decimal import Decimal, InvalidOperation
 
 from django import forms
 from django.contrib.auth.models import User
-from .models import Order, ProcessStep, EmployeeRating
+from django.db import transaction
+from .images import DESIGN_IMAGE_FIELDS
+from .models import DesignUpload, Order, ProcessStep, EmployeeRating
+from .uploads import attach_upload
 from customers.models import Customer
 from employees.models import Employee
+from materials.models import Material
+from materials.stock import reserve_for_order
+
+
+def parse_amount(value):
+    """Remove thousands separators from an amount and convert it to Decimal"""
+    if isinstance(value, str):
+        value = value.replace(',', '').strip()
+    try:
+        return Decimal(value)
+    except (InvalidOperation, ValueError, TypeError):
+        raise forms.ValidationError('Зөвхөн тоо оруулна уу')
+
+
+def advance_amount_error(total, advance):
+    """Return the validation message for an advance payment, or None if it is valid"""
+    if advance < Decimal('0'):
+        return 'Урьдчилгаа дүн 0-ээс бага байж болохгүй.'
+    if advance > total and advance != Decimal('0'):
+        return 'Урьдчилгаа дүн нийт дүнгээс их байж болохгүй.'
+    return None
 
 
 class OrderForm(forms.ModelForm):
@@ -27,11 +51,16 @@ class OrderForm(forms.ModelForm):
         widget=forms.Select(attrs={'class': 'form-control'}),
         label="Өмдний оёдолчин"
     )
+    # Chunked uploads (orders.uploads) sent by static/js/design_upload.js in place of the file inputs
+    design_front_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    design_back_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    design_side_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    design_reference_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
     
     class Meta:
         model = Order
         fields = [
-            'customer', 'item_type', 'material_code',
+            'customer', 'item_type', 'material', 'material_quantity',
             'assigned_tailor', 'assigned_cutter', 'assigned_trouser_maker',
             'total_amount', 'advance_amount', 'start_date', 'due_date', 'notes',
             'design_front', 'design_back', 'design_side', 'design_reference'
@@ -39,7 +68,8 @@ class OrderForm(forms.ModelForm):
         widgets = {
             'customer': forms.Select(attrs={'class': 'form-control'}),
             'item_type': forms.Select(attrs={'class': 'form-control'}),
-            'material_code': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Материалын код'}),
+            'material': forms.Select(attrs={'class': 'form-control'}),
+            'material_quantity': forms.NumberInput(attrs={'class': 'form-control', 'min': 0, 'step': '0.01'}),
             'total_amount': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Жишээ: 1,800,000'}),
             'advance_amount': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Жишээ: 500,000'}),
             'start_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
@@ -51,8 +81,10 @@ class OrderForm(forms.ModelForm):
             'design_reference': forms.FileInput(attrs={'class': 'form-control', 'accept': 'image/*'}),
         }
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, user=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.user = user
+        self.uploads = {}
         
         # Allow selecting from all active employees except managers, ordered by employee type then name
         all_employees = Employee.objects.filter(is_active=True).exclude(employee_type='manager').order_by('employee_type', 'first_name')
@@ -67,6 +99,14 @@ class OrderForm(forms.ModelForm):
         self.fields['assigned_trouser_maker'].queryset = all_employees
         self.fields['assigned_trouser_maker'].label_from_instance = lambda obj: f"{obj.first_name} ({obj.get_employee_type_display()})"
         
+        # Unreserved stock next to each material
+        self.fields['material'].queryset = Material.objects.order_by('code', 'name')
+        self.fields['material'].label_from_instance = lambda obj: f"{obj} (үлдэгдэл {obj.available_quantity} {obj.unit})"
+        if self.instance.material_consumed:
+            # The fabric has been cut already
+            self.fields['material'].disabled = True
+            self.fields['material_quantity'].disabled = True
+        
         # Set default dates
         from datetime import date, timedelta
         from reports.models import SystemSettings
@@ -96,26 +136,15 @@ class OrderForm(forms.ModelForm):
         """Clean and validate total_amount field - remove commas and convert to decimal"""
         value = self.cleaned_data.get('total_amount')
         if value:
-            # Remove commas from the formatted number
-            if isinstance(value, str):
-                value = value.replace(',', '')
-            try:
-                # Convert to Decimal to validate it's a number
-                return Decimal(value)
-            except (InvalidOperation, ValueError, TypeError):
-                raise forms.ValidationError('Зөвхөн тоо оруулна уу')
+            # Remove commas from the formatted number and validate it's a number
+            return parse_amount(value)
         return value
     
     def clean_advance_amount(self):
         """Clean and validate advance_amount field - remove commas and convert to decimal"""
         value = self.cleaned_data.get('advance_amount')
         if value is not None:
-            if isinstance(value, str):
-                value = value.replace(',', '')
-            try:
-                return Decimal(value)
-            except (InvalidOperation, ValueError, TypeError):
-                raise forms.ValidationError('Зөвхөн тоо оруулна уу')
+            return parse_amount(value)
         return Decimal('0')
 
     def clean(self):
@@ -123,14 +152,31 @@ class OrderForm(forms.ModelForm):
         total = cleaned_data.get('total_amount') or Decimal('0')
         advance = cleaned_data.get('advance_amount') or Decimal('0')
 
-        if advance < Decimal('0'):
-            self.add_error('advance_amount', 'Урьдчилгаа дүн 0-ээс бага байж болохгүй.')
+        error = advance_amount_error(total, advance)
+        if error:
+            self.add_error('advance_amount', error)
 
-        if advance > total and advance != Decimal('0'):
-            self.add_error('advance_amount', 'Урьдчилгаа дүн нийт дүнгээс их байж болохгүй.')
+        for field, _ in DESIGN_IMAGE_FIELDS:
+            upload_id = cleaned_data.get(f'{field}_upload')
+            if not upload_id:
+                continue
+            upload = DesignUpload.objects.filter(pk=upload_id, created_by=self.user, completed=True).first()
+            if upload is None:
+                self.add_error(field, 'Оруулсан зураг олдсонгүй. Дахин сонгоно уу.')
+            else:
+                self.uploads[field] = upload
 
         return cleaned_data
 
+    def save(self, commit=True):
+        """Save the order; raises materials.stock.InsufficientStock (and saves nothing) when its fabric is not in stock"""
+        with transaction.atomic():
+            if commit:
+                reserve_for_order(self.instance)
+            for field, upload in self.uploads.items():
+                attach_upload(self.instance, field, upload, save=False)
+            return super().save(commit)
+
 
 class ProcessStepForm(forms.ModelForm):
     class Meta:
@@ -153,3 +199,15 @@ class EmployeeRatingForm(forms.ModelForm):
             'rating': forms.NumberInput(attrs={'class': 'form-control', 'min': 1, 'max': 5, 'step': 1}),
             'comment': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
+
+
+class OrderImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label="CSV файл",
+        widget=forms.FileInput(attrs={'accept': '.csv,text/csv'})
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label="Зөвхөн шалгах",
+        help_text="Мөрүүдийг шалгаад хадгалахгүй"
+    )
@@ -0,0 +1,48 @@
+"""Cached order detail fragments (status timeline, employee ratings).
+
+Fragment keys embed a per-order version token. Saving or deleting a status
+history row or an employee rating replaces the token, so every cached fragment
+of that order is skipped at once without having to know its keys. A global
+generation token, also in the key, does the same for every order after bulk
+rewrites such as ``fix_order_data``.
+
+The tokens only reach other worker processes through a shared cache backend
+(``REDIS_URL`` or ``MEMCACHED_LOCATION`` in settings).
+"""
+import uuid
+
+from django.core.cache import cache
+
+
+GENERATION_KEY = 'orders:fragment_generation'
+
+
+def version_key(order_id):
+    return f'orders:fragment_version:{order_id}'
+
+
+def fragment_version(order_id):
+    """Current version token of an order's fragments, created on first use"""
+    keys = [GENERATION_KEY, version_key(order_id)]
+    tokens = cache.get_many(keys)
+    if len(tokens) < len(keys):
+        for key in keys:
+            if key not in tokens:
+                # add() keeps a token another request set in the meantime
+                cache.add(key, uuid.uuid4().hex, None)
+        tokens = cache.get_many(keys)
+    return '.'.join(tokens.get(key, '') for key in keys)
+
+
+def invalidate_fragments(order_ids):
+    """Replace the version tokens of the given orders"""
+    cache.set_many({version_key(order_id): uuid.uuid4().hex for order_id in order_ids}, None)
+
+
+def invalidate_all_fragments():
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def fragment_key(name, order, version):
+    # updated_at covers edits of the order itself (status, assigned employees)
+    return f'orders:fragment:{name}:{order.pk}:{version}:{order.updated_at.timestamp()}'
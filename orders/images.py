@@ -0,0 +1,206 @@
+"""Resized WebP/JPEG variants of order design images.
+
+Uploads are usually full-size phone photos. Design images are stored once per
+distinct content in ``design_storage`` (see ``ContentAddressedStorage``). After
+an order is saved, a worker thread stores each new design image again upright
+and without EXIF metadata (which may carry the GPS position), then writes
+variants at ``DESIGN_IMAGE_WIDTHS`` next to it::
+
+    order_designs/blobs/3f/3f2a...c1.jpg
+    order_designs/blobs/3f/variants/3f2a...c1.jpg/640w.webp
+    order_designs/blobs/3f/variants/3f2a...c1.jpg/640w.jpg
+
+Orders sharing an image share its variants. ``Order.design_variants`` records
+which original the variants belong to, so a page only offers them once they
+exist and for the image currently attached. An original replaced by its
+stripped copy is deleted as soon as no order refers to it; other files no order
+refers to any more are removed by the ``gc_design_images`` command.
+"""
+import io
+import logging
+import posixpath
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from tailor_system.storage import ContentAddressedStorage
+
+
+logger = logging.getLogger(__name__)
+
+# Order field -> label shown on the order pages
+DESIGN_IMAGE_FIELDS = [
+    ('design_front', 'Зураг 1'),
+    ('design_back', 'Зураг 2'),
+    ('design_side', 'Зураг 3'),
+    ('design_reference', 'Зураг 4'),
+]
+
+# Variant format -> (file extension, MIME type, Pillow save options)
+FORMATS = {
+    'webp': ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Originals of the four design image fields
+design_storage = ContentAddressedStorage(directory='order_designs/blobs')
+# Variant names are fixed per original, and two orders sharing an image may build them at once
+variant_storage = FileSystemStorage(allow_overwrite=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DESIGN_IMAGE_WORKERS', 2),
+                thread_name_prefix='image-worker',
+            )
+    return _executor
+
+
+def variant_name(name, width, fmt):
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, 'variants', filename, f'{width}w.{FORMATS[fmt][0]}')
+
+
+def variant_widths(width):
+    """Configured widths, capped at the image's own width (never upscaled)"""
+    return sorted({min(target, width) for target in settings.DESIGN_IMAGE_WIDTHS})
+
+
+def encode(image, fmt, **options):
+    buffer = io.BytesIO()
+    if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+        # JPEG has no alpha; flatten onto white
+        background = Image.new('RGB', image.size, 'white')
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    elif fmt == 'webp' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+    # EXIF is only written when passed explicitly; the colour profile is kept
+    image.save(buffer, fmt.upper(), icc_profile=image.info.get('icc_profile'), **options)
+    return buffer.getvalue()
+
+
+def build_variants(storage, name):
+    """Clean up one original and write its variants; returns (original name, widths)"""
+    with storage.open(name, 'rb') as file:
+        original = Image.open(file)
+        original.load()
+    has_metadata = bool(original.getexif()) or 'exif' in original.info or 'xmp' in original.info
+    # Applies the EXIF orientation to the pixels
+    image = ImageOps.exif_transpose(original)
+
+    if has_metadata:
+        # Stored as a new file; the original may be shared with other orders
+        fmt = original.format.lower() if original.format in ('JPEG', 'PNG', 'WEBP') else 'png'
+        options = {'quality': 95} if fmt in ('jpeg', 'webp') else {}
+        name = storage.save(name, ContentFile(encode(image, fmt, **options)))
+
+    widths = variant_widths(image.width)
+    for width in widths:
+        targets = {fmt: variant_name(name, width, fmt) for fmt in FORMATS}
+        # Built already for another order with the same image
+        targets = {fmt: target for fmt, target in targets.items() if not variant_storage.exists(target)}
+        if not targets:
+            continue
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS) if width < image.width else image
+        for fmt, target in targets.items():
+            variant_storage.save(target, ContentFile(encode(resized, fmt, **FORMATS[fmt][2])))
+    return name, widths
+
+
+def referenced_names():
+    """How many design image fields refer to each stored file"""
+    from .models import Order
+
+    references = Counter()
+    for field, _ in DESIGN_IMAGE_FIELDS:
+        references.update(Order.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(field, flat=True))
+    return references
+
+
+def pending_fields(order):
+    """Design fields whose current image has no variants yet"""
+    variants = order.design_variants or {}
+    return [
+        field for field, _ in DESIGN_IMAGE_FIELDS
+        if getattr(order, field) and variants.get(field, {}).get('name') != getattr(order, field).name
+    ]
+
+
+def process_order_images(order_id, fields):
+    """Build variants for ``fields`` of one order and record them on the order"""
+    from .models import Order
+
+    order = Order.objects.filter(pk=order_id).first()
+    if order is None:
+        return
+    results = {}
+    for field in fields:
+        file = getattr(order, field)
+        if not file:
+            continue
+        try:
+            results[field] = build_variants(file.storage, file.name), file.name
+        except Exception:
+            # A broken upload must not stop the other images
+            logger.exception('Could not build variants for order %s %s (%s)', order_id, field, file.name)
+
+    with transaction.atomic():
+        order = Order.objects.select_for_update().filter(pk=order_id).first()
+        if order is None:
+            return
+        variants = dict(order.design_variants or {})
+        renamed = {}
+        for field, ((name, widths), uploaded) in results.items():
+            if getattr(order, field).name != uploaded:
+                # Replaced again while we were working; its own task handles it
+                continue
+            variants[field] = {'name': name, 'widths': widths}
+            if name != uploaded:
+                renamed[field] = name
+        # updated_at changes the page's ETag, so browsers pick up the new srcset
+        Order.objects.filter(pk=order_id).update(design_variants=variants, updated_at=timezone.now(), **renamed)
+
+        # The originals replaced by stripped copies still carry their EXIF; remove those
+        # no other order refers to (orders sharing one repoint and remove it in turn)
+        replaced = {results[field][1] for field in renamed}
+        for field, _ in DESIGN_IMAGE_FIELDS:
+            if replaced:
+                replaced -= set(Order.objects.filter(**{f'{field}__in': replaced}).values_list(field, flat=True))
+        if replaced:
+            storage = order._meta.get_field(next(iter(renamed))).storage
+            transaction.on_commit(lambda: delete_files(storage, replaced), robust=True)
+
+
+def delete_files(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def _run(order_id, fields):
+    close_old_connections()
+    try:
+        process_order_images(order_id, fields)
+    finally:
+        close_old_connections()
+
+
+def schedule(order_id, fields):
+    """Build the variants in a worker thread, off the request"""
+    get_executor().submit(_run, order_id, fields)
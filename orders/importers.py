@@ -0,0 +1,320 @@
+import csv
+import re
+import time
+from datetime import datetime, time as dt_time
+
+from django import forms
+from django.db import transaction
+from django.utils import timezone
+
+from .forms import parse_amount, advance_amount_error
+from .models import Order, OrderStatusHistory
+from .workflows import FINAL_STATUS, FIRST_STATUS
+from customers.models import Customer
+from employees.models import Employee
+from materials.models import Material
+
+
+IMPORT_COLUMNS = [
+    'order_number', 'customer_phone', 'item_type', 'material_code',
+    'total_amount', 'advance_amount', 'start_date', 'due_date', 'current_status',
+    'cutter_phone', 'tailor_phone', 'trouser_maker_phone', 'notes',
+]
+
+DATE_FORMATS = ['%Y-%m-%d', '%Y.%m.%d', '%Y/%m/%d']
+
+ORDER_NUMBER_PATTERN = re.compile(r'^ORD-(\d{6})-(\d+)$')
+
+
+def normalize_phone(phone):
+    """Keep only the digits of a phone number and drop the +976 country code"""
+    digits = re.sub(r'\D', '', phone or '')
+    if len(digits) > 8 and digits.startswith('976'):
+        digits = digits[3:]
+    return digits
+
+
+def parse_date(value):
+    """Parse a ledger date written as 2025-10-01, 2025.10.01 or 2025/10/01"""
+    value = (value or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise forms.ValidationError(f'Огноо буруу байна: "{value}"')
+
+
+class RowError(Exception):
+    """A CSV row that cannot be imported"""
+
+
+class OrderNumberAllocator:
+    """Hand out ORD-YYYYMM-NNN numbers in blocks, one lookup per month prefix"""
+
+    def __init__(self):
+        self._next_seq = {}
+
+    def _load(self, prefix):
+        last_seq = 0
+        numbers = Order.objects.filter(order_number__startswith=prefix).values_list('order_number', flat=True)
+        for number in numbers:
+            match = ORDER_NUMBER_PATTERN.match(number)
+            if match:
+                last_seq = max(last_seq, int(match.group(2)))
+        return last_seq + 1
+
+    def reserve(self, prefix, count):
+        """Reserve `count` consecutive order numbers for the given prefix"""
+        if prefix not in self._next_seq:
+            self._next_seq[prefix] = self._load(prefix)
+        start = self._next_seq[prefix]
+        self._next_seq[prefix] = start + count
+        return [f"{prefix}{seq:03d}" for seq in range(start, start + count)]
+
+    def skip_past(self, order_number):
+        """Make sure explicitly imported numbers are never handed out again"""
+        match = ORDER_NUMBER_PATTERN.match(order_number)
+        if not match:
+            return
+        prefix = f"ORD-{match.group(1)}-"
+        if prefix not in self._next_seq:
+            self._next_seq[prefix] = self._load(prefix)
+        self._next_seq[prefix] = max(self._next_seq[prefix], int(match.group(2)) + 1)
+
+
+class ImportResult:
+    """Summary of an import run"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.rows / self.elapsed
+
+    def add_error(self, line_number, message):
+        self.errors.append((line_number, message))
+
+
+class OrderImporter:
+    """Import orders from a CSV stream with batched inserts.
+
+    Lookups (customers, employees, materials, existing order numbers) are
+    loaded once up front so validating a row never touches the database; orders
+    and their status history (see ``build_history``) are written with
+    ``bulk_create`` one batch at a time.
+    """
+
+    def __init__(self, batch_size=500, completed_by=None, dry_run=False):
+        self.batch_size = batch_size
+        self.completed_by = completed_by
+        self.dry_run = dry_run
+        self.allocator = OrderNumberAllocator()
+        self.item_types = dict(Order.ITEM_TYPE_CHOICES)
+        self.item_type_labels = {label: code for code, label in Order.ITEM_TYPE_CHOICES}
+        self.statuses = dict(Order.STATUS_CHOICES)
+        self._customers = None
+        self._employees = None
+        self._materials = None
+        self._seen_numbers = set()
+
+    def load_lookups(self):
+        """Build the phone -> id maps used to resolve rows without per-row queries"""
+        self._customers = {}
+        for customer_id, phone in Customer.objects.values_list('id', 'phone').order_by('id'):
+            # First registered customer wins when a phone number is shared
+            self._customers.setdefault(normalize_phone(phone), customer_id)
+
+        # Same employee set OrderForm offers in its assignment dropdowns
+        self._employees = {}
+        employees = Employee.objects.filter(is_active=True).exclude(employee_type='manager')
+        for employee_id, phone in employees.values_list('id', 'phone').order_by('id'):
+            self._employees.setdefault(normalize_phone(phone), employee_id)
+
+        self._materials = dict(Material.objects.filter(code__isnull=False).values_list('code', 'id'))
+
+    def _resolve_employee(self, row, column):
+        phone = normalize_phone(row.get(column))
+        if not phone:
+            return None
+        try:
+            return self._employees[phone]
+        except KeyError:
+            raise RowError(f'{column}: ажилтан олдсонгүй ({row.get(column)})')
+
+    def build_order(self, row):
+        """Validate one CSV row with the same rules as OrderForm and return an unsaved Order"""
+        phone = normalize_phone(row.get('customer_phone'))
+        if not phone:
+            raise RowError('customer_phone: утасны дугаар хоосон байна')
+        customer_id = self._customers.get(phone)
+        if customer_id is None:
+            raise RowError(f'customer_phone: үйлчлүүлэгч олдсонгүй ({row.get("customer_phone")})')
+
+        item_type = (row.get('item_type') or '').strip()
+        item_type = self.item_type_labels.get(item_type, item_type)
+        if item_type not in self.item_types:
+            raise RowError(f'item_type: буруу төрөл "{item_type}"')
+
+        current_status = (row.get('current_status') or '').strip() or FIRST_STATUS
+        if current_status not in self.statuses:
+            raise RowError(f'current_status: буруу статус "{current_status}"')
+
+        try:
+            total_amount = parse_amount(row.get('total_amount'))
+            advance_amount = parse_amount(row.get('advance_amount') or '0')
+            start_date = parse_date(row.get('start_date'))
+            due_date = parse_date(row.get('due_date'))
+        except forms.ValidationError as e:
+            raise RowError('; '.join(e.messages))
+
+        if total_amount < 0:
+            raise RowError('total_amount: 0-ээс бага байж болохгүй')
+        error = advance_amount_error(total_amount, advance_amount)
+        if error:
+            raise RowError(f'advance_amount: {error}')
+
+        # Imported orders are linked to their material without a quantity, so stock is neither
+        # reserved nor consumed for them (materials.stock.consume_for_order skips them)
+        material_code = (row.get('material_code') or '').strip()
+        material_id = None
+        if material_code:
+            material_id = self._materials.get(material_code)
+            if material_id is None:
+                raise RowError(f'material_code: материал олдсонгүй ({material_code})')
+
+        order_number = (row.get('order_number') or '').strip()
+        if order_number:
+            if order_number in self._seen_numbers:
+                raise RowError(f'order_number: давхардсан дугаар {order_number}')
+            self._seen_numbers.add(order_number)
+
+        return Order(
+            customer_id=customer_id,
+            order_number=order_number,
+            item_type=item_type,
+            material_id=material_id,
+            assigned_cutter_id=self._resolve_employee(row, 'cutter_phone'),
+            assigned_tailor_id=self._resolve_employee(row, 'tailor_phone'),
+            assigned_trouser_maker_id=self._resolve_employee(row, 'trouser_maker_phone'),
+            total_amount=total_amount,
+            advance_amount=advance_amount,
+            start_date=start_date,
+            due_date=due_date,
+            completed_date=due_date if current_status == FINAL_STATUS else None,
+            current_status=current_status,
+            notes=(row.get('notes') or '').strip() or None,
+        )
+
+    def build_history(self, order):
+        """History rows of an imported order: placed on its start date, then the status it was imported in.
+
+        The ledger does not say when the steps in between were done, so none are made up; the
+        imported status is dated at the start date (or the completed date of a finished order),
+        the latest moment it is known to have been reached by.
+        """
+        tz = timezone.get_current_timezone()
+        placed_at = timezone.make_aware(datetime.combine(order.start_date, dt_time.min), tz)
+        history = [OrderStatusHistory(
+            order_id=order.pk,
+            status=FIRST_STATUS,
+            completed_by=self.completed_by,
+            completed_at=placed_at,
+            notes='Захиалга импортлогдлоо',
+        )]
+        if order.current_status != FIRST_STATUS:
+            reached_on = order.completed_date or order.start_date
+            history.append(OrderStatusHistory(
+                order_id=order.pk,
+                status=order.current_status,
+                completed_by=self.completed_by,
+                completed_at=max(placed_at, timezone.make_aware(datetime.combine(reached_on, dt_time.min), tz)),
+                notes='Импортлох үеийн статус',
+            ))
+        return history
+
+    def _flush(self, batch, result):
+        """Write one batch of (line_number, order) pairs"""
+        explicit = [order.order_number for _, order in batch if order.order_number]
+        if explicit:
+            taken = set(Order.objects.filter(order_number__in=explicit).values_list('order_number', flat=True))
+            if taken:
+                kept = []
+                for line_number, order in batch:
+                    if order.order_number in taken:
+                        result.add_error(line_number, f'order_number: {order.order_number} аль хэдийн бүртгэгдсэн')
+                    else:
+                        kept.append((line_number, order))
+                batch = kept
+            for number in explicit:
+                self.allocator.skip_past(number)
+
+        # Reserve one block of numbers per month prefix
+        pending = {}
+        for _, order in batch:
+            if not order.order_number:
+                pending.setdefault(f"ORD-{order.start_date:%Y%m}-", []).append(order)
+        for prefix, orders in pending.items():
+            for order, number in zip(orders, self.allocator.reserve(prefix, len(orders))):
+                order.order_number = number
+
+        orders = [order for _, order in batch]
+        if not orders or self.dry_run:
+            result.created += len(orders)
+            return
+
+        with transaction.atomic():
+            Order.objects.bulk_create(orders, batch_size=self.batch_size)
+
+            # Backends such as MySQL do not return primary keys from bulk inserts
+            if orders[0].pk is None:
+                ids = dict(Order.objects.filter(
+                    order_number__in=[order.order_number for order in orders]
+                ).values_list('order_number', 'id'))
+                for order in orders:
+                    order.pk = ids[order.order_number]
+
+            OrderStatusHistory.objects.bulk_create(
+                [history for order in orders for history in self.build_history(order)],
+                batch_size=self.batch_size,
+            )
+
+        result.created += len(orders)
+
+    def run(self, stream, progress=None):
+        """Import every row of a text CSV stream and return an ImportResult"""
+        result = ImportResult()
+        started = time.perf_counter()
+        self.load_lookups()
+
+        reader = csv.DictReader(stream)
+        missing = {'customer_phone', 'item_type', 'total_amount', 'start_date', 'due_date'} - set(reader.fieldnames or [])
+        if missing:
+            result.add_error(1, f'Багана дутуу байна: {", ".join(sorted(missing))}')
+            return result
+
+        batch = []
+        for row in reader:
+            result.rows += 1
+            try:
+                batch.append((reader.line_num, self.build_order(row)))
+            except RowError as e:
+                result.add_error(reader.line_num, str(e))
+
+            if len(batch) >= self.batch_size:
+                self._flush(batch, result)
+                batch = []
+                if progress:
+                    progress(result, time.perf_counter() - started)
+
+        if batch:
+            self._flush(batch, result)
+
+        result.elapsed = time.perf_counter() - started
+        return result
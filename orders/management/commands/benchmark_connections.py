@@ -0,0 +1,97 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from tailor_system.db_pool import ConnectionPool
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request database connect overhead with and without connection reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Simulated requests per scenario')
+        parser.add_argument('--max-age', type=int, default=60, help='CONN_MAX_AGE used for the reuse scenarios')
+        parser.add_argument('--database', default='default', help='Database alias to benchmark')
+        parser.add_argument(
+            '--connect-latency', type=float, default=0,
+            help='Extra milliseconds added to every new connection, to imitate a remote handshake against a local stand-in'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be positive')
+        self.alias = options['database']
+        if self.alias not in connections:
+            raise CommandError(f'Unknown database alias "{self.alias}"')
+        settings_dict = connections.settings[self.alias]
+        latency = options['connect_latency'] / 1000
+        self.connects = 0
+
+        def count_connect(sender, connection, **kwargs):
+            if connection.alias == self.alias:
+                self.connects += 1
+                if latency:
+                    time.sleep(latency)
+
+        max_age = options['max_age']
+        scenarios = [
+            ('WSGI, CONN_MAX_AGE=0', 0, self.same_thread),
+            (f'WSGI, CONN_MAX_AGE={max_age}', max_age, self.same_thread),
+            (f'ASGI, CONN_MAX_AGE={max_age}, no pool', max_age, self.thread_per_request),
+            (f'ASGI, CONN_MAX_AGE={max_age}, pooled', max_age, self.pooled),
+        ]
+
+        self.stdout.write(f'{settings_dict["ENGINE"]} {settings_dict["NAME"]}, {options["requests"]} requests')
+        self.stdout.write(f'{"scenario":<40}{"connects":>10}{"ms / request":>15}')
+        original_max_age = settings_dict.get('CONN_MAX_AGE', 0)
+        connection_created.connect(count_connect)
+        try:
+            for label, age, run in scenarios:
+                # Wrappers read CONN_MAX_AGE from this shared dict when they connect
+                settings_dict['CONN_MAX_AGE'] = age
+                connections.close_all()
+                self.connects = 0
+                started = time.perf_counter()
+                run(options['requests'])
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'{label:<40}{self.connects:>10}{elapsed * 1000 / options["requests"]:>15.3f}')
+        finally:
+            connection_created.disconnect(count_connect)
+            settings_dict['CONN_MAX_AGE'] = original_max_age
+            connections.close_all()
+
+    def request(self):
+        """One request cycle as the handlers run it: signals around a single query"""
+        request_started.send(sender=self.__class__)
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        request_finished.send(sender=self.__class__)
+
+    def same_thread(self, count):
+        # WSGI workers serve requests one after another on a long-lived thread
+        for _ in range(count):
+            self.request()
+
+    def thread_per_request(self, count):
+        # ASGI runs each request's sync code in a new thread (ThreadSensitiveContext)
+        def worker():
+            self.request()
+            # The ASGI thread would just drop its connection; close it instead of leaking sockets
+            connections.close_all()
+
+        for _ in range(count):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+    def pooled(self, count):
+        pool = ConnectionPool()
+        pool.install()
+        try:
+            self.thread_per_request(count)
+        finally:
+            pool.uninstall()
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from orders.models import Order
+from tailor_system.startup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Start fresh worker processes and measure their first-request latency per settings profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=3, help='Worker processes started per profile')
+        parser.add_argument('--profiles', nargs='+', default=['development', 'production'], help='DJANGO_ENV values to compare')
+        parser.add_argument('--user', help='Superuser the requests are made as (default: the first one)')
+        # Internal: run inside a freshly started process and print its timings as JSON
+        parser.add_argument('--worker', action='store_true', help='Internal: act as one worker')
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            self.stdout.write(json.dumps(self.run_worker(options['user'])))
+            return
+        if options['workers'] < 1:
+            raise CommandError('--workers must be positive')
+
+        results = {}
+        for profile in options['profiles']:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Starting {options["workers"]} {profile} workers...'))
+            results[profile] = [self.start_worker(profile, options['user']) for _ in range(options['workers'])]
+        self.report(results)
+
+    def start_worker(self, profile, username):
+        command = [sys.executable, sys.argv[0], 'benchmark_startup', '--worker']
+        if username:
+            command += ['--user', username]
+        env = {**os.environ, 'DJANGO_ENV': profile}
+        # Warm-up and debug follow the profile, not whatever the parent shell has set
+        env.pop('TEMPLATE_WARMUP', None)
+        env.pop('DJANGO_DEBUG', None)
+        started = time.perf_counter()
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode:
+            raise CommandError(f'{profile} worker failed:\n{completed.stderr}')
+        timings = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings['process_ms'] = (time.perf_counter() - started) * 1000
+        return timings
+
+    def run_worker(self, username):
+        # Per-request log lines would end up in the JSON output
+        logging.getLogger('tailor_system.requests').setLevel(logging.WARNING)
+        logging.getLogger('tailor_system.nplusone').setLevel(logging.ERROR)
+        logging.getLogger('tailor_system.startup').setLevel(logging.WARNING)
+
+        # What wsgi.py / asgi.py do before serving
+        started = time.perf_counter()
+        warm_up()
+        warmup_ms = (time.perf_counter() - started) * 1000
+
+        users = User.objects.filter(is_superuser=True)
+        user = users.get(username=username) if username else users.order_by('pk').first()
+        if user is None:
+            raise CommandError('No superuser to make the requests as; create one or pass --user')
+        order = Order.objects.order_by('-pk').first()
+        paths = [reverse('dashboard'), reverse('orders:order_list'), reverse('customers:customer_list')]
+        if order:
+            paths.append(reverse('orders:order_detail', args=[order.pk]))
+
+        client = Client()
+        client.force_login(user)
+        try:
+            first, second = [], []
+            for timings in (first, second):
+                for path in paths:
+                    started = time.perf_counter()
+                    client.get(path)
+                    timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            # Remove the session force_login stored
+            client.logout()
+        return {
+            'debug': settings.DEBUG,
+            'warmup_ms': warmup_ms,
+            'first_request_ms': first[0],
+            'first_visit_ms': statistics.mean(first),
+            'repeat_visit_ms': statistics.mean(second),
+        }
+
+    def report(self, results):
+        columns = ['warmup_ms', 'first_request_ms', 'first_visit_ms', 'repeat_visit_ms', 'process_ms']
+        self.stdout.write('')
+        self.stdout.write(f'{"profile":<14}{"worker":>8}' + ''.join(f'{column:>20}' for column in columns))
+        for profile, workers in results.items():
+            for index, timings in enumerate(workers, 1):
+                self.stdout.write(f'{profile:<14}{index:>8}' + ''.join(f'{timings[column]:>20.1f}' for column in columns))
+            medians = {column: statistics.median(timings[column] for timings in workers) for column in columns}
+            self.stdout.write(self.style.SUCCESS(f'{profile:<14}{"median":>8}' + ''.join(f'{medians[column]:>20.1f}' for column in columns)))
+        self.stdout.write('')
+        self.stdout.write('first_visit_ms: mean of the first request to each page; repeat_visit_ms: the same pages again')
@@ -0,0 +1,209 @@
+import io
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from orders.models import Order
+from customers.models import Customer
+from employees.models import Employee
+from reports.models import Report
+from tailor_system.dashboard import CARDS
+from tailor_system.middleware import capture_queries
+
+
+# URL names that are not benchmarked, with the reason
+SKIPPED_URLS = {
+    'logout': 'ends the session',
+    'request_metrics': 'reports on the benchmark itself',
+    'media': 'serves files, not pages',
+    'orders:order_events': 'streams until the client disconnects',
+    'orders:advance_status': 'POST only',
+    'orders:update_step': 'POST only',
+    'orders:rate_employee': 'POST only',
+    'orders:order_delete': 'template orders/order_confirm_delete.html does not exist',
+    'employees:employee_delete': 'template employees/employee_confirm_delete.html does not exist',
+    'reports:report_detail': 'template reports/report_detail.html does not exist',
+    'reports:report_create': 'template reports/report_form.html does not exist',
+    'reports:report_delete': 'template reports/report_confirm_delete.html does not exist',
+}
+
+
+def url_names(patterns=None, namespace=None):
+    """Every named URL pattern in the project, as 'namespace:name'"""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    names = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            inner = namespace
+            if pattern.namespace:
+                inner = f'{namespace}:{pattern.namespace}' if namespace else pattern.namespace
+            names.extend(url_names(pattern.url_patterns, inner))
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.append(f'{namespace}:{pattern.name}' if namespace else pattern.name)
+    return names
+
+
+class Command(BaseCommand):
+    help = 'Measure query count, wall time and peak memory of every view at growing data sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='Order counts to benchmark')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed requests per view (median is reported)')
+        parser.add_argument('--seed', type=int, default=42, help='Seed passed to generate_load_data')
+        parser.add_argument('--json', dest='json_path', help='Also write the raw results to this file')
+
+    def handle(self, *args, **options):
+        sizes = sorted(set(options['sizes']))
+        if sizes[0] < 1 or options['repeat'] < 1:
+            raise CommandError('--sizes and --repeat must be positive')
+
+        # Per-request log lines from the timing middleware would drown the report;
+        # query growth is what flags N+1 patterns here
+        logging.getLogger('tailor_system.requests').setLevel(logging.WARNING)
+        logging.getLogger('tailor_system.nplusone').setLevel(logging.ERROR)
+
+        # Always run against a throwaway test database, never the configured one
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = {}
+            for size in sizes:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'Seeding {size} orders...'))
+                call_command(
+                    'generate_load_data', orders=size, customers=max(100, size // 10),
+                    employees=30, seed=options['seed'], clear=True, stdout=io.StringIO()
+                )
+                results[size] = self.run_views(options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.report(sizes, results)
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({str(size): rows for size, rows in results.items()}, f, indent=2)
+
+        growing = [
+            name for name in results[sizes[0]]
+            if results[sizes[-1]][name]['queries'] > results[sizes[0]][name]['queries']
+        ]
+        if growing and len(sizes) > 1:
+            raise CommandError(f'Query count grows with data size: {", ".join(growing)}')
+        self.stdout.write(self.style.SUCCESS('Query counts are independent of data size'))
+
+    def targets(self):
+        """(url name, path) pairs for every benchmarked view, using the heaviest sample objects"""
+        order = Order.objects.filter(current_status='seamstress_finished').order_by('-pk').first() or Order.objects.first()
+        customer = Customer.objects.annotate(n=Count('order')).order_by('-n').first()
+        employee = Employee.objects.annotate(n=Count('tailor_orders')).order_by('-n').first()
+        today = timezone.now().date()
+        Report.objects.get_or_create(
+            title='Benchmark', report_type='orders_summary',
+            defaults={'period_start': today, 'period_end': today}
+        )
+
+        targets = [
+            ('home', reverse('home')),
+            ('landing', reverse('landing')),
+            ('login', reverse('login')),
+            ('dashboard', reverse('dashboard')),
+            *[(f'dashboard_card:{card}', reverse('dashboard_card', args=[card])) for card in CARDS],
+            ('orders:order_list', reverse('orders:order_list')),
+            ('orders:active_orders', reverse('orders:active_orders')),
+            ('orders:order_create', reverse('orders:order_create')),
+            ('orders:assignment_suggestions', reverse('orders:assignment_suggestions') + f'?item_type={order.item_type}'),
+            ('orders:due_date_estimate', reverse('orders:due_date_estimate') + f'?item_type={order.item_type}&assigned_cutter={employee.pk}'),
+            ('orders:order_detail', reverse('orders:order_detail', args=[order.pk])),
+            ('orders:order_edit', reverse('orders:order_edit', args=[order.pk])),
+            ('customers:customer_list', reverse('customers:customer_list')),
+            ('customers:customer_search', reverse('customers:customer_search') + '?phone=900'),
+            ('customers:customer_create', reverse('customers:customer_create')),
+            ('customers:customer_detail', reverse('customers:customer_detail', args=[customer.pk])),
+            ('customers:customer_json', reverse('customers:customer_json', args=[customer.pk])),
+            ('customers:customer_edit', reverse('customers:customer_edit', args=[customer.pk])),
+            ('customers:customer_delete', reverse('customers:customer_delete', args=[customer.pk])),
+            ('employees:employee_list', reverse('employees:employee_list')),
+            ('employees:employee_create', reverse('employees:employee_create')),
+            ('employees:employee_detail', reverse('employees:employee_detail', args=[employee.pk])),
+            ('employees:employee_edit', reverse('employees:employee_edit', args=[employee.pk])),
+            ('materials:material_list', reverse('materials:material_list')),
+            ('reports:report_list', reverse('reports:report_list')),
+            ('reports:employee_workload', reverse('reports:employee_workload')),
+            ('reports:status_durations', reverse('reports:status_durations') + '?period=all_time'),
+        ]
+
+        covered = {name for name, _ in targets} | {'dashboard_card'} | set(SKIPPED_URLS)
+        for name in url_names():
+            if name not in covered:
+                self.stdout.write(self.style.WARNING(f'  {name} is not benchmarked'))
+        return targets
+
+    def run_views(self, repeat):
+        user = User.objects.filter(username='benchmark').first()
+        if user is None:
+            user = User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark')
+        client = Client()
+        client.force_login(user)
+
+        rows = {}
+        for name, path in self.targets():
+            # Warm-up request fills template and URL caches
+            client.get(path)
+
+            timings = []
+            for _ in range(repeat):
+                # Measure the uncached work of views that cache their output
+                cache.clear()
+                # Also counts queries the view fans out to worker threads
+                with capture_queries() as queries:
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    timings.append(time.perf_counter() - started)
+
+            # Separate pass for memory, tracemalloc would skew the timings
+            tracemalloc.start()
+            client.get(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            rows[name] = {
+                'status': response.status_code,
+                'queries': queries.count,
+                'ms': statistics.median(timings) * 1000,
+                'peak_kib': peak / 1024,
+            }
+        return rows
+
+    def report(self, sizes, results):
+        header = f'{"view":<30}' + ''.join(f'{size:>28}' for size in sizes)
+        self.stdout.write('')
+        self.stdout.write(f'{"":<30}' + ''.join(f'{"queries / ms / peak KiB":>28}' for _ in sizes))
+        self.stdout.write(header)
+        for name in results[sizes[0]]:
+            cells = []
+            for size in sizes:
+                row = results[size][name]
+                cell = f'{row["queries"]} / {row["ms"]:.1f} / {row["peak_kib"]:,.0f}'
+                if row['status'] >= 400:
+                    cell = f'HTTP {row["status"]} ' + cell
+                cells.append(f'{cell:>28}')
+            line = f'{name:<30}' + ''.join(cells)
+            if results[sizes[-1]][name]['queries'] > results[sizes[0]][name]['queries']:
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        self.stdout.write('')
@@ -0,0 +1,99 @@
+import json
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+FRONTEND_DIR = settings.BASE_DIR / 'frontend'
+NODE_MODULES = FRONTEND_DIR / 'node_modules'
+VENDOR_DIR = settings.BASE_DIR / 'static' / 'vendor'
+
+# Tailwind config -> output stylesheet (under static/vendor/css/)
+STYLESHEETS = [
+    ('tailwind.app.config.js', 'app.css'),
+    ('tailwind.landing.config.js', 'landing.css'),
+    ('tailwind.login.config.js', 'login.css'),
+]
+
+# @fontsource package -> weights; Mongolian needs the Cyrillic subset next to Latin
+FONTS = {
+    'inter': [300, 400, 500, 600, 700],
+    'pt-serif': [400, 700],
+    'roboto': [300, 400, 500, 600, 700],
+}
+FONT_SUBSETS = ('latin', 'cyrillic')
+
+ICON_ATTRIBUTE = re.compile(r'data-lucide="([^"]+)"')
+ICON_SCRIPT = re.compile(r"setAttribute\('data-lucide',\s*'([a-z0-9-]+)'\)")
+SVG_BODY = re.compile(r'<svg[^>]*>(.*)</svg>', re.S)
+
+
+class Command(BaseCommand):
+    help = 'Build the self-hosted stylesheets, fonts and icon subset into static/vendor/'
+
+    def handle(self, *args, **options):
+        if not (NODE_MODULES / '.bin' / 'tailwindcss').exists():
+            raise CommandError(f'Front-end tools are missing; run "npm ci" (or "npm install" while there is no package-lock.json) in {FRONTEND_DIR}')
+        VENDOR_DIR.mkdir(parents=True, exist_ok=True)
+
+        self.build_stylesheets()
+        self.build_fonts()
+        self.build_icons()
+        self.stdout.write(self.style.SUCCESS(f'Assets written to {VENDOR_DIR}; run collectstatic to fingerprint and compress them'))
+
+    def build_stylesheets(self):
+        """Compile each Tailwind config into a minified stylesheet holding only the classes in use"""
+        css_dir = VENDOR_DIR / 'css'
+        css_dir.mkdir(exist_ok=True)
+        for config, output in STYLESHEETS:
+            subprocess.run(
+                [str(NODE_MODULES / '.bin' / 'tailwindcss'), '--config', config, '--input', 'tailwind.css',
+                 '--output', str(css_dir / output), '--minify'],
+                cwd=FRONTEND_DIR, check=True, capture_output=True,
+            )
+            self.stdout.write(f'  css/{output}: {(css_dir / output).stat().st_size / 1024:.1f} KiB')
+
+    def build_fonts(self):
+        """Copy the used font files and write one stylesheet with their @font-face rules"""
+        fonts_dir = VENDOR_DIR / 'fonts'
+        fonts_dir.mkdir(exist_ok=True)
+        rules = []
+        for package, weights in FONTS.items():
+            package_dir = NODE_MODULES / '@fontsource' / package
+            for weight in weights:
+                # Each weight's stylesheet holds one @font-face rule per subset
+                for rule in re.findall(r'@font-face\s*\{[^}]*\}', (package_dir / f'{weight}.css').read_text()):
+                    files = re.findall(r'url\(\./files/([^)]+)\)', rule)
+                    if not any(f'-{subset}-' in name for subset in FONT_SUBSETS for name in files):
+                        continue
+                    for name in files:
+                        shutil.copyfile(package_dir / 'files' / name, fonts_dir / name)
+                    rules.append(rule.replace('url(./files/', 'url('))
+        (fonts_dir / 'fonts.css').write_text('\n'.join(rules) + '\n')
+        self.stdout.write(f'  fonts/fonts.css: {len(rules)} font faces')
+
+    def build_icons(self):
+        """Collect the icon names used in templates and scripts and vendor just those"""
+        icons_dir = NODE_MODULES / 'lucide-static' / 'icons'
+        available = {path.stem for path in icons_dir.glob('*.svg')}
+
+        used = set()
+        sources = list((settings.BASE_DIR / 'templates').rglob('*.html')) + list((settings.BASE_DIR / 'static' / 'js').rglob('*.js'))
+        for path in sources:
+            text = path.read_text()
+            for value in ICON_ATTRIBUTE.findall(text):
+                # Values may be template expressions ({% if ... %}save{% else %}plus{% endif %})
+                used.update(word for word in re.findall(r'[a-z0-9]+(?:-[a-z0-9]+)*', value) if word in available)
+            used.update(ICON_SCRIPT.findall(text))
+
+        missing = sorted(used - available)
+        if missing:
+            raise CommandError(f'Unknown lucide icons: {", ".join(missing)}')
+        icons = {name: SVG_BODY.search((icons_dir / f'{name}.svg').read_text()).group(1).strip() for name in sorted(used)}
+        script = f'// Generated by `manage.py build_assets`; lucide icons used by the templates\nwindow.LUCIDE_ICONS = {json.dumps(icons, indent=1)};\n'
+        (VENDOR_DIR / 'lucide-icons.js').write_text(script)
+        self.stdout.write(f'  lucide-icons.js: {len(icons)} icons')
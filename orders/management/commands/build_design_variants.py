@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from orders.images import DESIGN_IMAGE_FIELDS, pending_fields, process_order_images
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Build the resized variants of order design images uploaded before the image pipeline, or rebuild them all'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Rebuild variants that already exist (e.g. after changing DESIGN_IMAGE_WIDTHS)')
+
+    def handle(self, *args, **options):
+        has_image = Q()
+        for field, _ in DESIGN_IMAGE_FIELDS:
+            has_image |= ~Q(**{field: ''}) & Q(**{f'{field}__isnull': False})
+
+        processed = 0
+        for order in Order.objects.filter(has_image).order_by('pk').iterator(chunk_size=200):
+            if options['rebuild']:
+                fields = [field for field, _ in DESIGN_IMAGE_FIELDS if getattr(order, field)]
+            else:
+                fields = pending_fields(order)
+            if fields:
+                process_order_images(order.pk, fields)
+                processed += len(fields)
+
+        self.stdout.write(self.style.SUCCESS(f'Built variants for {processed} images'))
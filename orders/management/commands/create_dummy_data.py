@@ -61,11 +61,11 @@ class Command(BaseCommand):
 
         # Create materials
         materials_data = [
-            {'name': 'Хөвөн даавуу', 'unit_price': Decimal('15000.00'), 'unit': 'метр', 'stock_quantity': Decimal('100.00'), 'supplier': 'Текстиль ХХК'},
-            {'name': 'Шелк даавуу', 'unit_price': Decimal('25000.00'), 'unit': 'метр', 'stock_quantity': Decimal('50.00'), 'supplier': 'Шелк ХХК'},
-            {'name': 'Шинэ даавуу', 'unit_price': Decimal('18000.00'), 'unit': 'метр', 'stock_quantity': Decimal('75.00'), 'supplier': 'Шинэ ХХК'},
-            {'name': 'Хөвөн даавуу 2', 'unit_price': Decimal('12000.00'), 'unit': 'метр', 'stock_quantity': Decimal('80.00'), 'supplier': 'Текстиль ХХК'},
-            {'name': 'Шелк даавуу 2', 'unit_price': Decimal('30000.00'), 'unit': 'метр', 'stock_quantity': Decimal('30.00'), 'supplier': 'Шелк ХХК'},
+            {'code': 'MAT-001', 'name': 'Хөвөн даавуу', 'unit_price': Decimal('15000.00'), 'unit': 'метр', 'stock_quantity': Decimal('100.00'), 'supplier': 'Текстиль ХХК'},
+            {'code': 'MAT-002', 'name': 'Шелк даавуу', 'unit_price': Decimal('25000.00'), 'unit': 'метр', 'stock_quantity': Decimal('50.00'), 'supplier': 'Шелк ХХК'},
+            {'code': 'MAT-003', 'name': 'Шинэ даавуу', 'unit_price': Decimal('18000.00'), 'unit': 'метр', 'stock_quantity': Decimal('75.00'), 'supplier': 'Шинэ ХХК'},
+            {'code': 'MAT-004', 'name': 'Хөвөн даавуу 2', 'unit_price': Decimal('12000.00'), 'unit': 'метр', 'stock_quantity': Decimal('80.00'), 'supplier': 'Текстиль ХХК'},
+            {'code': 'MAT-005', 'name': 'Шелк даавуу 2', 'unit_price': Decimal('30000.00'), 'unit': 'метр', 'stock_quantity': Decimal('30.00'), 'supplier': 'Шелк ХХК'},
         ]
 
         materials = []
@@ -83,7 +83,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[0],
                 'item_type': 'casual_shirt',
-                'material_code': 'MAT-001',
+                'material': materials[0],
                 'total_amount': Decimal('75000.00'),
                 'start_date': datetime.now().date(),
                 'due_date': (datetime.now() + timedelta(days=7)).date(),
@@ -94,7 +94,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[1],
                 'item_type': 'trousers',
-                'material_code': 'MAT-002',
+                'material': materials[1],
                 'total_amount': Decimal('95000.00'),
                 'start_date': datetime.now().date(),
                 'due_date': (datetime.now() + timedelta(days=10)).date(),
@@ -105,7 +105,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[2],
                 'item_type': 'men_suit',
-                'material_code': 'MAT-003',
+                'material': materials[2],
                 'total_amount': Decimal('120000.00'),
                 'start_date': (datetime.now() - timedelta(days=2)).date(),
                 'due_date': (datetime.now() + timedelta(days=5)).date(),
@@ -116,7 +116,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[3],
                 'item_type': 'jacket',
-                'material_code': 'MAT-004',
+                'material': materials[3],
                 'total_amount': Decimal('65000.00'),
                 'start_date': (datetime.now() - timedelta(days=5)).date(),
                 'due_date': (datetime.now() + timedelta(days=2)).date(),
@@ -127,7 +127,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[4],
                 'item_type': 'women_suit',
-                'material_code': 'MAT-005',
+                'material': materials[4],
                 'total_amount': Decimal('150000.00'),
                 'start_date': (datetime.now() - timedelta(days=8)).date(),
                 'due_date': (datetime.now() - timedelta(days=1)).date(),
@@ -138,7 +138,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[5],
                 'item_type': 'coat',
-                'material_code': 'MAT-006',
+                'material': materials[0],
                 'total_amount': Decimal('180000.00'),
                 'start_date': (datetime.now() - timedelta(days=12)).date(),
                 'due_date': (datetime.now() - timedelta(days=3)).date(),
@@ -149,7 +149,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[6],
                 'item_type': 'formal_dress',
-                'material_code': 'MAT-007',
+                'material': materials[1],
                 'total_amount': Decimal('85000.00'),
                 'start_date': (datetime.now() - timedelta(days=15)).date(),
                 'due_date': (datetime.now() - timedelta(days=5)).date(),
@@ -160,7 +160,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[7],
                 'item_type': 'vest',
-                'material_code': 'MAT-008',
+                'material': materials[2],
                 'total_amount': Decimal('110000.00'),
                 'start_date': (datetime.now() - timedelta(days=18)).date(),
                 'due_date': (datetime.now() - timedelta(days=8)).date(),
@@ -171,7 +171,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[0],
                 'item_type': 'wedding_dress',
-                'material_code': 'MAT-009',
+                'material': materials[3],
                 'total_amount': Decimal('140000.00'),
                 'start_date': (datetime.now() - timedelta(days=20)).date(),
                 'due_date': (datetime.now() - timedelta(days=10)).date(),
@@ -182,7 +182,7 @@ class Command(BaseCommand):
             {
                 'customer': customers[1],
                 'item_type': 'repair',
-                'material_code': 'MAT-010',
+                'material': materials[4],
                 'total_amount': Decimal('200000.00'),
                 'start_date': (datetime.now() - timedelta(days=25)).date(),
                 'due_date': (datetime.now() - timedelta(days=15)).date(),
@@ -1,69 +1,166 @@
-from django.core.management.base import BaseCommand
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from orders.fragments import invalidate_all_fragments
 from orders.models import Order, OrderStatusHistory
+from orders.workflows import FINAL_STATUS, STATUS_BY_CODE, workflow_for
 from employees.models import Employee
-from datetime import datetime, timedelta
+from reports.analytics import WATERMARK_KEY, rebuild_orders
+from reports.models import StatusTransition, SystemSettings
+
+
+SEWER_TYPES = ['shirt_sewer', 'jacket_sewer', 'trouser_sewer']
+
+# Employee types credited with each step, same mapping advance_order_status uses
+STEP_EMPLOYEE_TYPES = {
+    'cutter_cutting': ['cutter'],
+    'tailor_first_completion': SEWER_TYPES,
+    'tailor_second_completion': SEWER_TYPES,
+    'seamstress_second_prep': SEWER_TYPES,
+    'seamstress_finished': SEWER_TYPES,
+}
+
+
+def since_date(value):
+    date = parse_date(value)
+    if date is None:
+        raise ValueError(value)
+    return date
+
 
 class Command(BaseCommand):
-    help = 'Fix order data and add status history'
+    help = (
+        'Fix order data and add status history. Rewrites the history of the selected orders, rebuilds '
+        'their status durations with reports.analytics.rebuild_orders and invalidates the cached page '
+        'fragments of all orders.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='History rows written per bulk insert')
+        parser.add_argument('--since', type=since_date, help='Only rebuild orders created on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
 
     def handle(self, *args, **options):
-        # Get employees
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
         employees = list(Employee.objects.all())
         if not employees:
             self.stdout.write(self.style.ERROR('No employees found. Please create employees first.'))
             return
 
-        # Fix each order by adding appropriate status history
+        # First employee of each type, looked up once instead of scanning the list per step
+        first_by_type = {}
+        for employee in employees:
+            first_by_type.setdefault(employee.employee_type, employee)
+        default_employee = employees[0]
+        completed_by_status = {}
+        for status_code in STATUS_BY_CODE:
+            completed_by_status[status_code] = next(
+                (first_by_type[t] for t in STEP_EMPLOYEE_TYPES.get(status_code, []) if t in first_by_type),
+                default_employee
+            )
+
         orders = Order.objects.all()
-        
-        for order in orders:
-            self.stdout.write(f'Processing {order.order_number}...')
-            
-            # Clear existing history
-            order.status_history.all().delete()
-            
-            # Get status choices in order
-            status_choices = [choice[0] for choice in order.STATUS_CHOICES]
-            current_index = status_choices.index(order.current_status)
-            
-            # Add history for all completed statuses
-            for i, status_code in enumerate(status_choices[:current_index + 1]):
-                # Determine who completed this step
-                completed_by = None
-                if status_code in ['order_placed', 'material_arrived']:
-                    completed_by = employees[0] if employees else None
-                elif status_code in ['cutter_cutting']:
-                    completed_by = next((emp for emp in employees if emp.employee_type == 'cutter'), employees[0])
-                elif status_code in ['customer_first_fitting', 'customer_second_fitting']:
-                    completed_by = employees[0] if employees else None  # Set to an employee
-                elif status_code in ['tailor_first_completion', 'tailor_second_completion']:
-                    completed_by = next((emp for emp in employees if emp.employee_type == 'tailor'), employees[0])
-                elif status_code in ['seamstress_second_prep', 'seamstress_finished']:
-                    completed_by = next((emp for emp in employees if emp.employee_type == 'tailor'), employees[0])
-                
-                # Calculate completion time (spread over time)
-                days_ago = current_index - i
-                completed_at = datetime.now() - timedelta(days=days_ago)
-                
-                # Create status history
-                OrderStatusHistory.objects.create(
-                    order=order,
-                    status=status_code,
-                    completed_by=completed_by,
-                    completed_at=completed_at,
-                    notes=f'Алхам {i+1} дууссан'
-                )
-                
-                self.stdout.write(f'  Added history for {status_code}')
-            
-            # If order is finished, mark it as completed
-            if order.current_status == 'seamstress_finished':
-                order.completed_date = datetime.now().date()
-                order.save()
-                self.stdout.write(f'  Marked {order.order_number} as completed')
+        if options['since']:
+            orders = orders.filter(created_at__date__gte=options['since'])
+        total_orders = orders.count()
+
+        started = time.perf_counter()
+        now = timezone.now()
+        processed = 0
+        created = 0
+        batch = []
+        rebuilt = []
+
+        def flush():
+            nonlocal created
+            if not options['dry_run']:
+                OrderStatusHistory.objects.bulk_create(batch, batch_size=batch_size)
+            created += len(batch)
+            batch.clear()
+
+        with transaction.atomic():
+            # Held until commit so a concurrent refresh_status_durations waits for the new history
+            watermark = SystemSettings.objects.select_for_update().filter(key=WATERMARK_KEY).first()
+            latest_before = OrderStatusHistory.objects.aggregate(latest=Max('id'))['latest'] or 0
+
+            history = OrderStatusHistory.objects.filter(order__in=orders)
+            if options['dry_run']:
+                deleted = history.count()
+            else:
+                # The transitions pointing at the rows go first
+                StatusTransition.objects.filter(order__in=orders).delete()
+                # One plain DELETE in this transaction: QuerySet.delete() would fetch every row and
+                # run the per-row post_delete receivers, which the rebuild below replaces
+                order_ids_sql, params = orders.order_by().values('pk').query.sql_with_params()
+                quote = connection.ops.quote_name
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'DELETE FROM {quote(OrderStatusHistory._meta.db_table)} '
+                        f'WHERE {quote(OrderStatusHistory._meta.get_field("order").column)} IN ({order_ids_sql})',
+                        params,
+                    )
+                    deleted = cursor.rowcount
+
+            rows = orders.order_by('pk').values_list('pk', 'item_type', 'current_status')
+            for order_id, item_type, current_status in rows.iterator(chunk_size=batch_size):
+                if current_status not in STATUS_BY_CODE:
+                    self.stdout.write(self.style.WARNING(f'Skipping order {order_id}: unknown status "{current_status}"'))
+                    continue
+
+                # Add history for the completed steps of the order's workflow, spread one day apart
+                steps = workflow_for(item_type).completed_steps(current_status)
+                for i, status_code in enumerate(steps):
+                    batch.append(OrderStatusHistory(
+                        order_id=order_id,
+                        status=status_code,
+                        completed_by=completed_by_status[status_code],
+                        completed_at=now - timedelta(days=len(steps) - 1 - i),
+                        notes=f'Алхам {i+1} дууссан'
+                    ))
+
+                processed += 1
+                rebuilt.append(order_id)
+                if len(batch) >= batch_size:
+                    flush()
+                if processed % 10000 == 0:
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f'  {processed}/{total_orders} orders ({processed / elapsed:,.0f} orders/s)')
+
+            if batch:
+                flush()
+
+            if not options['dry_run']:
+                rebuild_orders(rebuilt, replace=False)
+                # Only the rewritten orders changed; a watermark that covered all history still does
+                if watermark and int(watermark.value) >= latest_before:
+                    watermark.value = str(OrderStatusHistory.objects.aggregate(latest=Max('id'))['latest'] or 0)
+                    watermark.save(update_fields=['value', 'updated_at'])
+
+            # Finished orders without a completion date are marked completed today
+            finished = orders.filter(current_status=FINAL_STATUS, completed_date__isnull=True)
+            if options['dry_run']:
+                marked = finished.count()
+            else:
+                marked = finished.update(completed_date=now.date(), updated_at=now)
+
+        if not options['dry_run']:
+            # No receivers ran for the rewritten rows; one token replaces every order's fragments
+            invalidate_all_fragments()
 
+        elapsed = time.perf_counter() - started
+        prefix = '[dry run] ' if options['dry_run'] else ''
         self.stdout.write(
             self.style.SUCCESS(
-                f'Successfully fixed {orders.count()} orders with status history'
+                f'{prefix}Successfully fixed {processed} orders with status history in {elapsed:.2f}s: '
+                f'{deleted} history rows removed, {created} created, status durations of {len(rebuilt)} orders '
+                f'rebuilt, {marked} orders marked completed'
             )
         )
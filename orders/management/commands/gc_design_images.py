@@ -0,0 +1,90 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.images import DESIGN_IMAGE_FIELDS, design_storage, referenced_names
+from orders.models import Order
+from orders.uploads import discard_expired_uploads
+
+
+ROOT = 'order_designs'
+
+
+def walk(storage, path):
+    """Every file name under ``path``"""
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield posixpath.join(path, name)
+    for directory in directories:
+        yield from walk(storage, posixpath.join(path, directory))
+
+
+def original_of(name):
+    """The original a variant file was built from, or ``name`` itself"""
+    parts = name.split('/')
+    if 'variants' in parts[:-2]:
+        index = len(parts) - 1 - parts[::-1].index('variants')
+        return '/'.join(parts[:index] + parts[index + 1:-1])
+    return name
+
+
+class Command(BaseCommand):
+    help = 'Delete design images (and their variants) that no order refers to any more, and abandoned chunked uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--adopt', action='store_true', help='First move images uploaded before content-addressed storage into it')
+        parser.add_argument('--grace-hours', type=float, default=24, help='Keep unreferenced files younger than this (uploads whose order is still being saved)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted without deleting')
+
+    def handle(self, *args, **options):
+        if options['adopt']:
+            self.adopt(options['dry_run'])
+
+        if not options['dry_run']:
+            self.stdout.write(f'Discarded {discard_expired_uploads()} abandoned uploads')
+
+        references = referenced_names()
+        self.stdout.write(f'{sum(references.values())} image references share {len(references)} stored files')
+
+        if not design_storage.exists(ROOT):
+            return
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        deleted = freed = 0
+        for name in walk(design_storage, ROOT):
+            if original_of(name) in references:
+                continue
+            if design_storage.get_modified_time(name) > cutoff:
+                continue
+            freed += design_storage.size(name)
+            deleted += 1
+            if not options['dry_run']:
+                design_storage.delete(name)
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {deleted} unreferenced files ({freed / 1024 / 1024:.1f} MiB)'))
+
+    def adopt(self, dry_run):
+        """Re-store files saved under the old per-field folders by content hash"""
+        adopted = {}
+        for order in Order.objects.order_by('pk').iterator(chunk_size=200):
+            for field, _ in DESIGN_IMAGE_FIELDS:
+                file = getattr(order, field)
+                if not file or design_storage.is_content_addressed(file.name):
+                    continue
+                if not design_storage.exists(file.name):
+                    self.stderr.write(f'Missing file for order {order.pk} {field}: {file.name}')
+                    continue
+                if dry_run:
+                    adopted[file.name] = None
+                    continue
+                if file.name not in adopted:
+                    with design_storage.open(file.name, 'rb') as content:
+                        adopted[file.name] = design_storage.save(file.name, content)
+                # Only if the field was not changed meanwhile
+                Order.objects.filter(pk=order.pk, **{field: file.name}).update(**{field: adopted[file.name]})
+
+        self.stdout.write(f'Adopted {len(adopted)} files into content-addressed storage')
+        if adopted and not dry_run:
+            self.stdout.write('Run "manage.py build_design_variants" to rebuild their resized variants')
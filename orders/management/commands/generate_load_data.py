@@ -0,0 +1,327 @@
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from orders.models import Order, OrderStatusHistory, EmployeeRating, ProcessStep, OrderRating
+from orders.workflows import FINAL_STATUS, workflow_for
+from customers.models import Customer
+from employees.models import Employee
+from materials.models import Material
+from reports.models import StatusTransition
+
+
+# Markers that identify generated rows so --clear never touches real data
+ORDER_PREFIX = 'GEN-'
+CUSTOMER_EMAIL_DOMAIN = '@loadtest.local'
+# Letters cannot appear in a real phone number, unlike a 00 international prefix
+EMPLOYEE_PHONE_PREFIX = 'GEN-'
+
+FIRST_NAMES = [
+    'Болд', 'Сараа', 'Энхтуяа', 'Мөнхбаяр', 'Цэцэг', 'Ганбаяр', 'Алтанцэцэг', 'Батбаяр',
+    'Наранцэцэг', 'Дорж', 'Оюунчимэг', 'Мөнхзул', 'Отгонбат', 'Уранцэцэг', 'Тэмүүлэн', 'Номин',
+]
+LAST_NAMES = [
+    'Батбаяр', 'Доржийн', 'Цэрэндорж', 'Сүхбаатар', 'Очирбат', 'Ганбаатар', 'Лхамсүрэн', 'Баатар',
+    'Жигмэд', 'Энхбаяр', 'Цогтбаяр', 'Алтангэрэл',
+]
+
+# (value, weight) pairs approximating the shop's real mix
+EMPLOYEE_TYPE_WEIGHTS = [
+    ('cutter', 20), ('shirt_cutter', 10), ('jacket_sewer', 25),
+    ('trouser_sewer', 20), ('shirt_sewer', 20), ('manager', 5),
+]
+ITEM_TYPE_WEIGHTS = [
+    ('men_suit', 30), ('women_suit', 15), ('wedding_dress', 5), ('formal_dress', 10),
+    ('casual_shirt', 10), ('trousers', 12), ('jacket', 6), ('vest', 3), ('coat', 4),
+    ('repair', 4), ('other', 1),
+]
+PRICE_RANGES = {
+    'men_suit': (800000, 2500000), 'women_suit': (700000, 2000000),
+    'wedding_dress': (1500000, 5000000), 'formal_dress': (500000, 1800000),
+    'casual_shirt': (80000, 250000), 'trousers': (120000, 350000), 'jacket': (400000, 1200000),
+    'vest': (100000, 300000), 'coat': (600000, 1800000), 'repair': (20000, 120000),
+    'other': (50000, 500000),
+}
+RATING_WEIGHTS = [(1, 2), (2, 5), (3, 15), (4, 38), (5, 40)]
+SEWER_TYPES = ['jacket_sewer', 'shirt_sewer', 'trouser_sewer']
+TROUSER_ITEM_TYPES = {'men_suit', 'women_suit', 'trousers'}
+MATERIAL_COUNT = 60
+
+
+def weighted(rng, pairs):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights=weights)[0]
+
+
+class Command(BaseCommand):
+    help = 'Generate a seeded, deterministic data set for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=1000, help='Number of customers')
+        parser.add_argument('--orders', type=int, default=10000, help='Number of orders')
+        parser.add_argument('--employees', type=int, default=20, help='Number of employees')
+        parser.add_argument('--days', type=int, default=730, help='Spread orders over this many past days')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Orders generated per transaction')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated data first')
+
+    def handle(self, *args, **options):
+        if min(options['customers'], options['employees'], options['batch_size'], options['days']) < 1:
+            raise CommandError('--customers, --employees, --days and --batch-size must be at least 1')
+
+        if options['clear']:
+            self.clear()
+        elif Order.objects.filter(order_number__startswith=ORDER_PREFIX).exists():
+            raise CommandError('Generated data already exists, re-run with --clear to replace it')
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.tz = timezone.get_current_timezone()
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        employees = self.create_employees(options['employees'])
+        self.material_ids = self.create_materials()
+        customer_ids = self.create_customers(options['customers'], options['days'])
+        totals = self.create_orders(options['orders'], options['days'], customer_ids)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully generated in {elapsed:.1f}s:\n'
+                f'- {len(employees)} employees\n'
+                f'- {len(customer_ids)} customers\n'
+                f'- {totals["orders"]} orders ({totals["orders"] / elapsed:,.0f} orders/s)\n'
+                f'- {totals["history"]} status history records\n'
+                f'- {totals["ratings"]} employee ratings'
+            )
+        )
+
+    def clear(self):
+        generated = Order.objects.filter(order_number__startswith=ORDER_PREFIX)
+        with transaction.atomic():
+            # Delete children first so the order delete does not collect them in Python
+            for model in (StatusTransition, OrderStatusHistory, EmployeeRating, ProcessStep, OrderRating):
+                model.objects.filter(order__in=generated).delete()
+            orders, _ = generated.delete()
+            Customer.objects.filter(email__endswith=CUSTOMER_EMAIL_DOMAIN).delete()
+            Employee.objects.filter(phone__startswith=EMPLOYEE_PHONE_PREFIX).delete()
+        self.stdout.write(f'Removed {orders} previously generated rows')
+
+    def _ids(self, queryset, objects):
+        """Primary keys of freshly bulk-inserted rows, refetched on backends that do not return them"""
+        if objects and objects[0].pk is None:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+            for obj, pk in zip(objects, ids):
+                obj.pk = pk
+        return [obj.pk for obj in objects]
+
+    def create_materials(self):
+        """MAT-001 .. MAT-<MATERIAL_COUNT>, reused across runs; generated orders reserve none of their stock"""
+        material_ids = {}
+        for number in range(1, MATERIAL_COUNT + 1):
+            code = f'MAT-{number:03d}'
+            material, _ = Material.objects.get_or_create(code=code, defaults={
+                'name': f'Даавуу {number:03d}',
+                'unit_price': Decimal(self.rng.randrange(20000, 150000, 1000)),
+                'stock_quantity': Decimal(self.rng.randrange(0, 300)),
+            })
+            material_ids[number] = material.pk
+        return material_ids
+
+    def create_employees(self, count):
+        rng = self.rng
+        employees = [
+            Employee(
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                phone=f'{EMPLOYEE_PHONE_PREFIX}{i:06d}',
+                employee_type=weighted(rng, EMPLOYEE_TYPE_WEIGHTS),
+                is_active=rng.random() > 0.1,
+            )
+            for i in range(count)
+        ]
+        Employee.objects.bulk_create(employees, batch_size=self.batch_size)
+        self._ids(Employee.objects.filter(phone__startswith=EMPLOYEE_PHONE_PREFIX), employees)
+
+        by_type = {}
+        for employee in employees:
+            if employee.is_active:
+                by_type.setdefault(employee.employee_type, []).append(employee.pk)
+        self.employees_by_type = by_type
+        self.cutter_ids = by_type.get('cutter', []) + by_type.get('shirt_cutter', [])
+        self.sewer_ids = [pk for t in SEWER_TYPES for pk in by_type.get(t, [])]
+        self.trouser_ids = by_type.get('trouser_sewer', []) or self.sewer_ids
+        self.any_ids = [employee.pk for employee in employees]
+        return employees
+
+    def create_customers(self, count, days):
+        rng = self.rng
+        provinces = [code for code, _ in Customer.PROVINCE_CHOICES]
+        # Most customers are from the capital, the rest spread over the provinces
+        province_weights = [60 if code == 'ulaanbaatar' else 40 / (len(provinces) - 1) for code in provinces]
+        customers = []
+        for i in range(count):
+            customers.append(Customer(
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                phone=f'{rng.choice("89")}{i:07d}',
+                email=f'customer{i}{CUSTOMER_EMAIL_DOMAIN}',
+                province=rng.choices(provinces, weights=province_weights)[0],
+                customer_type='vip' if rng.random() < 0.15 else 'regular',
+                created_at=self.now - timedelta(days=rng.uniform(0, days)),
+            ))
+            if len(customers) >= self.batch_size:
+                self.insert_objects(Customer, customers)
+                customers = []
+        if customers:
+            self.insert_objects(Customer, customers)
+        return list(Customer.objects.filter(email__endswith=CUSTOMER_EMAIL_DOMAIN).values_list('pk', flat=True))
+
+    def build_order(self, number, days, customer_ids):
+        rng = self.rng
+        item_type = weighted(rng, ITEM_TYPE_WEIGHTS)
+        created_at = self.now - timedelta(days=rng.uniform(0, days), seconds=rng.randint(0, 86399))
+        start_date = created_at.astimezone(self.tz).date()
+        duration = max(3, int(rng.triangular(7, 30, 14)))
+        due_date = start_date + timedelta(days=duration)
+
+        # Progress through the item type's steps roughly follows elapsed time, with some orders stalling
+        elapsed_days = (self.now - created_at).total_seconds() / 86400
+        progress = elapsed_days / duration * rng.uniform(0.6, 1.3)
+        steps = workflow_for(item_type).codes
+        last_index = len(steps) - 1
+        status_index = min(last_index, int(progress * last_index))
+        current_status = steps[status_index]
+
+        low, high = PRICE_RANGES[item_type]
+        total = Decimal(rng.randrange(low, high, 1000))
+        advance = Decimal(0) if rng.random() < 0.4 else (total * Decimal(rng.choice([30, 40, 50])) / 100).quantize(Decimal('1'))
+
+        completed_date = None
+        if current_status == FINAL_STATUS:
+            completed_date = min(self.now.astimezone(self.tz).date(), start_date + timedelta(days=int(duration * rng.uniform(0.7, 1.4))))
+
+        return Order(
+            customer_id=rng.choice(customer_ids),
+            order_number=f'{ORDER_PREFIX}{number:08d}',
+            item_type=item_type,
+            material_id=self.material_ids[min(MATERIAL_COUNT, int(rng.paretovariate(1.2)))],
+            assigned_cutter_id=rng.choice(self.cutter_ids) if self.cutter_ids and rng.random() < 0.9 else None,
+            assigned_tailor_id=rng.choice(self.sewer_ids) if self.sewer_ids and rng.random() < 0.9 else None,
+            assigned_trouser_maker_id=rng.choice(self.trouser_ids) if item_type in TROUSER_ITEM_TYPES and self.trouser_ids else None,
+            total_amount=total,
+            advance_amount=advance,
+            start_date=start_date,
+            due_date=due_date,
+            completed_date=completed_date,
+            current_status=current_status,
+            created_at=created_at,
+        ), status_index
+
+    def build_history(self, order, status_index):
+        """Status history rows as (order_id, status, completed_by_id, completed_at, notes) tuples"""
+        rng = self.rng
+        if order.completed_date:
+            end = timezone.make_aware(datetime.combine(order.completed_date, dt_time(18)), self.tz)
+        else:
+            end = self.now
+        span = max((end - order.created_at).total_seconds(), 60)
+        step_employees = {
+            'cutter_cutting': order.assigned_cutter_id,
+            'tailor_first_completion': order.assigned_tailor_id,
+            'seamstress_second_prep': order.assigned_tailor_id,
+            'tailor_second_completion': order.assigned_tailor_id,
+            'seamstress_finished': order.assigned_tailor_id,
+        }
+        adapt = connection.ops.adapt_datetimefield_value
+        rows = []
+        for i, status_code in enumerate(order.workflow.codes[:status_index + 1]):
+            offset = 0 if i == 0 else span * (i + rng.uniform(-0.4, 0.4)) / max(status_index, 1)
+            rows.append((
+                order.pk,
+                status_code,
+                step_employees.get(status_code) or rng.choice(self.any_ids),
+                adapt(min(end, order.created_at + timedelta(seconds=offset))),
+                f'Алхам {i+1} дууссан',
+            ))
+        return rows
+
+    def build_ratings(self, order):
+        """Employee rating rows as (order_id, employee_id, rating, comment, created_at) tuples"""
+        rng = self.rng
+        if not order.completed_date or rng.random() > 0.3:
+            return []
+        rated_at = connection.ops.adapt_datetimefield_value(
+            timezone.make_aware(datetime.combine(order.completed_date, dt_time(19)), self.tz)
+        )
+        employee_ids = {order.assigned_cutter_id, order.assigned_tailor_id, order.assigned_trouser_maker_id} - {None}
+        return [
+            (order.pk, employee_id, weighted(rng, RATING_WEIGHTS), None, rated_at)
+            for employee_id in sorted(employee_ids)
+        ]
+
+    def insert_rows(self, model, fields, rows):
+        """Insert plain tuples with executemany, skipping per-object ORM overhead for the bulkiest tables"""
+        if not rows:
+            return
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+        placeholders = ', '.join(['%s'] * len(fields))
+        sql = f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})'
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                cursor.executemany(sql, rows[start:start + self.batch_size])
+
+    def insert_objects(self, model, objects):
+        """Insert unsaved instances through insert_rows, keeping the created_at they were built with
+
+        bulk_create would stamp auto_now_add fields with the current time; every other
+        field gets the value a normal save would write.
+        """
+        fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+        rows = [
+            tuple(
+                field.get_db_prep_save(
+                    getattr(obj, field.attname) if field.name == 'created_at' else field.pre_save(obj, True),
+                    connection,
+                )
+                for field in fields
+            )
+            for obj in objects
+        ]
+        self.insert_rows(model, [field.name for field in fields], rows)
+
+    def create_orders(self, count, days, customer_ids):
+        totals = {'orders': 0, 'history': 0, 'ratings': 0}
+        started = time.perf_counter()
+        for chunk_start in range(0, count, self.batch_size):
+            chunk = [self.build_order(number, days, customer_ids) for number in range(chunk_start, min(count, chunk_start + self.batch_size))]
+            orders = [order for order, _ in chunk]
+            with transaction.atomic():
+                self.insert_objects(Order, orders)
+                if orders[0].pk is None:
+                    ids = dict(Order.objects.filter(
+                        order_number__in=[order.order_number for order in orders]
+                    ).values_list('order_number', 'pk'))
+                    for order in orders:
+                        order.pk = ids[order.order_number]
+
+                history = []
+                ratings = []
+                for order, status_index in chunk:
+                    history.extend(self.build_history(order, status_index))
+                    ratings.extend(self.build_ratings(order))
+                self.insert_rows(OrderStatusHistory, ['order', 'status', 'completed_by', 'completed_at', 'notes'], history)
+                self.insert_rows(EmployeeRating, ['order', 'employee', 'rating', 'comment', 'created_at'], ratings)
+
+            totals['orders'] += len(orders)
+            totals['history'] += len(history)
+            totals['ratings'] += len(ratings)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'  {totals["orders"]}/{count} orders ({totals["orders"] / elapsed:,.0f} orders/s)')
+        return totals
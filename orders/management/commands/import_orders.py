@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from orders.importers import OrderImporter, IMPORT_COLUMNS
+from employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'Import orders from a CSV file with batched inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help=f'CSV file with columns: {", ".join(IMPORT_COLUMNS)}')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows written per bulk insert')
+        parser.add_argument('--encoding', default='utf-8-sig', help='File encoding')
+        parser.add_argument('--dry-run', action='store_true', help='Validate rows without writing anything')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        completed_by = Employee.objects.filter(is_active=True).first()
+        importer = OrderImporter(
+            batch_size=options['batch_size'],
+            completed_by=completed_by,
+            dry_run=options['dry_run'],
+        )
+
+        def progress(result, elapsed):
+            rate = result.rows / elapsed if elapsed else 0
+            self.stdout.write(f'  {result.rows} rows read, {result.created} imported ({rate:,.0f} rows/s)')
+
+        try:
+            with open(options['csv_file'], newline='', encoding=options['encoding']) as stream:
+                result = importer.run(stream, progress=progress)
+        except OSError as e:
+            raise CommandError(f'Cannot read {options["csv_file"]}: {e}')
+
+        for line_number, message in result.errors:
+            self.stdout.write(self.style.WARNING(f'Line {line_number}: {message}'))
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{verb} {result.created} of {result.rows} rows in {result.elapsed:.2f}s '
+                f'({result.rows_per_second:,.0f} rows/s), {len(result.errors)} errors'
+            )
+        )
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.estimates import refresh_step_durations
+from reports.analytics import refresh_transitions
+from reports.models import StatusTransition
+
+
+class Command(BaseCommand):
+    help = 'Update the status durations behind the status duration report and the due date estimates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every order (after editing or deleting old status history)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        latest = refresh_transitions(full=options['full'])
+        # Run from cron, this keeps the due date estimates from recomputing inside a request
+        refresh_step_durations()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{StatusTransition.objects.count()} transitions up to history id {latest} ({elapsed:.1f}s)'
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_advance_amount_alter_order_current_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderstatushistory',
+            name='completed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дууссан огноо'),
+        ),
+    ]
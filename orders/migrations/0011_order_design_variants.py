@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='design_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Загварын зургийн хувилбарууд'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:04
+
+import tailor_system.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_order_design_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='design_back',
+            field=models.ImageField(blank=True, null=True, storage=tailor_system.storage.ContentAddressedStorage(directory='order_designs/blobs'), upload_to='order_designs/back/', verbose_name='Хойд талын загвар'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='design_front',
+            field=models.ImageField(blank=True, null=True, storage=tailor_system.storage.ContentAddressedStorage(directory='order_designs/blobs'), upload_to='order_designs/front/', verbose_name='Урд талын загвар'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='design_reference',
+            field=models.ImageField(blank=True, null=True, storage=tailor_system.storage.ContentAddressedStorage(directory='order_designs/blobs'), upload_to='order_designs/reference/', verbose_name='Жишээ загвар'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='design_side',
+            field=models.ImageField(blank=True, null=True, storage=tailor_system.storage.ContentAddressedStorage(directory='order_designs/blobs'), upload_to='order_designs/side/', verbose_name='Хажуугийн загвар'),
+        ),
+    ]
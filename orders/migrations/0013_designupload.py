@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:06
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_order_design_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesignUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Файлын нэр')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Хэмжээ')),
+                ('checksum', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('received', models.PositiveBigIntegerField(default=0, verbose_name='Хүлээн авсан')),
+                ('completed', models.BooleanField(default=False, verbose_name='Дууссан')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Эхэлсэн огноо')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='design_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Оруулсан хэрэглэгч')),
+            ],
+            options={
+                'verbose_name': 'Зураг оруулалт',
+                'verbose_name_plural': 'Зураг оруулалтууд',
+            },
+        ),
+    ]
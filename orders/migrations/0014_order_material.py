@@ -0,0 +1,72 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:32
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_materials(apps, schema_editor):
+    """Point orders at one Material per distinct material code.
+
+    A code matches a material of the same code, else one named like it; codes
+    matching neither become new materials with no stock.
+    """
+    Material = apps.get_model('materials', 'Material')
+    Order = apps.get_model('orders', 'Order')
+    by_code = dict(Material.objects.filter(code__isnull=False).values_list('code', 'pk'))
+    by_name = {}
+    for pk, name in Material.objects.filter(code__isnull=True).order_by('pk').values_list('pk', 'name'):
+        by_name.setdefault(name.strip().lower(), pk)
+
+    codes = Order.objects.exclude(material_code__isnull=True).order_by().values_list('material_code', flat=True).distinct()
+    for raw in list(codes):
+        code = raw.strip()[:100]
+        if not code:
+            continue
+        material_id = by_code.get(code)
+        if material_id is None:
+            material_id = by_name.pop(code.lower(), None)
+            if material_id is not None:
+                Material.objects.filter(pk=material_id).update(code=code)
+            else:
+                material_id = Material.objects.create(code=code, name=code, unit_price=0).pk
+            by_code[code] = material_id
+        Order.objects.filter(material_code=raw).update(material_id=material_id)
+
+
+def unlink_materials(apps, schema_editor):
+    Material = apps.get_model('materials', 'Material')
+    Order = apps.get_model('orders', 'Order')
+    for pk, code in Material.objects.filter(code__isnull=False).values_list('pk', 'code'):
+        Order.objects.filter(material_id=pk).update(material_code=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0002_material_code_reservations'),
+        ('orders', '0013_designupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='material',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='materials.material', verbose_name='Материал'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='material_consumed',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Материал зарцуулсан'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='material_quantity',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Материалын хэмжээ'),
+        ),
+        migrations.RunPython(link_materials, unlink_materials),
+        migrations.RemoveField(
+            model_name='order',
+            name='material_code',
+        ),
+    ]
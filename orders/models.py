@@ -1,24 +1,21 @@
+import uuid
 from decimal import Decimal
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.utils.functional import cached_property
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from customers.models import Customer
 from employees.models import Employee
 from materials.models import Material
 
+from .images import DESIGN_IMAGE_FIELDS, FORMATS, design_storage, variant_name, variant_storage
+from .workflows import FINAL_STATUS, STATUS_CHOICES, status_color, status_label, workflow_for
+
 
 class Order(models.Model):
-    STATUS_CHOICES = [
-        ('order_placed', 'Захиалга өгсөн'),
-        ('material_arrived', 'Материал ирсэн'),
-        ('cutter_cutting', 'Эсгүүрчин эсгэсэн'),
-        ('customer_first_fitting', 'Үйлчлүүлэгч 1-р хэмжээ өмссөн'),
-        ('tailor_first_completion', 'Эсгүүрчин 1-р хэмжээ миллэсэн'),
-        ('seamstress_second_prep', 'Оёдолчин 2-р хэмжээ бэлдсэн'),
-        ('customer_second_fitting', 'Үйлчлүүлэгч 2-р хэмжээ өмссөн'),
-        ('tailor_second_completion', 'Эсгүүрчин 2-р хэмжээ миллэсэн'),
-        ('seamstress_finished', 'Оёдолчин оёж дууссан'),
-    ]
+    STATUS_CHOICES = STATUS_CHOICES
     
     ITEM_TYPE_CHOICES = [
         ('men_suit', 'Эрэгтэй костюм'),
@@ -37,13 +34,31 @@ class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, verbose_name="Үйлчлүүлэгч")
     order_number = models.CharField(max_length=20, unique=True, verbose_name="Захиалгын дугаар")
     item_type = models.CharField(max_length=50, choices=ITEM_TYPE_CHOICES, verbose_name="Хувцасны төрөл")
-    material_code = models.CharField(max_length=100, blank=True, null=True, verbose_name="Материалын код")
+    material = models.ForeignKey(
+        Material,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='orders',
+        verbose_name="Материал"
+    )
+    # Reserved on save and consumed at the cutting step (materials.stock)
+    material_quantity = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(0)],
+        default=0,
+        verbose_name="Материалын хэмжээ"
+    )
+    material_consumed = models.BooleanField(default=False, editable=False, verbose_name="Материал зарцуулсан")
     
     # Design images
-    design_front = models.ImageField(upload_to='order_designs/front/', blank=True, null=True, verbose_name="Урд талын загвар")
-    design_back = models.ImageField(upload_to='order_designs/back/', blank=True, null=True, verbose_name="Хойд талын загвар")
-    design_side = models.ImageField(upload_to='order_designs/side/', blank=True, null=True, verbose_name="Хажуугийн загвар")
-    design_reference = models.ImageField(upload_to='order_designs/reference/', blank=True, null=True, verbose_name="Жишээ загвар")
+    design_front = models.ImageField(upload_to='order_designs/front/', storage=design_storage, blank=True, null=True, verbose_name="Урд талын загвар")
+    design_back = models.ImageField(upload_to='order_designs/back/', storage=design_storage, blank=True, null=True, verbose_name="Хойд талын загвар")
+    design_side = models.ImageField(upload_to='order_designs/side/', storage=design_storage, blank=True, null=True, verbose_name="Хажуугийн загвар")
+    design_reference = models.ImageField(upload_to='order_designs/reference/', storage=design_storage, blank=True, null=True, verbose_name="Жишээ загвар")
+    # Resized variants built by orders.images: field -> {"name": original, "widths": [...]}
+    design_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Загварын зургийн хувилбарууд")
     
     # Томилогдсон ажилтнууд
     assigned_tailor = models.ForeignKey(
@@ -110,24 +125,60 @@ class Order(models.Model):
         verbose_name = "Захиалга"
         verbose_name_plural = "Захиалга"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the order list
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.order_number} - {self.customer.full_name}"
     
     @property
     def status_display(self):
-        return dict(self.STATUS_CHOICES).get(self.current_status, self.current_status)
+        return status_label(self.current_status)
+    
+    @property
+    def workflow(self):
+        """Status steps for this order's item type (orders.workflows)"""
+        return workflow_for(self.item_type)
+    
+    @property
+    def next_status(self):
+        return self.workflow.next(self.current_status)
+
+    def move_to_status(self, status):
+        """Save ``status`` as the current one, date a finished order and consume its fabric once cut.
+
+        The order screens change the status through here so the stock follows it. Raises
+        InsufficientStock (materials.stock) when the reservation cannot be consumed; the
+        status is then left unsaved, in the database and on this instance.
+        """
+        from materials.stock import consume_for_order
+
+        previous = (self.current_status, self.completed_date)
+        self.current_status = status
+        if status == FINAL_STATUS:
+            self.completed_date = timezone.now().date()
+        try:
+            with transaction.atomic():
+                self.save()
+                consume_for_order(self)
+        except Exception:
+            self.current_status, self.completed_date = previous
+            raise
+    
+    @property
+    def is_finished(self):
+        return self.current_status == FINAL_STATUS
     
     @property
     def is_overdue(self):
         from django.utils import timezone
-        return self.due_date < timezone.now().date() and self.current_status != 'seamstress_finished'
+        return self.due_date < timezone.now().date() and not self.is_finished
     
     @property
     def progress_percentage(self):
-        status_order = [choice[0] for choice in self.STATUS_CHOICES]
-        current_index = status_order.index(self.current_status)
-        return int((current_index + 1) / len(status_order) * 100)
+        return self.workflow.progress(self.current_status)
     
     @property
     def days_remaining(self):
@@ -154,49 +205,90 @@ class Order(models.Model):
             return Decimal('0')
         return remaining
     
+    @property
+    def design_images(self):
+        """Attached design images with ``srcset`` strings of their resized variants.
+
+        Until the variants are built (or for images they failed for) only the
+        original ``url`` is given.
+        """
+        images = []
+        for field, label in DESIGN_IMAGE_FIELDS:
+            file = getattr(self, field)
+            if not file:
+                continue
+            image = {'field': field, 'label': label, 'url': file.url, 'src': file.url, 'large': file.url, 'sources': []}
+            entry = (self.design_variants or {}).get(field)
+            if entry and entry['name'] == file.name and entry['widths']:
+                url = variant_storage.url
+                widths = entry['widths']
+                for fmt, (_, mime_type, _) in FORMATS.items():
+                    srcset = ', '.join(f'{url(variant_name(file.name, width, fmt))} {width}w' for width in widths)
+                    image['sources'].append({'type': mime_type, 'srcset': srcset})
+                # Plain <img> fallback and the enlarged view use the JPEG variants
+                image['src'] = url(variant_name(file.name, widths[0], 'jpeg'))
+                image['large'] = url(variant_name(file.name, widths[-1], 'jpeg'))
+            images.append(image)
+        return images
+    
     def get_status_color(self):
         """Return CSS class for status badge"""
-        colors = {
-            'seamstress_finished': 'bg-green-100 text-green-800',
-            'customer_first_fitting': 'bg-yellow-100 text-yellow-800',
-            'customer_second_fitting': 'bg-yellow-100 text-yellow-800',
-            'cutter_cutting': 'bg-yellow-100 text-yellow-800',
-            'order_placed': 'bg-blue-100 text-blue-800',
-            'material_arrived': 'bg-blue-100 text-blue-800',
-        }
-        return colors.get(self.current_status, 'bg-gray-100 text-gray-800')
+        return status_color(self.current_status)
+    
+    @cached_property
+    def status_history_by_status(self):
+        """Oldest history row of each status, loaded with one query"""
+        first = {}
+        for history in self.status_history.select_related('completed_by').order_by('-completed_at', '-id'):
+            first[history.status] = history
+        return first
+    
+    @property
+    def timeline(self):
+        """The workflow's steps with their state ('done', 'current' or 'pending') and history row"""
+        steps = []
+        for step in self.workflow.steps:
+            history = self.status_history_by_status.get(step.code)
+            if history is not None:
+                state = 'done'
+            elif step.code == self.current_status:
+                state = 'current'
+            else:
+                state = 'pending'
+            steps.append({'status': step, 'state': state, 'history': history})
+        return steps
     
     def is_status_completed(self, status_code):
         """Check if a specific status has been completed"""
-        return self.status_history.filter(status=status_code).exists()
+        return status_code in self.status_history_by_status
     
     def get_status_completion_info(self, status_code):
         """Get completion information for a specific status"""
-        try:
-            history = self.status_history.filter(status=status_code).first()
-            if history:
-                return {
-                    'completed_by': history.completed_by,
-                    'completed_at': history.completed_at,
-                    'notes': history.notes
-                }
-        except:
-            pass
+        history = self.status_history_by_status.get(status_code)
+        if history:
+            return {
+                'completed_by': history.completed_by,
+                'completed_at': history.completed_at,
+                'notes': history.notes
+            }
         return None
 
-
 class OrderStatusHistory(models.Model):
     """Track the history of order status changes"""
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_history', verbose_name="Захиалга")
     status = models.CharField(max_length=50, choices=Order.STATUS_CHOICES, verbose_name="Статус")
     completed_by = models.ForeignKey('employees.Employee', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Дуусгасан хүн")
-    completed_at = models.DateTimeField(auto_now_add=True, verbose_name="Дууссан огноо")
+    # default instead of auto_now_add so imports and backfills can keep historical timestamps
+    completed_at = models.DateTimeField(default=timezone.now, verbose_name="Дууссан огноо")
     notes = models.TextField(blank=True, null=True, verbose_name="Тэмдэглэл")
     
     class Meta:
         verbose_name = "Захиалгын статусын түүх"
         verbose_name_plural = "Захиалгын статусын түүх"
         ordering = ['-completed_at']
+        indexes = [
+            models.Index(fields=['completed_at', 'id'], name='history_completed_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.order.order_number} - {self.get_status_display()}"
@@ -263,4 +355,23 @@ class EmployeeRating(models.Model):
         unique_together = ['order', 'employee']
     
     def __str__(self):
-        return f"{self.order.order_number} - {self.employee.full_name}: {self.rating}/5"
\ No newline at end of file
+        return f"{self.order.order_number} - {self.employee.full_name}: {self.rating}/5"
+
+
+class DesignUpload(models.Model):
+    """A design image being uploaded in chunks (see orders.uploads)"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='design_uploads', verbose_name="Оруулсан хэрэглэгч")
+    filename = models.CharField(max_length=255, verbose_name="Файлын нэр")
+    size = models.PositiveBigIntegerField(verbose_name="Хэмжээ")
+    checksum = models.CharField(max_length=64, verbose_name="SHA-256")
+    received = models.PositiveBigIntegerField(default=0, verbose_name="Хүлээн авсан")
+    completed = models.BooleanField(default=False, verbose_name="Дууссан")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Эхэлсэн огноо")
+    
+    class Meta:
+        verbose_name = "Зураг оруулалт"
+        verbose_name_plural = "Зураг оруулалтууд"
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .events import history_event, hub
+from .fragments import invalidate_fragments
+from .images import pending_fields, schedule
+from .models import EmployeeRating, Order, OrderStatusHistory
+from .workload import invalidate_workload, remember_workload_values, workload_changed
+from employees.models import Employee
+from materials.stock import release_for_order
+from tailor_system.transactions import on_commit_once
+
+
+@receiver(post_save, sender=OrderStatusHistory)
+def broadcast_status_history(sender, instance, created, raw=False, **kwargs):
+    """Push new status history rows to the live order screens after commit"""
+    if created and not raw:
+        transaction.on_commit(lambda: hub.publish(history_event(instance)), robust=True)
+
+
+@receiver([post_save, post_delete], sender=OrderStatusHistory)
+@receiver([post_save, post_delete], sender=EmployeeRating)
+def invalidate_order_fragments(sender, instance, raw=False, **kwargs):
+    """Drop the cached timeline and rating sections of the affected orders, once per transaction"""
+    if not raw:
+        on_commit_once('order_fragments', instance.order_id, invalidate_fragments)
+
+
+@receiver(post_save, sender=Order)
+def build_design_variants(sender, instance, raw=False, **kwargs):
+    """Resize newly attached design images in the background once the order is committed"""
+    fields = [] if raw else pending_fields(instance)
+    if fields:
+        transaction.on_commit(lambda: schedule(instance.pk, fields), robust=True)
+
+
+@receiver(post_delete, sender=Order)
+def release_order_material(sender, instance, **kwargs):
+    """Return the fabric reserved by an order deleted before it was cut, in the deleting transaction"""
+    release_for_order(instance)
+
+
+@receiver(post_init, sender=Order)
+@receiver(post_init, sender=EmployeeRating)
+@receiver(post_init, sender=Employee)
+def track_workload_values(sender, instance, **kwargs):
+    remember_workload_values(instance)
+
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=EmployeeRating)
+@receiver([post_save, post_delete], sender=Employee)
+def invalidate_employee_workload(sender, instance, raw=False, created=True, **kwargs):
+    """Recount the workload index used by due date estimates and assignment suggestions"""
+    if raw or not workload_changed(instance, created):
+        return
+    remember_workload_values(instance)
+    transaction.on_commit(invalidate_workload, robust=True)
@@ -65,6 +65,29 @@ def format_number(value):
     except (ValueError, TypeError):
         return "0"
 
+@register.filter
+def format_duration(seconds):
+    """
+    Format a duration in seconds as its two largest units
+    Example: 93784 -> 1 хоног 2 цаг
+    """
+    if seconds is None:
+        return "-"
+
+    try:
+        seconds = int(seconds)
+    except (ValueError, TypeError):
+        return "-"
+
+    parts = []
+    for unit, size in (("хоног", 86400), ("цаг", 3600), ("мин", 60)):
+        if seconds >= size:
+            parts.append(f"{seconds // size} {unit}")
+            seconds %= size
+        elif parts:
+            break
+    return " ".join(parts[:2]) or "1 мин-аас бага"
+
 @register.filter
 def is_status_completed(order, status_code):
     """
@@ -77,5 +100,4 @@ def get_status_history(order, status_code):
     """
     Get the first (oldest) status history entry for a specific status
     """
-    history = order.status_history.filter(status=status_code).order_by('completed_at').first()
-    return history
+    return order.status_history_by_status.get(status_code)
@@ -0,0 +1,11 @@
+from django import template
+
+from tailor_system.assets import vendor_assets_built as assets_built
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_assets_built():
+    """``{% vendor_assets_built as built %}``: link the vendor/ build, or the CDN fallback when it is missing"""
+    return assets_built()
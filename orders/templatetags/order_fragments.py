@@ -0,0 +1,42 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+
+from tailor_system.metrics import request_metrics
+from orders.fragments import fragment_key, fragment_version
+
+register = template.Library()
+
+
+class OrderFragmentNode(template.Node):
+    def __init__(self, nodelist, name, order):
+        self.nodelist = nodelist
+        self.name = name
+        self.order = order
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        order = self.order.resolve(context)
+        key = fragment_key(name, order, fragment_version(order.pk))
+        html = cache.get(key)
+        if html is None:
+            request_metrics.increment(f'order_fragment.{name}.miss')
+            html = self.nodelist.render(context)
+            cache.set(key, html, getattr(settings, 'ORDER_FRAGMENT_CACHE_SECONDS', 3600))
+        else:
+            request_metrics.increment(f'order_fragment.{name}.hit')
+        return html
+
+
+@register.tag
+def order_fragment(parser, token):
+    """
+    Cache a section of an order page until the order's history or ratings change
+    Usage: {% order_fragment 'timeline' order %} ... {% endorder_fragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a fragment name and an order")
+    nodelist = parser.parse(('endorder_fragment',))
+    parser.delete_first_token()
+    return OrderFragmentNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
@@ -1,3 +1,979 @@
-from django.test import TestCase
+import csv
+import hashlib
+import io
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+
+from customers.models import Customer
+from employees.models import Employee
+from materials.models import Material
+from reports.analytics import WATERMARK_KEY, refresh_transitions
+from reports.models import StatusTransition, SystemSettings
+from tailor_system.media import byte_range
+from tailor_system.startup import warm_up
+from tailor_system.transactions import on_commit_once
+from .estimates import STEPS_KEY, refresh_step_durations
+from .fragments import fragment_version, invalidate_all_fragments
+from .importers import IMPORT_COLUMNS, OrderImporter
+from .images import FORMATS, design_storage, process_order_images, variant_name, variant_storage
+from .assignments import auto_assign, rank, suggest
+from .models import DesignUpload, EmployeeRating, Order, OrderStatusHistory
+from .workload import index_key, workload_index
+from .workflows import DEFAULT_SKIPS, FINAL_STATUS, FIRST_STATUS, STATUSES, compile_workflows, workflow_for
+
+
+def create_order(customer, number, **fields):
+    # The date Order.is_overdue compares against
+    today = timezone.now().date()
+    return Order.objects.create(**{
+        'customer': customer, 'order_number': number, 'item_type': 'men_suit', 'total_amount': 100000,
+        'start_date': today, 'due_date': today + timedelta(days=14), **fields,
+    })
+
+
+class OrderListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+        today = timezone.now().date()
+        past = today - timedelta(days=1)
+        for index in range(45):
+            overdue = index % 4 == 0
+            create_order(cls.customer, f'ORD-TEST-{index:03d}', due_date=past if overdue else today + timedelta(days=7))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def walk(self, params=None):
+        ids = []
+        params = dict(params or {})
+        while True:
+            page = self.client.get(reverse('orders:order_list'), params).context['page_obj']
+            ids.extend(order.pk for order in page)
+            if not page.has_next():
+                return ids
+            params['cursor'] = page.next_cursor
+
+    def test_pages_follow_newest_first(self):
+        ids = self.walk()
+        self.assertEqual(ids, list(Order.objects.order_by('-created_at', '-id').values_list('pk', flat=True)))
+
+    def test_overdue_filter_pages_only_overdue_orders(self):
+        ids = self.walk({'overdue': '1'})
+        overdue = Order.objects.filter(due_date__lt=timezone.now().date()).order_by('-created_at', '-id')
+        self.assertEqual(ids, list(overdue.values_list('pk', flat=True)))
+
+    def test_list_points_to_overdue_filter(self):
+        response = self.client.get(reverse('orders:order_list'))
+        self.assertContains(response, 'Хоцролттой 12 захиалгыг харах')
+        response = self.client.get(reverse('orders:order_list'), {'overdue': '1'})
+        self.assertNotContains(response, 'захиалгыг харах')
+
+
+class FragmentInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+        cls.orders = [create_order(customer, f'ORD-FRAG-{index}') for index in range(2)]
+
+    def test_keys_of_one_transaction_share_one_callback(self):
+        flushed = []
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for key in (1, 2, 2, 3):
+                    on_commit_once('test', key, flushed.append)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(flushed, [{1, 2, 3}])
+
+    def test_rolled_back_savepoint_starts_a_new_batch(self):
+        flushed = []
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        on_commit_once('test', 1, flushed.append)
+                        raise ValueError
+                except ValueError:
+                    pass
+                on_commit_once('test', 2, flushed.append)
+        self.assertEqual(flushed, [{2}])
+
+    def test_released_savepoint_keeps_the_batch(self):
+        flushed = []
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                with transaction.atomic():
+                    on_commit_once('test', 1, flushed.append)
+                on_commit_once('test', 2, flushed.append)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(flushed, [{1, 2}])
+
+    def test_next_transaction_starts_a_new_batch(self):
+        flushed = []
+        for key in (1, 2):
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    on_commit_once('test', key, flushed.append)
+        self.assertEqual(flushed, [{1}, {2}])
+
+    def test_history_changes_replace_version_tokens(self):
+        before = [fragment_version(order.pk) for order in self.orders]
+        with self.captureOnCommitCallbacks(execute=True):
+            for order in self.orders:
+                OrderStatusHistory.objects.create(order=order, status='material_arrived')
+        created = [fragment_version(order.pk) for order in self.orders]
+        self.assertTrue(all(a != b for a, b in zip(before, created)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderStatusHistory.objects.filter(order__in=self.orders).delete()
+        self.assertTrue(all(a != fragment_version(order.pk) for a, order in zip(created, self.orders)))
+
+    def test_global_generation_replaces_every_version(self):
+        before = [fragment_version(order.pk) for order in self.orders]
+        invalidate_all_fragments()
+        self.assertTrue(all(a != fragment_version(order.pk) for a, order in zip(before, self.orders)))
+
+
+class FixOrderDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Employee.objects.create(first_name='Сараа', phone='99112233', employee_type='cutter')
+        customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+        cls.orders = [
+            create_order(customer, f'ORD-FIX-{index}', current_status='customer_first_fitting') for index in range(3)
+        ]
+        for order in cls.orders:
+            OrderStatusHistory.objects.create(order=order, status='order_placed', completed_at=timezone.now() - timedelta(days=2))
+            OrderStatusHistory.objects.create(order=order, status='material_arrived')
+        refresh_transitions()
+
+    def fix(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('fix_order_data', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_without_writing(self):
+        history = list(OrderStatusHistory.objects.order_by('id').values_list('id', 'status'))
+        version = fragment_version(self.orders[0].pk)
+
+        output = self.fix('--dry-run')
+
+        self.assertIn('[dry run]', output)
+        self.assertIn('6 history rows removed, 12 created', output)
+        self.assertEqual(list(OrderStatusHistory.objects.order_by('id').values_list('id', 'status')), history)
+        self.assertEqual(StatusTransition.objects.count(), 3)
+        self.assertEqual(fragment_version(self.orders[0].pk), version)
+
+    def test_rewrite_rebuilds_transitions_and_watermark(self):
+        version = fragment_version(self.orders[0].pk)
+
+        output = self.fix()
+
+        self.assertIn('6 history rows removed, 12 created', output)
+        self.assertEqual(OrderStatusHistory.objects.count(), 12)
+        # order_placed, material_arrived and cutter_cutting stays ended; the fitting is current
+        self.assertEqual(StatusTransition.objects.count(), 9)
+        latest = OrderStatusHistory.objects.order_by('-id').values_list('id', flat=True).first()
+        self.assertEqual(SystemSettings.objects.get(key=WATERMARK_KEY).value, str(latest))
+        self.assertNotEqual(fragment_version(self.orders[0].pk), version)
+
+    def test_since_keeps_history_of_older_orders(self):
+        old = self.orders[0]
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+        kept = list(OrderStatusHistory.objects.filter(order=old).order_by('id').values_list('id', flat=True))
+
+        output = self.fix('--since', str((timezone.now() - timedelta(days=1)).date()))
+
+        self.assertIn('4 history rows removed, 8 created', output)
+        self.assertEqual(list(OrderStatusHistory.objects.filter(order=old).order_by('id').values_list('id', flat=True)), kept)
+
+
+class GenerateLoadDataTests(TestCase):
+    def generate(self, *args):
+        call_command(
+            'generate_load_data', '--customers=20', '--orders=40', '--employees=6', '--batch-size=15', *args,
+            stdout=StringIO(),
+        )
+
+    def test_generates_historical_rows(self):
+        self.generate()
+
+        orders = Order.objects.filter(order_number__startswith='GEN-')
+        self.assertEqual(orders.count(), 40)
+        self.assertEqual(Customer.objects.filter(email__endswith='@loadtest.local').count(), 20)
+        self.assertEqual(Employee.objects.filter(phone__startswith='GEN-').count(), 6)
+        self.assertTrue(OrderStatusHistory.objects.filter(order__in=orders).exists())
+        # created_at is spread over the past instead of stamped with the run time
+        week_ago = timezone.now() - timedelta(days=7)
+        self.assertTrue(orders.filter(created_at__lt=week_ago).exists())
+        self.assertTrue(Customer.objects.filter(created_at__lt=week_ago).exists())
+        self.assertIsNotNone(orders.first().updated_at)
+
+    def test_leaves_auto_now_add_alone(self):
+        self.generate()
+        customer = Customer.objects.create(first_name='Бат', phone='99001122')
+        self.assertGreater(customer.created_at, timezone.now() - timedelta(minutes=1))
+        self.assertTrue(Order._meta.get_field('created_at').auto_now_add)
+
+    def test_refuses_to_generate_twice(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+    def test_clear_keeps_real_rows(self):
+        # An international number must not be mistaken for a generated employee
+        employee = Employee.objects.create(first_name='Сараа', phone='0086138001', employee_type='cutter')
+        customer = Customer.objects.create(first_name='Бат', phone='99001122')
+        order = create_order(customer, 'ORD-REAL-1')
+        self.generate()
+        self.generate('--clear', '--seed=7')
+
+        self.assertEqual(Order.objects.filter(order_number__startswith='GEN-').count(), 40)
+        self.assertEqual(Employee.objects.filter(phone__startswith='GEN-').count(), 6)
+        self.assertTrue(Employee.objects.filter(pk=employee.pk).exists())
+        self.assertTrue(Order.objects.filter(pk=order.pk).exists())
+
+
+class OrderImporterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+        cls.cutter = Employee.objects.create(first_name='Дорж', phone='99112233', employee_type='cutter')
+        cls.material = Material.objects.create(code='WOOL-1', name='Ноос', unit_price=50000)
+        create_order(cls.customer, 'ORD-TAKEN-1')
+
+    def row(self, **fields):
+        return {
+            'customer_phone': '+976 9900-1122', 'item_type': 'men_suit', 'total_amount': '1,200,000',
+            'advance_amount': '200,000', 'start_date': '2025-10-01', 'due_date': '2025.10.20', **fields,
+        }
+
+    def csv(self, *rows, columns=IMPORT_COLUMNS):
+        stream = StringIO()
+        writer = csv.DictWriter(stream, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        stream.seek(0)
+        return stream
+
+    def run_import(self, *rows, **options):
+        return OrderImporter(**options).run(self.csv(*rows))
+
+    def test_imports_valid_rows(self):
+        result = self.run_import(
+            self.row(order_number='ORD-202510-050', material_code='WOOL-1', cutter_phone='9911-2233', notes='Хар өнгө'),
+            self.row(item_type=dict(Order.ITEM_TYPE_CHOICES)['trousers']),
+        )
+
+        self.assertEqual((result.rows, result.created, result.errors), (2, 2, []))
+        explicit = Order.objects.get(order_number='ORD-202510-050')
+        self.assertEqual(explicit.customer, self.customer)
+        self.assertEqual((explicit.material, explicit.assigned_cutter), (self.material, self.cutter))
+        self.assertEqual((explicit.total_amount, explicit.advance_amount), (1200000, 200000))
+        self.assertEqual(explicit.due_date.isoformat(), '2025-10-20')
+        self.assertEqual((explicit.current_status, explicit.notes), (FIRST_STATUS, 'Хар өнгө'))
+        # Numbers handed out after an explicit one never collide with it
+        allocated = Order.objects.get(item_type='trousers')
+        self.assertEqual(allocated.order_number, 'ORD-202510-051')
+        self.assertEqual(list(allocated.status_history.values_list('status', flat=True)), [FIRST_STATUS])
+
+    def test_later_status_gets_a_history_row(self):
+        self.run_import(
+            self.row(order_number='ORD-IMP-1', current_status='cutter_cutting'),
+            self.row(order_number='ORD-IMP-2', current_status=FINAL_STATUS),
+        )
+
+        cutting = Order.objects.get(order_number='ORD-IMP-1')
+        history = cutting.status_history.order_by('completed_at', 'id')
+        self.assertEqual([entry.status for entry in history], [FIRST_STATUS, 'cutter_cutting'])
+        self.assertEqual(timezone.localdate(history[1].completed_at).isoformat(), '2025-10-01')
+
+        finished = Order.objects.get(order_number='ORD-IMP-2')
+        self.assertEqual(finished.completed_date, finished.due_date)
+        last = finished.status_history.order_by('completed_at', 'id').last()
+        self.assertEqual((last.status, timezone.localdate(last.completed_at)), (FINAL_STATUS, finished.due_date))
+
+    def test_invalid_rows_are_reported(self):
+        cases = {
+            'customer_phone: утасны': self.row(customer_phone=''),
+            'customer_phone: үйлчлүүлэгч': self.row(customer_phone='88888888'),
+            'item_type': self.row(item_type='spacesuit'),
+            'current_status': self.row(current_status='lost'),
+            'Зөвхөн тоо': self.row(total_amount='abc'),
+            'Огноо буруу': self.row(due_date='20/10/2025'),
+            'total_amount': self.row(total_amount='-1', advance_amount='0'),
+            'advance_amount': self.row(advance_amount='2,000,000'),
+            'material_code': self.row(material_code='SILK-9'),
+            'cutter_phone': self.row(cutter_phone='88887777'),
+            'аль хэдийн': self.row(order_number='ORD-TAKEN-1'),
+        }
+        for message, row in cases.items():
+            with self.subTest(message):
+                result = self.run_import(row)
+                self.assertEqual(result.created, 0)
+                self.assertEqual(len(result.errors), 1)
+                line_number, error = result.errors[0]
+                self.assertEqual(line_number, 2)
+                self.assertIn(message, error)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_duplicate_number_in_file_keeps_the_first_row(self):
+        result = self.run_import(self.row(order_number='ORD-IMP-1'), self.row(order_number='ORD-IMP-1'))
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors, [(3, 'order_number: давхардсан дугаар ORD-IMP-1')])
+
+    def test_missing_columns(self):
+        result = OrderImporter().run(self.csv(self.row(), columns=['customer_phone', 'item_type', 'total_amount']))
+
+        self.assertEqual(result.rows, 0)
+        self.assertEqual(result.errors, [(1, 'Багана дутуу байна: due_date, start_date')])
+
+    def test_dry_run_writes_nothing(self):
+        result = self.run_import(self.row(), self.row(current_status='lost'), dry_run=True)
+
+        self.assertEqual((result.rows, result.created, len(result.errors)), (2, 1, 1))
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(OrderStatusHistory.objects.exists())
+
+    def test_admin_upload(self):
+        self.client.force_login(self.user)
+        url = reverse('admin:orders_order_import_csv')
+        upload = lambda: SimpleUploadedFile('orders.csv', self.csv(self.row(order_number='ORD-IMP-1')).getvalue().encode('utf-8-sig'))
+
+        response = self.client.post(url, {'csv_file': upload(), 'dry_run': 'on'})
+        self.assertContains(response, '1 захиалга\n            шалгагдсан')
+        self.assertFalse(Order.objects.filter(order_number='ORD-IMP-1').exists())
+
+        response = self.client.post(url, {'csv_file': upload()})
+        self.assertContains(response, '1 захиалга импортлогдлоо')
+        order = Order.objects.get(order_number='ORD-IMP-1')
+        # The admin has no employee record, so the history is signed by the first active one
+        self.assertEqual(order.status_history.get().completed_by, self.cutter)
+
+
+class OrderEventsFallbackTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+        cls.order = create_order(customer, 'ORD-EVENTS-1')
+        cls.history = [
+            OrderStatusHistory.objects.create(order=cls.order, status=status)
+            for status in ('order_placed', 'material_arrived')
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def events(self, params=None):
+        response = self.client.get(reverse('orders:order_events'), params or {})
+        # A plain response: WSGI cannot consume an asynchronous stream
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response.content.decode()
+
+    def test_without_cursor_starts_from_latest_row(self):
+        body = self.events()
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn(f'id: {self.history[-1].pk}\n\n', body)
+
+    def test_cursor_returns_newer_rows(self):
+        body = self.events({'after': self.history[0].pk})
+        self.assertIn(f'id: {self.history[-1].pk}\nevent: status', body)
+        self.assertNotIn(f'id: {self.history[0].pk}\n', body)
+
+    def test_list_page_renders_cursor(self):
+        response = self.client.get(reverse('orders:order_list'))
+        self.assertContains(response, f'data-order-events-after="{self.history[-1].pk}"')
+
+
+class WorkflowTests(SimpleTestCase):
+    def test_every_item_type_runs_first_to_final(self):
+        for item_type, _ in Order.ITEM_TYPE_CHOICES:
+            with self.subTest(item_type=item_type):
+                workflow = workflow_for(item_type)
+                skipped = set(DEFAULT_SKIPS.get(item_type, []))
+                self.assertEqual(workflow.codes, [s.code for s in STATUSES if s.code not in skipped])
+                self.assertEqual(workflow.codes[0], FIRST_STATUS)
+                self.assertEqual(workflow.codes[-1], FINAL_STATUS)
+
+                # next_status walks every step once and stops after the final one
+                walked = [FIRST_STATUS]
+                while workflow.next(walked[-1]):
+                    walked.append(workflow.next(walked[-1]))
+                self.assertEqual(walked, workflow.codes)
+                self.assertEqual([workflow.previous(code) for code in walked[1:]], walked[:-1])
+
+                progress = [workflow.progress(code) for code in workflow.codes]
+                self.assertEqual(progress, sorted(progress))
+                self.assertEqual(progress[-1], 100)
+                self.assertEqual(workflow.completed_steps(FINAL_STATUS), workflow.codes)
+
+    def test_skipped_status_moves_to_next_step(self):
+        workflow = workflow_for('repair')
+        self.assertNotIn('cutter_cutting', workflow)
+        self.assertEqual(workflow.next('cutter_cutting'), FINAL_STATUS)
+        self.assertEqual(workflow.progress('cutter_cutting'), 50)
+        self.assertEqual(workflow.completed_steps('cutter_cutting'), [FIRST_STATUS])
+
+        shirt = workflow_for('casual_shirt')
+        self.assertEqual(shirt.next('tailor_first_completion'), FINAL_STATUS)
+        self.assertEqual(shirt.next('customer_second_fitting'), FINAL_STATUS)
+
+    def test_order_properties_follow_workflow(self):
+        order = Order(item_type='repair', current_status=FIRST_STATUS)
+        self.assertEqual(order.next_status, FINAL_STATUS)
+        self.assertFalse(order.is_finished)
+        order.current_status = FINAL_STATUS
+        self.assertIsNone(order.next_status)
+        self.assertTrue(order.is_finished)
+        self.assertEqual(order.progress_percentage, 100)
+
+    def test_invalid_skips_are_rejected(self):
+        for skips in ({'repair': ['unknown']}, {'repair': [FINAL_STATUS]}, {'repair': [FIRST_STATUS]}):
+            with self.assertRaises(ImproperlyConfigured):
+                compile_workflows(skips)
+
+
+class OrderDetailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_advance_button_only_while_a_next_status_exists(self):
+        for status, shown in (('order_placed', True), (FINAL_STATUS, False)):
+            with self.subTest(status=status):
+                order = create_order(self.customer, f'ORD-DETAIL-{status}', item_type='repair', current_status=status)
+                response = self.client.get(reverse('orders:order_detail', args=[order.pk]))
+                advance_url = reverse('orders:advance_status', args=[order.pk])
+                self.assertEqual(f'action="{advance_url}"' in response.content.decode(), shown)
+
+
+class RequestTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+
+    def test_server_timing_only_for_staff(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('login')))
+        with override_settings(SERVER_TIMING_PUBLIC=True):
+            self.assertIn('Server-Timing', self.client.get(reverse('login')))
+        self.client.force_login(self.user)
+        self.assertIn('Server-Timing', self.client.get(reverse('orders:order_list')))
+
+    def test_only_slow_requests_log_at_info(self):
+        with self.assertLogs('tailor_system.requests', 'DEBUG') as logs:
+            self.client.get(reverse('login'))
+        self.assertEqual([record.levelname for record in logs.records], ['DEBUG'])
+
+        with override_settings(REQUEST_LOG_SLOW_MS=0), self.assertLogs('tailor_system.requests', 'INFO') as logs:
+            self.client.get(reverse('login'))
+        self.assertIn('"url_name": "login"', logs.output[0])
+
+
+class WorkloadAssignmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+        employee = lambda name, kind, **fields: Employee.objects.create(first_name=name, phone=f'9911{Employee.objects.count():04d}', employee_type=kind, **fields)
+        cls.busy_cutter = employee('Болд', 'cutter')
+        cls.free_cutter = employee('Дорж', 'cutter')
+        cls.busy_sewer = employee('Сараа', 'jacket_sewer')
+        cls.free_sewer = employee('Цэцэг', 'jacket_sewer')
+        cls.trouser_sewer = employee('Номин', 'trouser_sewer')
+        cls.inactive_sewer = employee('Отгон', 'jacket_sewer', is_active=False)
+        cls.held = create_order(
+            cls.customer, 'ORD-LOAD-1', assigned_cutter=cls.busy_cutter, assigned_tailor=cls.busy_sewer,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+
+    def ids(self, candidates):
+        return [candidate['id'] for candidate in candidates]
+
+    def test_rank_prefers_least_loaded_active_employees(self):
+        self.assertEqual(self.ids(rank('assigned_tailor', 'men_suit')), [self.free_sewer.pk, self.busy_sewer.pk])
+        self.assertEqual(self.ids(rank('assigned_cutter', 'men_suit')), [self.free_cutter.pk, self.busy_cutter.pk])
+        # Repairs need no cutter
+        self.assertEqual(rank('assigned_cutter', 'repair'), [])
+
+    def test_good_rating_outweighs_small_load_when_time_allows(self):
+        for number in range(3):
+            order = create_order(self.customer, f'ORD-RATED-{number}', current_status=FINAL_STATUS)
+            EmployeeRating.objects.create(order=order, employee=self.busy_sewer, rating=5)
+        self.assertEqual(self.ids(rank('assigned_tailor', 'men_suit', days_left=21)), [self.busy_sewer.pk, self.free_sewer.pk])
+        # Due tomorrow: the free pair of hands wins
+        self.assertEqual(self.ids(rank('assigned_tailor', 'men_suit', days_left=1)), [self.free_sewer.pk, self.busy_sewer.pk])
+
+    def test_suggest_covers_the_item_types_fields(self):
+        suggestions = suggest('trousers', self.today + timedelta(days=14), self.today)
+        self.assertEqual(set(suggestions), {'assigned_cutter', 'assigned_trouser_maker'})
+        self.assertEqual(self.ids(suggestions['assigned_trouser_maker']), [self.trouser_sewer.pk])
+
+    def test_suggest_does_not_count_the_edited_order(self):
+        suggestions = suggest('men_suit', self.held.due_date, self.today, order=self.held)
+        for candidate in suggestions['assigned_cutter']:
+            self.assertEqual(candidate['active'], 0)
+
+    def test_auto_assign_spreads_a_batch(self):
+        orders = [create_order(self.customer, f'ORD-AUTO-{number}', item_type='jacket') for number in range(2)]
+        finished = create_order(self.customer, 'ORD-AUTO-DONE', item_type='jacket', current_status=FINAL_STATUS)
+
+        changed, fields = auto_assign(orders + [finished], self.today)
+
+        self.assertEqual(changed, orders)
+        self.assertEqual(fields, ['assigned_cutter', 'assigned_tailor'])
+        # The second order sees the first pick: the free employees take one each
+        self.assertEqual({order.assigned_tailor_id for order in orders}, {self.free_sewer.pk, self.busy_sewer.pk})
+        self.assertEqual(orders[0].assigned_tailor_id, self.free_sewer.pk)
+        self.assertIsNone(finished.assigned_tailor_id)
+
+    def cached(self):
+        return cache.get(index_key(timezone.localdate())) is not None
+
+    def save(self, instance, **changes):
+        workload_index()
+        for name, value in changes.items():
+            setattr(instance, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+        return self.cached()
+
+    def test_only_counted_changes_invalidate(self):
+        order = Order.objects.get(pk=self.held.pk)
+        self.assertTrue(self.save(order, notes='Товч солих'))
+        self.assertFalse(self.save(order, current_status='material_arrived'))
+        self.assertFalse(self.save(order, assigned_tailor=self.free_sewer))
+        # Setting it back is a change too
+        self.assertFalse(self.save(order, assigned_tailor=self.busy_sewer))
+
+        employee = Employee.objects.get(pk=self.free_cutter.pk)
+        self.assertTrue(self.save(employee, phone='99118888'))
+        self.assertFalse(self.save(employee, is_active=False))
+
+    def test_new_and_deleted_rows_invalidate(self):
+        workload_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            EmployeeRating.objects.create(order=self.held, employee=self.busy_sewer, rating=4)
+        self.assertFalse(self.cached())
+
+        workload_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.get(pk=self.held.pk).delete()
+        self.assertFalse(self.cached())
+
+
+class ByteRangeTests(SimpleTestCase):
+    def test_whole_file_when_absent_or_unsupported(self):
+        for header in (None, '', 'items=0-10', 'bytes=0-1,5-6', 'bytes=-'):
+            self.assertIsNone(byte_range(header, 100), header)
+
+    def test_ranges(self):
+        self.assertEqual(byte_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(byte_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(byte_range('bytes=-10', 100), (90, 99))
+        # Past the end is clamped, a suffix longer than the file is the whole file
+        self.assertEqual(byte_range('bytes=50-500', 100), (50, 99))
+        self.assertEqual(byte_range('bytes=-500', 100), (0, 99))
+
+    def test_unsatisfiable(self):
+        for header in ('bytes=100-', 'bytes=20-10'):
+            with self.assertRaises(ValueError):
+                byte_range(header, 100)
+
+
+class ServeMediaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name, MEDIA_ACCEL=''))
+        self.root = directory.name
+        self.data = bytes(range(256)) * 4
+        os.makedirs(os.path.join(self.root, 'order_designs', 'front'))
+        with open(os.path.join(self.root, 'order_designs', 'front', 'design.jpg'), 'wb') as file:
+            file.write(self.data)
+        self.mtime = os.stat(os.path.join(self.root, 'order_designs', 'front', 'design.jpg')).st_mtime
+        self.url = '/media/order_designs/front/design.jpg'
+        self.client.force_login(self.user)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_range_request(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.data)}')
+        self.assertEqual(b''.join(response.streaming_content), self.data[10:20])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, headers={'Range': f'bytes={len(self.data)}-'})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.data)}')
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': http_date(self.mtime - 60)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+
+    def test_not_modified_since(self):
+        response = self.client.get(self.url, headers={'If-Modified-Since': http_date(self.mtime)})
+        self.assertEqual(response.status_code, 304)
+
+    def test_path_outside_media_root(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+    def test_only_design_images_are_served(self):
+        with open(os.path.join(self.root, 'upload.part'), 'wb') as file:
+            file.write(self.data)
+
+        with override_settings(MEDIA_ACCEL='nginx'):
+            self.assertTrue(self.client.get(self.url).has_header('X-Accel-Redirect'))
+            for url in ['/media/upload.part', '/media/order_designs/../upload.part']:
+                with self.subTest(url):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 404)
+                    self.assertFalse(response.has_header('X-Accel-Redirect'))
+
+
+def png_bytes(size):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'white').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def jpeg_with_exif(size):
+    """A JPEG photo rotated by its EXIF orientation and carrying a GPS position"""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = 'Phone'
+    exif.get_ifd(0x8825).update({1: 'N', 2: (47.0, 55.0, 0.0)})
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'white').save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+@override_settings(DESIGN_IMAGE_WIDTHS=(32, 64))
+class DesignImageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+
+    def order_with(self, number, data, name):
+        return create_order(self.customer, number, design_front=SimpleUploadedFile(name, data))
+
+    def process(self, order):
+        with self.captureOnCommitCallbacks(execute=True):
+            process_order_images(order.pk, ['design_front'])
+        order.refresh_from_db()
+        return order
+
+    def test_stripped_copy_replaces_and_deletes_original(self):
+        order = self.order_with('ORD-IMG-1', jpeg_with_exif((80, 40)), 'photo.jpg')
+        uploaded = order.design_front.name
+
+        order = self.process(order)
+
+        self.assertNotEqual(order.design_front.name, uploaded)
+        self.assertFalse(design_storage.exists(uploaded))
+        with design_storage.open(order.design_front.name) as file:
+            image = Image.open(file)
+            self.assertEqual(dict(image.getexif()), {})
+            # The orientation is applied to the pixels instead
+            self.assertEqual(image.size, (40, 80))
+        self.assertEqual(order.design_variants['design_front'], {'name': order.design_front.name, 'widths': [32, 40]})
+
+    def test_shared_original_is_kept_until_every_order_moved_off(self):
+        data = jpeg_with_exif((80, 40))
+        first = self.order_with('ORD-IMG-1', data, 'photo.jpg')
+        second = self.order_with('ORD-IMG-2', data, 'other.jpg')
+        uploaded = first.design_front.name
+        self.assertEqual(second.design_front.name, uploaded)
+
+        first = self.process(first)
+        self.assertTrue(design_storage.exists(uploaded))
+
+        second = self.process(second)
+        self.assertEqual(second.design_front.name, first.design_front.name)
+        self.assertFalse(design_storage.exists(uploaded))
+
+    def test_variant_sizes(self):
+        order = self.process(self.order_with('ORD-IMG-1', png_bytes((100, 50)), 'design.png'))
+        name = order.design_front.name
+
+        self.assertEqual(order.design_variants['design_front']['widths'], [32, 64])
+        for width, height in ((32, 16), (64, 32)):
+            for fmt in FORMATS:
+                with variant_storage.open(variant_name(name, width, fmt)) as file:
+                    self.assertEqual(Image.open(file).size, (width, height))
+
+    def test_image_without_metadata_is_kept(self):
+        order = self.order_with('ORD-IMG-1', png_bytes((20, 10)), 'design.png')
+        uploaded = order.design_front.name
+        order = self.process(order)
+        self.assertEqual(order.design_front.name, uploaded)
+        self.assertTrue(design_storage.exists(uploaded))
+        # Never upscaled past the image's own width
+        self.assertEqual(order.design_variants['design_front']['widths'], [20])
+
+
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+
+    def test_name_is_content_hash(self):
+        data = png_bytes((10, 10))
+        name = design_storage.save('Upload Name.PNG', ContentFile(data))
+        digest = hashlib.sha256(data).hexdigest()
+        self.assertEqual(name, f'order_designs/blobs/{digest[:2]}/{digest}.png')
+        self.assertTrue(design_storage.is_content_addressed(name))
+
+    def test_identical_uploads_share_one_file(self):
+        data = png_bytes((10, 10))
+        first = create_order(self.customer, 'ORD-CAS-1', design_front=SimpleUploadedFile('a.png', data))
+        second = create_order(self.customer, 'ORD-CAS-2', design_back=SimpleUploadedFile('b.png', data))
+        other = create_order(self.customer, 'ORD-CAS-3', design_front=SimpleUploadedFile('a.png', png_bytes((12, 10))))
+
+        self.assertEqual(first.design_front.name, second.design_back.name)
+        self.assertNotEqual(first.design_front.name, other.design_front.name)
+        directory = os.path.dirname(design_storage.path(first.design_front.name))
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_design_images', '--grace-hours=0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_gc_keeps_referenced_files(self):
+        shared = png_bytes((10, 10))
+        first = create_order(self.customer, 'ORD-CAS-1', design_front=SimpleUploadedFile('a.png', shared))
+        create_order(self.customer, 'ORD-CAS-2', design_front=SimpleUploadedFile('a.png', shared))
+        kept = first.design_front.name
+        variant = variant_storage.save(variant_name(kept, 32, 'webp'), ContentFile(b'variant'))
+        orphan = design_storage.save('orphan.png', ContentFile(png_bytes((14, 10))))
+        orphan_variant = variant_storage.save(variant_name(orphan, 32, 'webp'), ContentFile(b'variant'))
+
+        self.assertIn('Would delete 2 unreferenced files', self.gc('--dry-run'))
+        self.assertTrue(design_storage.exists(orphan))
+
+        self.assertIn('Deleted 2 unreferenced files', self.gc())
+        self.assertTrue(design_storage.exists(kept))
+        self.assertTrue(variant_storage.exists(variant))
+        self.assertFalse(design_storage.exists(orphan))
+        self.assertFalse(variant_storage.exists(orphan_variant))
+
+        # Still shared by the second order after the first lets go
+        Order.objects.filter(pk=first.pk).update(design_front='')
+        self.gc()
+        self.assertTrue(design_storage.exists(kept))
+
+    def test_gc_grace_period_keeps_new_files(self):
+        orphan = design_storage.save('orphan.png', ContentFile(png_bytes((14, 10))))
+        out = StringIO()
+        call_command('gc_design_images', stdout=out)
+        self.assertIn('Deleted 0 unreferenced files', out.getvalue())
+        self.assertTrue(design_storage.exists(orphan))
+
+
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(DESIGN_UPLOAD_TEMP_DIR=directory.name))
+        self.client.force_login(self.user)
+
+    def start(self, data, checksum=None):
+        response = self.client.post(reverse('orders:upload_init'), {
+            'filename': 'design.png', 'size': len(data), 'checksum': checksum or hashlib.sha256(data).hexdigest(),
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def append(self, upload_id, offset, chunk):
+        url = reverse('orders:upload_append', args=[upload_id])
+        return self.client.post(f'{url}?offset={offset}', chunk, content_type='application/octet-stream')
+
+    def complete(self, upload_id):
+        return self.client.post(reverse('orders:upload_complete', args=[upload_id]))
+
+    def test_chunks_resume_from_reported_offset(self):
+        data = png_bytes((40, 30))
+        upload_id = self.start(data)
+        half = len(data) // 2
+        self.assertEqual(self.append(upload_id, 0, data[:half]).json()['offset'], half)
+
+        # A retried first chunk is refused with the offset to continue from
+        response = self.append(upload_id, 0, data[:half])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], half)
+        status = self.client.get(reverse('orders:upload_status', args=[upload_id])).json()
+        self.assertEqual(status['offset'], half)
+
+        self.assertEqual(self.append(upload_id, half, data[half:]).json()['offset'], len(data))
+        self.assertEqual(self.complete(upload_id).status_code, 200)
+        self.assertTrue(DesignUpload.objects.get(pk=upload_id).completed)
+
+    def test_chunk_past_declared_size(self):
+        data = png_bytes((10, 10))
+        upload_id = self.start(data)
+        self.assertEqual(self.append(upload_id, 0, data + b'extra').status_code, 413)
+
+    def test_incomplete_upload_cannot_complete(self):
+        data = png_bytes((10, 10))
+        upload_id = self.start(data)
+        self.append(upload_id, 0, data[:10])
+        self.assertEqual(self.complete(upload_id).status_code, 409)
+
+    def test_checksum_mismatch_discards_upload(self):
+        data = png_bytes((10, 10))
+        upload_id = self.start(data, checksum='0' * 64)
+        self.append(upload_id, 0, data)
+        self.assertEqual(self.complete(upload_id).status_code, 422)
+        self.assertFalse(DesignUpload.objects.filter(pk=upload_id).exists())
+
+    def test_invalid_checksum_is_refused(self):
+        response = self.client.post(reverse('orders:upload_init'), {'filename': 'a.png', 'size': 10, 'checksum': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_not_an_image(self):
+        data = b'not an image' * 10
+        upload_id = self.start(data)
+        self.append(upload_id, 0, data)
+        self.assertEqual(self.complete(upload_id).status_code, 415)
+
+    @override_settings(DESIGN_UPLOAD_MAX_PIXELS=100 * 100)
+    def test_too_many_pixels(self):
+        data = png_bytes((200, 100))
+        upload_id = self.start(data)
+        self.append(upload_id, 0, data)
+        self.assertEqual(self.complete(upload_id).status_code, 413)
+        self.assertFalse(DesignUpload.objects.filter(pk=upload_id).exists())
+
+
+class DueDateEstimateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+        order = create_order(customer, 'ORD-EST-1', current_status='material_arrived')
+        OrderStatusHistory.objects.create(order=order, status='order_placed', completed_at=timezone.now() - timedelta(days=2))
+        OrderStatusHistory.objects.create(order=order, status='material_arrived')
+
+    def setUp(self):
+        cache.delete(STEPS_KEY)
+        self.addCleanup(cache.delete, STEPS_KEY)
+        self.client.force_login(self.user)
+
+    def estimate(self):
+        return self.client.get(reverse('orders:due_date_estimate'), {'item_type': 'men_suit'}).json()
+
+    def test_no_estimate_before_first_refresh(self):
+        data = self.estimate()
+        self.assertFalse(data['success'])
+        self.assertIn('тооцоологдоогүй', data['message'])
+        # The request neither refreshed the transitions nor cached durations
+        self.assertFalse(StatusTransition.objects.exists())
+        self.assertIsNone(cache.get(STEPS_KEY))
+
+    def test_empty_durations_are_served_from_cache(self):
+        self.assertEqual(refresh_step_durations(), {'item_types': {}, 'statuses': {}})
+        OrderStatusHistory.objects.create(order=Order.objects.get(), status='cutter_cutting')
+        refresh_transitions()
+        data = self.estimate()
+        self.assertFalse(data['success'])
+        self.assertIn('хангалттай', data['message'])
+
+    def test_estimate_from_refreshed_durations(self):
+        refresh_transitions()
+        refresh_step_durations()
+        data = self.estimate()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['steps'][0]['status'], 'order_placed')
+
+
+class FrontendAssetFallbackTests(TestCase):
+    def test_cdn_until_built(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(STATICFILES_DIRS=[directory]):
+            response = self.client.get(reverse('login'))
+        self.assertContains(response, 'https://cdn.tailwindcss.com/3.4.17')
+        self.assertNotContains(response, 'vendor/css/login.css')
+
+    def test_vendor_build_when_present(self):
+        from tailor_system.assets import VENDOR_ASSETS
+
+        with tempfile.TemporaryDirectory() as directory:
+            for path in VENDOR_ASSETS:
+                os.makedirs(os.path.join(directory, os.path.dirname(path)), exist_ok=True)
+                open(os.path.join(directory, path), 'w').close()
+            with override_settings(STATICFILES_DIRS=[directory]):
+                response = self.client.get(reverse('login'))
+        self.assertContains(response, 'vendor/css/login.css')
+        self.assertNotContains(response, 'cdn.tailwindcss.com')
+
+
+class WarmUpTests(SimpleTestCase):
+    def test_off_by_default_outside_production(self):
+        with override_settings(TEMPLATE_WARMUP=False):
+            self.assertIsNone(warm_up())
+
+    def test_compiles_templates_and_reports_broken_ones(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        os.makedirs(os.path.join(directory.name, 'pages'))
+        with open(os.path.join(directory.name, 'pages', 'ok.html'), 'w') as f:
+            f.write('{% if ok %}ok{% endif %}')
+        with open(os.path.join(directory.name, 'broken.html'), 'w') as f:
+            f.write('{% if %}')
+        templates = [{**settings.TEMPLATES[0], 'DIRS': [directory.name]}]
+
+        with override_settings(TEMPLATE_WARMUP=True, TEMPLATES=templates):
+            with self.assertLogs('tailor_system.startup') as logs:
+                self.assertGreaterEqual(warm_up(), 0)
+
+        self.assertIn('Template broken.html does not compile', logs.output[0])
+        self.assertIn('Warmed up 1 templates', logs.output[1])
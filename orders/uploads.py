@@ -0,0 +1,152 @@
+"""Chunked, resumable uploads of design images.
+
+On a weak connection one failed multipart POST loses the whole order form, so
+the form sends each image on its own, in chunks:
+
+1. ``init`` registers the file's name, size and SHA-256;
+2. ``append`` writes one chunk at the offset the server reports, streamed from
+   the request straight into a temporary file (a retried or resumed upload
+   continues from there);
+3. ``complete`` checks the size, checksum, image format and pixel count.
+
+A completed upload is then attached to an order field, either by the order form
+(hidden ``<field>_upload`` inputs) or directly by ``complete``.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+
+class UploadError(Exception):
+    """An upload request that cannot be honoured; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def temp_path(upload):
+    return os.path.join(settings.DESIGN_UPLOAD_TEMP_DIR, f'{upload.pk}.part')
+
+
+def start_upload(user, filename, size, checksum):
+    from .models import DesignUpload
+
+    if size <= 0 or size > settings.DESIGN_UPLOAD_MAX_SIZE:
+        raise UploadError(f'Зургийн хэмжээ {settings.DESIGN_UPLOAD_MAX_SIZE // (1024 * 1024)}MB-аас ихгүй байх ёстой.', 413)
+    if len(checksum) != 64 or any(char not in '0123456789abcdef' for char in checksum):
+        raise UploadError('SHA-256 checksum буруу байна.')
+    upload = DesignUpload.objects.create(
+        created_by=user, filename=os.path.basename(filename)[:255] or 'design', size=size, checksum=checksum,
+    )
+    os.makedirs(settings.DESIGN_UPLOAD_TEMP_DIR, exist_ok=True)
+    open(temp_path(upload), 'wb').close()
+    return upload
+
+
+def append_chunk(upload, offset, stream, length):
+    """Write ``length`` bytes read from ``stream`` at ``offset``; returns the new offset"""
+    from .models import DesignUpload
+
+    if length > settings.DESIGN_UPLOAD_CHUNK_SIZE:
+        raise UploadError('Хэсгийн хэмжээ хэтэрсэн байна.', 413)
+    with transaction.atomic():
+        # Serializes retries of the same chunk
+        locked = DesignUpload.objects.select_for_update().get(pk=upload.pk)
+        if locked.completed:
+            raise UploadError('Илгээлт дууссан байна.', 409)
+        if offset != locked.received:
+            # The client resumes from the offset in the response
+            raise UploadError('Хэсгийн байрлал таарахгүй байна.', 409)
+        if offset + length > locked.size:
+            raise UploadError('Файлын хэмжээнээс хэтэрсэн байна.', 413)
+
+        written = 0
+        with open(temp_path(upload), 'r+b') as file:
+            file.seek(offset)
+            while written < length:
+                data = stream.read(min(64 * 1024, length - written))
+                if not data:
+                    break
+                file.write(data)
+                written += len(data)
+        if written != length:
+            # Connection dropped mid-chunk; the next attempt overwrites these bytes
+            raise UploadError('Хэсэг бүрэн ирээгүй.', 400)
+
+        locked.received = offset + length
+        locked.save(update_fields=['received'])
+    upload.received = locked.received
+    return upload.received
+
+
+def finish_upload(upload):
+    """Verify a fully received upload and mark it complete"""
+    if upload.completed:
+        return upload
+    if upload.received != upload.size:
+        raise UploadError('Файл бүрэн ирээгүй байна.', 409)
+
+    path = temp_path(upload)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    if digest.hexdigest() != upload.checksum:
+        discard_upload(upload)
+        raise UploadError('Файл гэмтсэн байна (checksum таарахгүй). Дахин оруулна уу.', 422)
+    try:
+        with Image.open(path) as image:
+            image.verify()
+        # verify() leaves the image unusable, and only looks at the headers anyway
+        with Image.open(path) as image:
+            pixels = image.width * image.height
+    except Image.DecompressionBombError:
+        pixels = None
+    except Exception:
+        discard_upload(upload)
+        raise UploadError('Зөвхөн зураг оруулна уу.', 415)
+    if pixels is None or pixels > settings.DESIGN_UPLOAD_MAX_PIXELS:
+        # A few MB of PNG can decode to gigabytes when the variants are built
+        discard_upload(upload)
+        raise UploadError(f'Зургийн хэмжээ {settings.DESIGN_UPLOAD_MAX_PIXELS // 1000000} мегапикселээс ихгүй байх ёстой.', 413)
+
+    upload.completed = True
+    upload.save(update_fields=['completed'])
+    return upload
+
+
+def attach_upload(order, field, upload, save=True):
+    """Store a completed upload as ``order.<field>`` and drop the temporary file"""
+    with open(temp_path(upload), 'rb') as file:
+        getattr(order, field).save(upload.filename, File(file), save=False)
+    if save:
+        order.save(update_fields=[field, 'updated_at'])
+    discard_upload(upload)
+
+
+def discard_upload(upload):
+    try:
+        os.remove(temp_path(upload))
+    except FileNotFoundError:
+        pass
+    if upload.pk:
+        upload.delete()
+
+
+def discard_expired_uploads():
+    """Remove uploads abandoned for longer than DESIGN_UPLOAD_EXPIRY_HOURS; returns how many"""
+    from .models import DesignUpload
+
+    cutoff = timezone.now() - timedelta(hours=settings.DESIGN_UPLOAD_EXPIRY_HOURS)
+    expired = list(DesignUpload.objects.filter(created_at__lt=cutoff))
+    for upload in expired:
+        discard_upload(upload)
+    return len(expired)
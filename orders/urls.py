@@ -6,11 +6,18 @@ app_name = 'orders'
 urlpatterns = [
     path('', views.OrderListView.as_view(), name='order_list'),
     path('active/', views.active_orders, name='active_orders'),
+    path('events/', views.order_events, name='order_events'),
     path('new/', views.OrderCreateView.as_view(), name='order_create'),
+    path('due-date-estimate/', views.due_date_estimate, name='due_date_estimate'),
+    path('assignment-suggestions/', views.assignment_suggestions, name='assignment_suggestions'),
     path('<int:pk>/', views.OrderDetailView.as_view(), name='order_detail'),
     path('<int:pk>/edit/', views.OrderUpdateView.as_view(), name='order_edit'),
     path('<int:pk>/delete/', views.OrderDeleteView.as_view(), name='order_delete'),
     path('<int:pk>/advance-status/', views.advance_order_status, name='advance_status'),
     path('<int:pk>/update-step/', views.update_process_step, name='update_step'),
     path('<int:pk>/rate-employee/', views.rate_employee, name='rate_employee'),
+    path('uploads/', views.upload_init, name='upload_init'),
+    path('uploads/<uuid:upload_id>/', views.upload_status, name='upload_status'),
+    path('uploads/<uuid:upload_id>/append/', views.upload_append, name='upload_append'),
+    path('uploads/<uuid:upload_id>/complete/', views.upload_complete, name='upload_complete'),
 ]
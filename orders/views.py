@@ -1,23 +1,42 @@
+import asyncio
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.db import models
-from .models import Order, ProcessStep, OrderRating, OrderStatusHistory, EmployeeRating
+from django.utils.decorators import method_decorator
+from django.db import models, transaction
+from django.views.decorators.http import require_GET, require_POST
+from .models import Order, ProcessStep, OrderRating, OrderStatusHistory, EmployeeRating, DesignUpload
+from .assignments import suggest
+from .estimates import estimate_due_date, step_durations
+from .events import format_event, history_event, hub
 from .forms import OrderForm, ProcessStepForm, EmployeeRatingForm
+from .images import DESIGN_IMAGE_FIELDS
+from .uploads import UploadError, append_chunk, attach_upload, finish_upload, start_upload
+from .workflows import FINAL_STATUS, STATUS_BY_CODE, status_label
 from customers.models import Customer
 from employees.models import Employee
+from materials.stock import InsufficientStock
+from tailor_system.conditional import conditional_page
+from tailor_system.pagination import KeysetPaginationMixin
 
 
-class OrderListView(LoginRequiredMixin, ListView):
+class OrderListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Order
     template_name = 'orders/order_list.html'
     context_object_name = 'orders'
     paginate_by = 20
+    # Newest first, served by order_created_id_idx; overdue orders have their own filter
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         queryset = Order.objects.select_related('customer')
@@ -42,12 +61,11 @@ class OrderListView(LoginRequiredMixin, ListView):
         if item_type_filter and item_type_filter != 'all':
             queryset = queryset.filter(item_type=item_type_filter)
 
-        # Sort: overdue first, then by creation date
-        # We'll sort in Python since we need to use the model property
-        orders = list(queryset.order_by('-created_at'))
-        orders.sort(key=lambda x: (not x.is_overdue, x.created_at), reverse=True)
+        # Same rule as Order.is_overdue
+        if self.request.GET.get('overdue'):
+            queryset = queryset.filter(due_date__lt=timezone.now().date()).exclude(current_status=FINAL_STATUS)
 
-        return orders
+        return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -57,33 +75,46 @@ class OrderListView(LoginRequiredMixin, ListView):
 
         # Calculate statistics
         context['total_orders'] = all_orders.count()
-        context['active_orders'] = all_orders.exclude(current_status='seamstress_finished').count()
-        context['completed_orders'] = all_orders.filter(current_status='seamstress_finished').count()
+        context['active_orders'] = all_orders.exclude(current_status=FINAL_STATUS).count()
+        context['completed_orders'] = all_orders.filter(current_status=FINAL_STATUS).count()
 
-        # Count overdue orders
-        from django.utils import timezone
-        overdue_count = 0
-        for order in all_orders:
-            if order.is_overdue:
-                overdue_count += 1
-        context['overdue_orders'] = overdue_count
+        context['overdue_orders'] = all_orders.filter(due_date__lt=timezone.now().date()).exclude(current_status=FINAL_STATUS).count()
 
         context['status_choices'] = Order.STATUS_CHOICES
         context['item_type_choices'] = Order.ITEM_TYPE_CHOICES
         context['search_query'] = self.request.GET.get('search', '')
         context['status_filter'] = self.request.GET.get('status', 'all')
         context['item_type_filter'] = self.request.GET.get('item_type', 'all')
+        context['overdue_filter'] = bool(self.request.GET.get('overdue'))
+        context['latest_history_id'] = latest_history_id()
         return context
 
 
+def order_timestamps(request, pk):
+    """Modification times of everything shown on the order detail page"""
+    row = Order.objects.filter(pk=pk).values(
+        'updated_at', 'customer__updated_at', 'assigned_tailor__updated_at',
+        'assigned_cutter__updated_at', 'assigned_trouser_maker__updated_at',
+    ).annotate(
+        history=models.Max('status_history__completed_at'),
+        ratings=models.Max('employee_ratings__created_at'),
+        steps=models.Max('process_steps__updated_at'),
+        # Deleting a rating or step leaves no newer timestamp behind
+        counts=models.Count('employee_ratings', distinct=True) + models.Count('process_steps', distinct=True),
+    ).order_by('pk').first()
+    return list(row.values()) if row else None
+
+
+@method_decorator(conditional_page(order_timestamps), name='get')
 class OrderDetailView(LoginRequiredMixin, DetailView):
     model = Order
+    queryset = Order.objects.select_related('material')
     template_name = 'orders/order_detail.html'
     context_object_name = 'order'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        order = self.get_object()
+        order = self.object
 
         # Get process steps
         context['process_steps'] = order.process_steps.all().order_by('created_at')
@@ -92,14 +123,7 @@ class OrderDetailView(LoginRequiredMixin, DetailView):
         context['progress_percentage'] = order.progress_percentage
 
         # Get status colors for display
-        context['status_colors'] = {
-            'seamstress_finished': 'bg-green-100 text-green-800',
-            'customer_first_fitting': 'bg-yellow-100 text-yellow-800',
-            'customer_second_fitting': 'bg-yellow-100 text-yellow-800',
-            'cutter_cutting': 'bg-yellow-100 text-yellow-800',
-            'order_placed': 'bg-blue-100 text-blue-800',
-            'material_arrived': 'bg-blue-100 text-blue-800',
-        }
+        context['status_colors'] = {code: status.color for code, status in STATUS_BY_CODE.items()}
 
         return context
 
@@ -110,6 +134,9 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
     template_name = 'orders/order_form.html'
     success_url = reverse_lazy('orders:order_list')
 
+    def get_form_kwargs(self):
+        return {**super().get_form_kwargs(), 'user': self.request.user}
+
     def form_valid(self, form):
         # Generate order number in format: ORD-YYYYMM-001
         from datetime import datetime
@@ -141,7 +168,11 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
         form.instance.created_by = self.request.user
 
         # Save the form first to get the order instance
-        response = super().form_valid(form)
+        try:
+            response = super().form_valid(form)
+        except InsufficientStock as error:
+            form.add_error('material_quantity', error.message)
+            return self.form_invalid(form)
 
         # Create status history for "order_placed" status
         completed_by = None
@@ -169,12 +200,20 @@ class OrderUpdateView(LoginRequiredMixin, UpdateView):
     form_class = OrderForm
     template_name = 'orders/order_form.html'
 
+    def get_form_kwargs(self):
+        return {**super().get_form_kwargs(), 'user': self.request.user}
+
     def get_success_url(self):
         return reverse_lazy('orders:order_detail', kwargs={'pk': self.object.pk})
 
     def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except InsufficientStock as error:
+            form.add_error('material_quantity', error.message)
+            return self.form_invalid(form)
         messages.success(self.request, 'Захиалга амжилттай шинэчлэгдлээ.')
-        return super().form_valid(form)
+        return response
 
 
 class OrderDeleteView(LoginRequiredMixin, DeleteView):
@@ -193,68 +232,64 @@ def advance_order_status(request, pk):
     from employees.models import Employee
     from django.utils import timezone
 
-    order = get_object_or_404(Order, pk=pk)
-
-    status_choices = [choice[0] for choice in Order.STATUS_CHOICES]
-    current_index = status_choices.index(order.current_status)
-
-    if current_index < len(status_choices) - 1:
-        next_status = status_choices[current_index + 1]
-
-        # Get the currently logged-in user's employee record if it exists
-        completed_by = None
-        if request.user.is_authenticated:
-            # First, try to get the employee associated with the current user
-            try:
-                completed_by = Employee.objects.get(user=request.user)
-            except Employee.DoesNotExist:
-                pass
-
-            # If still no employee found, try to find an employee based on status
-            if completed_by is None:
-                if order.current_status in ['order_placed', 'material_arrived']:
-                    completed_by = Employee.objects.filter(employee_type__in=['shirt_sewer', 'jacket_sewer', 'trouser_sewer']).first()
-                elif order.current_status in ['cutter_cutting']:
-                    completed_by = Employee.objects.filter(employee_type='cutter').first()
-                elif order.current_status in ['customer_first_fitting', 'customer_second_fitting']:
-                    # Set to any available employee if logged-in user has no employee record
-                    completed_by = Employee.objects.first()
-                elif order.current_status in ['tailor_first_completion', 'tailor_second_completion']:
-                    completed_by = Employee.objects.filter(employee_type__in=['shirt_sewer', 'jacket_sewer', 'trouser_sewer']).first()
-                elif order.current_status in ['seamstress_second_prep', 'seamstress_finished']:
-                    completed_by = Employee.objects.filter(employee_type__in=['shirt_sewer', 'jacket_sewer', 'trouser_sewer']).first()
-
-        # Create status history for current status being completed
-        OrderStatusHistory.objects.create(
-            order=order,
-            status=order.current_status,
-            completed_by=completed_by,
-            completed_at=timezone.now(),
-            notes=f'Алхам дууссан - {order.status_display}'
-        )
-
-        # Update order status
-        order.current_status = next_status
-        order.save()
-
-        # Create status history for the next status being started
-        OrderStatusHistory.objects.create(
-            order=order,
-            status=next_status,
-            completed_by=completed_by,
-            completed_at=timezone.now(),
-            notes=f'Алхам эхэлсэн - {dict(Order.STATUS_CHOICES).get(next_status, next_status)}'
-        )
+    try:
+        # One transaction on the locked order: both history rows, the status and the fabric
+        # are written together, or not at all when the fabric cannot be consumed
+        with transaction.atomic():
+            order = get_object_or_404(Order.objects.select_for_update(), pk=pk)
+            next_status = order.next_status
+            if next_status is None:
+                messages.info(request, 'Захиалга аль хэдийн дууссан байна.')
+                return redirect('orders:order_detail', pk=order.pk)
+
+            # Get the currently logged-in user's employee record if it exists
+            completed_by = None
+            if request.user.is_authenticated:
+                # First, try to get the employee associated with the current user
+                try:
+                    completed_by = Employee.objects.get(user=request.user)
+                except Employee.DoesNotExist:
+                    pass
+
+                # If still no employee found, try to find an employee based on status
+                if completed_by is None:
+                    if order.current_status in ['order_placed', 'material_arrived']:
+                        completed_by = Employee.objects.filter(employee_type__in=['shirt_sewer', 'jacket_sewer', 'trouser_sewer']).first()
+                    elif order.current_status in ['cutter_cutting']:
+                        completed_by = Employee.objects.filter(employee_type='cutter').first()
+                    elif order.current_status in ['customer_first_fitting', 'customer_second_fitting']:
+                        # Set to any available employee if logged-in user has no employee record
+                        completed_by = Employee.objects.first()
+                    elif order.current_status in ['tailor_first_completion', 'tailor_second_completion']:
+                        completed_by = Employee.objects.filter(employee_type__in=['shirt_sewer', 'jacket_sewer', 'trouser_sewer']).first()
+                    elif order.current_status in ['seamstress_second_prep', FINAL_STATUS]:
+                        completed_by = Employee.objects.filter(employee_type__in=['shirt_sewer', 'jacket_sewer', 'trouser_sewer']).first()
+
+            # Create status history for current status being completed
+            OrderStatusHistory.objects.create(
+                order=order,
+                status=order.current_status,
+                completed_by=completed_by,
+                completed_at=timezone.now(),
+                notes=f'Алхам дууссан - {order.status_display}'
+            )
 
-        # If order is finished, set completed date
-        if next_status == 'seamstress_finished':
-            order.completed_date = timezone.now().date()
-            order.save()
+            # Update order status (and completed date, fabric stock)
+            order.move_to_status(next_status)
 
-        messages.success(request, f'Захиалгын статус "{order.status_display}" болж шинэчлэгдлээ.')
-    else:
-        messages.info(request, 'Захиалга аль хэдийн дууссан байна.')
+            # Create status history for the next status being started
+            OrderStatusHistory.objects.create(
+                order=order,
+                status=next_status,
+                completed_by=completed_by,
+                completed_at=timezone.now(),
+                notes=f'Алхам эхэлсэн - {status_label(next_status)}'
+            )
+    except InsufficientStock as error:
+        messages.error(request, f'Статус шилжсэнгүй. Материал зарцуулж чадсангүй: {error.message}')
+        return redirect('orders:order_detail', pk=pk)
 
+    messages.success(request, f'Захиалгын статус "{order.status_display}" болж шинэчлэгдлээ.')
     return redirect('orders:order_detail', pk=order.pk)
 
 
@@ -266,25 +301,30 @@ def update_process_step(request, pk):
         new_status = request.POST.get('status')
 
         try:
-            step = ProcessStep.objects.get(id=step_id, order_id=pk)
-            step.status = new_status
+            # The step and the order status it finishes are saved together
+            with transaction.atomic():
+                step = ProcessStep.objects.get(id=step_id, order_id=pk)
+                step.status = new_status
 
-            if new_status == 'completed':
-                step.completed_date = timezone.now()
+                if new_status == 'completed':
+                    step.completed_date = timezone.now()
 
-            step.save()
+                step.save()
 
-            # Update order status if this was the last step
-            order = get_object_or_404(Order, pk=pk)
-            if step.step_type == 'seamstress_finished' and new_status == 'completed':
-                order.current_status = 'seamstress_finished'
-                order.completed_date = timezone.now().date()
-                order.save()
+                # Update order status if this was the last step
+                order = get_object_or_404(Order.objects.select_for_update(), pk=pk)
+                if step.step_type == FINAL_STATUS and new_status == 'completed':
+                    order.move_to_status(FINAL_STATUS)
 
             return JsonResponse({'success': True, 'message': 'Алхам амжилттай шинэчлэгдлээ.'})
 
         except ProcessStep.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Алхам олдсонгүй.'})
+        except InsufficientStock as error:
+            return JsonResponse({
+                'success': False,
+                'message': f'Алхам шинэчлэгдсэнгүй. Материал зарцуулж чадсангүй: {error.message}',
+            })
 
     return JsonResponse({'success': False, 'message': 'Хүсэлт буруу байна.'})
 
@@ -330,7 +370,7 @@ def rate_employee(request, pk):
 @login_required
 def active_orders(request):
     """View for active/incomplete orders with search by phone"""
-    queryset = Order.objects.select_related('customer').exclude(current_status='seamstress_finished')
+    queryset = Order.objects.select_related('customer').exclude(current_status=FINAL_STATUS)
 
     # Search by phone number
     search_query = request.GET.get('search', '')
@@ -343,6 +383,233 @@ def active_orders(request):
     context = {
         'orders': orders,
         'search_query': search_query,
+        'latest_history_id': latest_history_id(),
     }
 
     return render(request, 'orders/active_orders.html', context)
+
+
+def latest_history_id():
+    """Id of the newest status history row; live screens follow the event feed from it"""
+    return OrderStatusHistory.objects.aggregate(latest=models.Max('pk'))['latest'] or 0
+
+
+def status_events_since(after, limit=200):
+    """Status history rows newer than ``after`` as events, for clients the buffer cannot catch up"""
+    history = (
+        OrderStatusHistory.objects.filter(pk__gt=after)
+        .select_related('order', 'completed_by').order_by('pk')[:limit]
+    )
+    return [history_event(item) for item in history]
+
+
+def status_events_backlog(backlog, cursor):
+    """The retry line and backlog as Server-Sent Events text, and the id of the last event"""
+    keepalive = getattr(settings, 'ORDER_EVENTS_KEEPALIVE_SECONDS', 15)
+    # Browsers wait this long before reconnecting, sending the last id they saw
+    parts = [f'retry: {keepalive * 1000}\n\n']
+    for event in backlog:
+        cursor = event['id']
+        parts.append(format_event(event))
+    return ''.join(parts), cursor
+
+
+async def stream_status_events(queue, backlog, cursor):
+    keepalive = getattr(settings, 'ORDER_EVENTS_KEEPALIVE_SECONDS', 15)
+    try:
+        text, cursor = status_events_backlog(backlog, cursor)
+        yield text
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            if event is None:
+                return
+            if cursor is not None and event['id'] <= cursor:
+                continue
+            cursor = event['id']
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(queue)
+
+
+@login_required
+async def order_events(request):
+    """Server-Sent Events stream of new order status history rows"""
+    try:
+        cursor = int(request.headers.get('Last-Event-ID') or request.GET.get('after') or '')
+    except ValueError:
+        cursor = None
+
+    if isinstance(request, ASGIRequest):
+        queue, backlog = hub.subscribe(after=cursor)
+        if backlog is None:
+            backlog = await sync_to_async(status_events_since)(cursor)
+        response = StreamingHttpResponse(
+            stream_status_events(queue, backlog, cursor), content_type='text/event-stream'
+        )
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+    else:
+        # WSGI cannot hold the connection open: send what is new in one plain response
+        # and let the browser reconnect after the retry interval
+        if cursor is None:
+            # Start from the newest row rather than leaving the client without a cursor
+            cursor, backlog = await sync_to_async(latest_history_id)(), []
+        else:
+            backlog = hub.recent(cursor)
+            if backlog is None:
+                backlog = await sync_to_async(status_events_since)(cursor)
+        text, last_id = status_events_backlog(backlog, cursor)
+        if not backlog and last_id is not None:
+            # An id without data sets the browser's Last-Event-ID, so the reconnect resumes here
+            text += f'id: {last_id}\n\n'
+        response = HttpResponse(text, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def upload_error(error, upload=None):
+    data = {'success': False, 'message': error.message}
+    if upload is not None:
+        # Where a retried or resumed upload must continue from
+        upload.refresh_from_db(fields=['received'])
+        data['offset'] = upload.received
+    return JsonResponse(data, status=error.status)
+
+
+@login_required
+@require_POST
+def upload_init(request):
+    """Start a chunked design image upload (see orders.uploads)"""
+    try:
+        upload = start_upload(
+            request.user, request.POST.get('filename', ''),
+            int(request.POST.get('size', '')), request.POST.get('checksum', '').lower(),
+        )
+    except ValueError:
+        return upload_error(UploadError('Хүсэлт буруу байна.'))
+    except UploadError as error:
+        return upload_error(error)
+    return JsonResponse({
+        'success': True, 'id': str(upload.pk), 'offset': 0, 'chunk_size': settings.DESIGN_UPLOAD_CHUNK_SIZE,
+    }, status=201)
+
+
+@login_required
+@require_GET
+def upload_status(request, upload_id):
+    """How much of an upload the server has, for resuming it"""
+    upload = get_object_or_404(DesignUpload, pk=upload_id, created_by=request.user)
+    return JsonResponse({
+        'success': True, 'id': str(upload.pk), 'offset': upload.received, 'size': upload.size,
+        'completed': upload.completed, 'chunk_size': settings.DESIGN_UPLOAD_CHUNK_SIZE,
+    })
+
+
+@login_required
+@require_POST
+def upload_append(request, upload_id):
+    """Write the raw request body as the chunk at ``?offset=``"""
+    upload = get_object_or_404(DesignUpload, pk=upload_id, created_by=request.user)
+    try:
+        offset = int(request.GET.get('offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or '')
+    except ValueError:
+        return upload_error(UploadError('Хүсэлт буруу байна.'), upload)
+    try:
+        # Read from the request stream, never request.body, so the chunk is not held in memory
+        received = append_chunk(upload, offset, request, length)
+    except UploadError as error:
+        return upload_error(error, upload)
+    return JsonResponse({'success': True, 'offset': received})
+
+
+@login_required
+@require_POST
+def upload_complete(request, upload_id):
+    """Verify a fully sent upload; with ``order`` and ``field`` also attach it to that order"""
+    upload = get_object_or_404(DesignUpload, pk=upload_id, created_by=request.user)
+    try:
+        finish_upload(upload)
+    except UploadError as error:
+        return upload_error(error)
+
+    field = request.POST.get('field')
+    if not request.POST.get('order'):
+        return JsonResponse({'success': True, 'id': str(upload.pk)})
+    if field not in dict(DESIGN_IMAGE_FIELDS):
+        return upload_error(UploadError('Зургийн талбар буруу байна.'))
+    order = get_object_or_404(Order, pk=request.POST['order'])
+    attach_upload(order, field, upload)
+    return JsonResponse({'success': True, 'url': getattr(order, field).url})
+
+
+@login_required
+@require_GET
+def due_date_estimate(request):
+    """Suggested due date for the item type, start date and assignees picked on the order form"""
+    item_type = request.GET.get('item_type')
+    if item_type not in dict(Order.ITEM_TYPE_CHOICES):
+        return JsonResponse({'success': False, 'message': 'Хувцасны төрөл сонгоно уу.'}, status=400)
+    try:
+        start_date = date.fromisoformat(request.GET['start_date']) if request.GET.get('start_date') else timezone.localdate()
+        assignees = {
+            field: int(request.GET[field]) if request.GET.get(field) else None
+            for field in ('assigned_cutter', 'assigned_tailor', 'assigned_trouser_maker')
+        }
+        order_id = int(request.GET['order']) if request.GET.get('order') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Хүсэлт буруу байна.'}, status=400)
+
+    order = Order.objects.filter(pk=order_id).first() if order_id else None
+    estimate = estimate_due_date(
+        item_type, start_date,
+        cutter_id=assignees['assigned_cutter'], tailor_id=assignees['assigned_tailor'],
+        trouser_maker_id=assignees['assigned_trouser_maker'], order=order,
+    )
+    if estimate is None:
+        if step_durations() is None:
+            return JsonResponse({'success': False, 'message': 'Статусын хугацаа хараахан тооцоологдоогүй байна.'})
+        return JsonResponse({'success': False, 'message': 'Тооцоолох хангалттай түүх алга.'})
+    return JsonResponse({
+        'success': True,
+        'due_date': estimate['due_date'].isoformat(),
+        'days': estimate['days'],
+        'steps': estimate['steps'],
+        'queues': estimate['queues'],
+    })
+
+
+@login_required
+@require_GET
+def assignment_suggestions(request):
+    """Least loaded fitting employees for each assignee field of the item type on the order form"""
+    item_type = request.GET.get('item_type')
+    if item_type not in dict(Order.ITEM_TYPE_CHOICES):
+        return JsonResponse({'success': False, 'message': 'Хувцасны төрөл сонгоно уу.'}, status=400)
+    try:
+        due_date = date.fromisoformat(request.GET['due_date']) if request.GET.get('due_date') else None
+        order_id = int(request.GET['order']) if request.GET.get('order') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Хүсэлт буруу байна.'}, status=400)
+
+    order = Order.objects.filter(pk=order_id).first() if order_id else None
+    suggestions = suggest(item_type, due_date, timezone.localdate(), order)
+    return JsonResponse({
+        'success': True,
+        'suggestions': {
+            field: [
+                {
+                    'id': entry['id'], 'name': entry['first_name'], 'active': entry['active'],
+                    'overdue': entry['overdue'],
+                    'rating': round(entry['rating'], 1) if entry['rating'] is not None else None,
+                }
+                for entry in candidates
+            ]
+            for field, candidates in suggestions.items()
+        },
+    })
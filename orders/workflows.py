@@ -0,0 +1,143 @@
+"""Order status workflows per item type.
+
+Every status an order can be in is listed once in ``STATUSES``, in production
+order. An item type's workflow is that list minus the steps it skips (a repair
+needs no cutting or fittings), from ``ORDER_WORKFLOW_SKIPS`` in settings or
+``DEFAULT_SKIPS``. Workflows are compiled once at import into lookup tables,
+so the label, colour, position, progress and next/previous step of a status
+cost one dict lookup per rendered row.
+"""
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+class Status(NamedTuple):
+    code: str
+    label: str
+    color: str
+    description: str
+
+
+STATUSES = [
+    Status('order_placed', 'Захиалга өгсөн', 'bg-blue-100 text-blue-800',
+           'Захиалга амжилттай бүртгэгдлээ'),
+    Status('material_arrived', 'Материал ирсэн', 'bg-blue-100 text-blue-800',
+           'Материал ирж, ажил эхлэхэд бэлэн боллоо'),
+    Status('cutter_cutting', 'Эсгүүрчин эсгэсэн', 'bg-yellow-100 text-yellow-800',
+           'Эсгүүрчин материал эсгэж байна'),
+    Status('customer_first_fitting', 'Үйлчлүүлэгч 1-р хэмжээ өмссөн', 'bg-yellow-100 text-yellow-800',
+           'Үйлчлүүлэгч 1-р хэмжээ хийхээр ирнэ'),
+    Status('tailor_first_completion', 'Эсгүүрчин 1-р хэмжээ миллэсэн', 'bg-gray-100 text-gray-800',
+           'Эсгүүрчин 1-р хэмжээний дараа миллэж байна'),
+    Status('seamstress_second_prep', 'Оёдолчин 2-р хэмжээ бэлдсэн', 'bg-gray-100 text-gray-800',
+           'Оёдолчин 2-р хэмжээнд бэлдэж байна'),
+    Status('customer_second_fitting', 'Үйлчлүүлэгч 2-р хэмжээ өмссөн', 'bg-yellow-100 text-yellow-800',
+           'Үйлчлүүлэгч 2-р хэмжээ хийхээр ирнэ'),
+    Status('tailor_second_completion', 'Эсгүүрчин 2-р хэмжээ миллэсэн', 'bg-gray-100 text-gray-800',
+           'Эсгүүрчин 2-р хэмжээний дараа миллэж байна'),
+    Status('seamstress_finished', 'Оёдолчин оёж дууссан', 'bg-green-100 text-green-800',
+           'Оёдолчин оёж дуусгаж, захиалга бэлэн боллоо'),
+]
+
+STATUS_CHOICES = [(status.code, status.label) for status in STATUSES]
+STATUS_BY_CODE = {status.code: status for status in STATUSES}
+FIRST_STATUS = STATUSES[0].code
+FINAL_STATUS = STATUSES[-1].code
+DEFAULT_COLOR = 'bg-gray-100 text-gray-800'
+
+SECOND_FITTING = ['seamstress_second_prep', 'customer_second_fitting', 'tailor_second_completion']
+FITTINGS = ['customer_first_fitting', 'tailor_first_completion'] + SECOND_FITTING
+
+# item_type -> statuses its orders skip; other item types run every step
+DEFAULT_SKIPS = {
+    'repair': ['material_arrived', 'cutter_cutting'] + FITTINGS,
+    'casual_shirt': SECOND_FITTING,
+    'trousers': SECOND_FITTING,
+    'vest': SECOND_FITTING,
+}
+
+
+class Workflow:
+    """The ordered steps of one item type, with O(1) lookups by status code.
+
+    Orders may hold a status outside their workflow (set before the workflow
+    changed, or by hand in the admin); such a status sorts by its place in
+    ``STATUSES`` and moves on to the next step of the workflow after it.
+    """
+
+    def __init__(self, item_type, codes):
+        self.item_type = item_type
+        self.steps = [STATUS_BY_CODE[code] for code in codes]
+        self.codes = list(codes)
+        self._index = {code: index for index, code in enumerate(self.codes)}
+
+        rank = {status.code: index for index, status in enumerate(STATUSES)}
+        self._next = {}
+        self._previous = {}
+        # Progress of off-workflow statuses: completed steps that come before them
+        self._done = {}
+        for status in STATUSES:
+            later = [code for code in self.codes if rank[code] > rank[status.code]]
+            earlier = [code for code in self.codes if rank[code] < rank[status.code]]
+            self._next[status.code] = later[0] if later else None
+            self._previous[status.code] = earlier[-1] if earlier else None
+            self._done[status.code] = self._index[status.code] + 1 if status.code in self._index else len(earlier)
+
+    def __repr__(self):
+        return f'<Workflow {self.item_type}: {len(self.codes)} steps>'
+
+    def __contains__(self, code):
+        return code in self._index
+
+    def __len__(self):
+        return len(self.codes)
+
+    def index(self, code):
+        """Position of ``code`` in this workflow, or None when it is not one of its steps"""
+        return self._index.get(code)
+
+    def next(self, code):
+        return self._next.get(code)
+
+    def previous(self, code):
+        return self._previous.get(code)
+
+    def progress(self, code):
+        """Percentage of the workflow done once ``code`` is reached"""
+        return int(self._done.get(code, 0) / len(self.codes) * 100)
+
+    def completed_steps(self, code):
+        """Steps up to and including ``code``"""
+        return self.codes[:self._done.get(code, 0)]
+
+
+def compile_workflows(skips):
+    workflows = {}
+    for item_type, skipped in skips.items():
+        unknown = set(skipped) - set(STATUS_BY_CODE)
+        if unknown:
+            raise ImproperlyConfigured(f'ORDER_WORKFLOW_SKIPS[{item_type!r}] has unknown statuses: {sorted(unknown)}')
+        if FIRST_STATUS in skipped or FINAL_STATUS in skipped:
+            raise ImproperlyConfigured(f'ORDER_WORKFLOW_SKIPS[{item_type!r}] cannot skip {FIRST_STATUS} or {FINAL_STATUS}')
+        workflows[item_type] = Workflow(item_type, [status.code for status in STATUSES if status.code not in skipped])
+    return workflows
+
+
+DEFAULT_WORKFLOW = Workflow(None, [status.code for status in STATUSES])
+WORKFLOWS = compile_workflows(getattr(settings, 'ORDER_WORKFLOW_SKIPS', DEFAULT_SKIPS))
+
+
+def workflow_for(item_type):
+    return WORKFLOWS.get(item_type, DEFAULT_WORKFLOW)
+
+
+def status_label(code):
+    status = STATUS_BY_CODE.get(code)
+    return status.label if status else code
+
+
+def status_color(code):
+    status = STATUS_BY_CODE.get(code)
+    return status.color if status else DEFAULT_COLOR
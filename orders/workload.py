@@ -0,0 +1,90 @@
+"""Per-employee workload index shared by due date estimates and assignment suggestions.
+
+One pass of grouped queries counts every employee's unfinished and overdue
+orders per assignee field and averages their ratings. The result is cached
+until a change to one of the ``WORKLOAD_FIELDS`` of an order, employee or
+rating is saved, or one is created or deleted (and per day, since "overdue"
+moves at midnight), so ranking or estimating never queries per employee.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from .workflows import FINAL_STATUS
+
+
+ASSIGNEE_FIELDS = ['assigned_cutter', 'assigned_tailor', 'assigned_trouser_maker']
+
+# Model label -> attributes the index is built from; saving other changes keeps it
+WORKLOAD_FIELDS = {
+    'orders.Order': [f'{field}_id' for field in ASSIGNEE_FIELDS] + ['current_status', 'due_date'],
+    'orders.EmployeeRating': ['employee_id', 'rating'],
+    'employees.Employee': ['is_active', 'employee_type', 'first_name', 'last_name'],
+}
+
+
+def index_key(day):
+    return f'orders:workload:{day.isoformat()}'
+
+
+def build_index():
+    from employees.models import Employee
+    from .models import EmployeeRating, Order
+
+    index = {
+        row['id']: {
+            **row, 'active': 0, 'overdue': 0, 'rating': None, 'ratings': 0,
+            # Assignee field -> unfinished orders held in it
+            'fields': {},
+        }
+        for row in Employee.objects.values('id', 'first_name', 'last_name', 'employee_type', 'is_active')
+    }
+
+    today = timezone.localdate()
+    active = Order.objects.exclude(current_status=FINAL_STATUS).order_by()
+    for field in ASSIGNEE_FIELDS:
+        rows = active.filter(**{f'{field}__isnull': False}).values(field).annotate(
+            count=Count('id'), overdue=Count('id', filter=Q(due_date__lt=today)),
+        ).values_list(field, 'count', 'overdue')
+        for employee_id, count, overdue in rows:
+            entry = index[employee_id]
+            entry['active'] += count
+            entry['overdue'] += overdue
+            entry['fields'][field] = count
+
+    for employee_id, rating, count in EmployeeRating.objects.order_by().values_list('employee').annotate(Avg('rating'), Count('id')):
+        index[employee_id]['rating'] = float(rating)
+        index[employee_id]['ratings'] = count
+    return index
+
+
+def workload_index():
+    """{employee id: {name fields, employee_type, is_active, active, overdue, rating, ratings, fields}}"""
+    key = index_key(timezone.localdate())
+    index = cache.get(key)
+    if index is None:
+        index = build_index()
+        cache.set(key, index, settings.WORKLOAD_CACHE_SECONDS)
+    return index
+
+
+def invalidate_workload():
+    cache.delete(index_key(timezone.localdate()))
+
+
+def workload_values(instance):
+    # Read from __dict__ so a deferred field is not loaded just to be compared
+    return tuple(instance.__dict__.get(attname) for attname in WORKLOAD_FIELDS[instance._meta.label])
+
+
+def remember_workload_values(instance):
+    """Note the values the index was built from, when ``instance`` is loaded or saved"""
+    instance._workload_values = workload_values(instance)
+
+
+def workload_changed(instance, created):
+    """Whether saving ``instance`` changed what the index counts"""
+    if created or instance._state.adding:
+        return True
+    return getattr(instance, '_workload_values', None) != workload_values(instance)
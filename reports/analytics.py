@@ -0,0 +1,210 @@
+"""Time orders spend in each status, from OrderStatusHistory.
+
+Each history row marks the moment an order reached ``status``; it stays there
+until a row with another status follows (a row repeating the status, like the
+"started" and "completed" pair advance_order_status writes, continues the same
+stay). LAG/LEAD windows over ``completed_at`` per order find where each stay
+begins and ends, and every finished stay becomes one ``StatusTransition`` with
+its duration, so the report ranks that narrow indexed table instead of walking
+millions of history rows per request.
+
+The table is refreshed incrementally: orders with history rows newer than the
+last processed id, less a lookback of WATERMARK_LOOKBACK ids, get all their
+transitions recomputed, which also covers backfilled rows with old timestamps.
+The lookback catches a row whose transaction took its id before a refresh but
+committed after it. Edited or deleted history rows are only
+picked up by ``manage.py refresh_status_durations --full``; ``fix_order_data``
+rebuilds the orders it rewrites itself.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Max, Q, Window
+from django.db.models.functions import Lag, Lead
+from django.utils import timezone
+
+from orders.workflows import FINAL_STATUS, STATUSES
+
+from .models import StatusTransition, SystemSettings
+
+
+WATERMARK_KEY = 'status_durations.history_id'
+# History ids below the watermark re-read on each refresh, for rows committed late
+WATERMARK_LOOKBACK = 500
+BATCH_SIZE = 2000
+STATS_CACHE_SECONDS = 600
+STUCK_LIMIT = 50
+
+# Stays ranked with CUME_DIST inside each group; p50/p90 are the shortest
+# stays at or above that rank
+PERCENTILE_SQL = '''
+SELECT {group}, COUNT(*), AVG(seconds),
+       MIN(CASE WHEN position >= 0.5 THEN seconds END),
+       MIN(CASE WHEN position >= 0.9 THEN seconds END)
+FROM (
+    SELECT {group}, seconds, CUME_DIST() OVER (PARTITION BY {group} ORDER BY seconds) AS position
+    FROM {table}
+    WHERE {where}
+) ranked
+GROUP BY {group}
+'''
+
+
+def build_transitions(order_ids):
+    """Unsaved StatusTransitions for the finished stays of these orders"""
+    from orders.models import OrderStatusHistory
+
+    window = {'partition_by': [F('order_id')], 'order_by': [F('completed_at').asc(), F('id').asc()]}
+    rows = OrderStatusHistory.objects.filter(order_id__in=order_ids).annotate(
+        previous_status=Window(Lag('status'), **window),
+        next_status=Window(Lead('status'), **window),
+        left_at=Window(Lead('completed_at'), **window),
+        left_by=Window(Lead('completed_by_id'), **window),
+    ).order_by('order_id', 'completed_at', 'id').values_list(
+        'id', 'order_id', 'order__item_type', 'status', 'completed_at', 'previous_status', 'next_status', 'left_at', 'left_by',
+    )
+
+    transitions = []
+    for history_id, order_id, item_type, status, completed_at, previous_status, next_status, left_at, left_by in rows:
+        if previous_status != status:
+            stay_id, entered_at = history_id, completed_at
+        if next_status is not None and next_status != status:
+            transitions.append(StatusTransition(
+                history_id=stay_id, order_id=order_id, item_type=item_type, status=status, employee_id=left_by,
+                entered_at=entered_at, left_at=left_at,
+                seconds=max(int((left_at - entered_at).total_seconds()), 0),
+            ))
+    return transitions
+
+
+def rebuild_orders(order_ids, replace=True):
+    for start in range(0, len(order_ids), BATCH_SIZE):
+        batch = order_ids[start:start + BATCH_SIZE]
+        if replace:
+            StatusTransition.objects.filter(order_id__in=batch).delete()
+        StatusTransition.objects.bulk_create(build_transitions(batch), batch_size=500)
+
+
+def refresh_transitions(full=False):
+    """Bring StatusTransition up to date with the history; returns the last history id it covers"""
+    from orders.models import OrderStatusHistory
+
+    with transaction.atomic():
+        # The locked watermark row keeps concurrent refreshes from inserting the same transitions
+        watermark, _ = SystemSettings.objects.select_for_update().get_or_create(
+            key=WATERMARK_KEY,
+            defaults={'value': '0', 'description': 'StatusTransition-д тооцоологдсон сүүлийн статусын түүхийн id'},
+        )
+        last = 0 if full else int(watermark.value)
+        latest = OrderStatusHistory.objects.aggregate(latest=Max('id'))['latest'] or 0
+        if latest < last:
+            # The newest rows were deleted and their ids may be handed out again
+            full, last = True, 0
+        if latest == last and not full:
+            return last
+
+        if full:
+            StatusTransition.objects.all().delete()
+        order_ids = list(
+            OrderStatusHistory.objects.filter(id__gt=0 if full else max(last - WATERMARK_LOOKBACK, 0), id__lte=latest)
+            .order_by('order_id').values_list('order_id', flat=True).distinct()
+        )
+        rebuild_orders(order_ids, replace=not full)
+
+        watermark.value = str(latest)
+        watermark.save(update_fields=['value', 'updated_at'])
+    return latest
+
+
+def percentiles(group, since=None):
+    """{group values: (count, average, p50, p90)} of stays, in seconds"""
+    where, params = ['1 = 1'], []
+    if 'employee_id' in group:
+        where.append('employee_id IS NOT NULL')
+    if since is not None:
+        where.append('entered_at >= %s')
+        params.append(connection.ops.adapt_datetimefield_value(since))
+    sql = PERCENTILE_SQL.format(
+        group=group, table=connection.ops.quote_name(StatusTransition._meta.db_table), where=' AND '.join(where),
+    )
+    width = len(group.split(','))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {
+            row[0] if width == 1 else tuple(row[:width]): (row[width], float(row[width + 1]), row[width + 2], row[width + 3])
+            for row in cursor.fetchall()
+        }
+
+
+def duration_stats(days=None):
+    """Per status and per (employee, status) stay distributions, as of the last refresh.
+
+    Only reads StatusTransition: bringing it up to date is left to
+    ``manage.py refresh_status_durations`` (cron), never a request. ``refreshed_at``
+    is when that last found new history, None when it has never run. Cached for
+    STATS_CACHE_SECONDS per refresh, together with the orders stuck past those
+    p90s: a few new stays barely move a percentile, and ranking the whole table
+    and scanning the history of every unfinished order are the expensive parts
+    of the report.
+    """
+    watermark = SystemSettings.objects.filter(key=WATERMARK_KEY).values('value', 'updated_at').first()
+    if watermark is None:
+        return {'statuses': {}, 'employees': {}, 'stuck': (0, []), 'refreshed_at': None}
+    key = f'status_durations:{days}:{watermark["value"]}'
+    stats = cache.get(key)
+    if stats is None:
+        since = timezone.now() - timedelta(days=days) if days else None
+        statuses = percentiles('status', since)
+        stats = {
+            'statuses': statuses,
+            'employees': percentiles('employee_id, status', since),
+            'stuck': find_stuck({code: p90 for code, (_, _, _, p90) in statuses.items()}),
+            'refreshed_at': watermark['updated_at'],
+        }
+        cache.set(key, stats, STATS_CACHE_SECONDS)
+    return stats
+
+
+def find_stuck(p90_by_status, limit=STUCK_LIMIT):
+    """Unfinished orders in their status longer than its p90: (count, [(order id, status, entered_at)]), oldest first"""
+    from orders.models import Order
+
+    now = timezone.now()
+    overdue = Q()
+    for status in STATUSES:
+        if status.code != FINAL_STATUS and p90_by_status.get(status.code):
+            overdue |= Q(current_status=status.code, entered_at__lt=now - timedelta(seconds=p90_by_status[status.code]))
+    if not overdue:
+        return 0, []
+
+    orders = (
+        Order.objects.exclude(current_status=FINAL_STATUS)
+        .annotate(entered_at=Max('status_history__completed_at'))
+        .filter(overdue)
+    )
+    found = list(orders.order_by('entered_at').values_list('pk', 'current_status', 'entered_at')[:limit])
+    count = len(found) if len(found) < limit else orders.count()
+    return count, found
+
+
+def stuck_orders(stats):
+    """The cached stuck orders of ``stats`` as Orders with waiting_seconds and p90_seconds; (count, oldest first)
+
+    Orders that have moved on since the stats were cached are left out.
+    """
+    from orders.models import Order
+
+    count, entries = stats['stuck']
+    now = timezone.now()
+    orders = Order.objects.select_related('customer').in_bulk([order_id for order_id, _, _ in entries])
+    found = []
+    for order_id, status, entered_at in entries:
+        order = orders.get(order_id)
+        if order is None or order.current_status != status:
+            count -= 1
+            continue
+        order.waiting_seconds = int((now - entered_at).total_seconds())
+        order.p90_seconds = stats['statuses'][status][3]
+        found.append(order)
+    return count, found
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_alter_employee_last_name'),
+        ('orders', '0013_designupload'),
+        ('reports', '0002_systemsettings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusTransition',
+            fields=[
+                ('history', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='transition', serialize=False, to='orders.orderstatushistory', verbose_name='Статусын түүх')),
+                ('status', models.CharField(max_length=50, verbose_name='Статус')),
+                ('entered_at', models.DateTimeField(verbose_name='Эхэлсэн')),
+                ('left_at', models.DateTimeField(verbose_name='Дууссан')),
+                ('seconds', models.BigIntegerField(verbose_name='Хугацаа (секунд)')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='employees.employee', verbose_name='Ажилтан')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='orders.order', verbose_name='Захиалга')),
+            ],
+            options={
+                'verbose_name': 'Статусын хугацаа',
+                'verbose_name_plural': 'Статусын хугацаа',
+                'indexes': [models.Index(fields=['status', 'seconds'], name='transition_status_idx'), models.Index(fields=['employee', 'status', 'seconds'], name='transition_employee_idx')],
+            },
+        ),
+    ]
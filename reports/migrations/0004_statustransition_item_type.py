@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:24
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_item_types(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    StatusTransition = apps.get_model('reports', 'StatusTransition')
+    StatusTransition.objects.update(
+        item_type=Subquery(Order.objects.filter(pk=OuterRef('order_id')).values('item_type')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0008_alter_employee_last_name'),
+        ('orders', '0013_designupload'),
+        ('reports', '0003_statustransition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statustransition',
+            name='item_type',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='Хувцасны төрөл'),
+        ),
+        migrations.RunPython(copy_item_types, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='statustransition',
+            index=models.Index(fields=['item_type', 'status', 'seconds'], name='transition_item_type_idx'),
+        ),
+    ]
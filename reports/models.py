@@ -64,4 +64,32 @@ class Report(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.title} ({self.period_start} - {self.period_end})"
\ No newline at end of file
+        return f"{self.title} ({self.period_start} - {self.period_end})"
+
+class StatusTransition(models.Model):
+    """One stay of an order in a status, from its first history row to the next status (reports.analytics)"""
+    history = models.OneToOneField(
+        'orders.OrderStatusHistory', on_delete=models.CASCADE, primary_key=True,
+        related_name='transition', verbose_name="Статусын түүх"
+    )
+    order = models.ForeignKey('orders.Order', on_delete=models.CASCADE, related_name='status_transitions', verbose_name="Захиалга")
+    # Copied from the order so durations can be grouped per item type without a join
+    item_type = models.CharField(max_length=50, blank=True, default='', verbose_name="Хувцасны төрөл")
+    status = models.CharField(max_length=50, verbose_name="Статус")
+    # Whoever recorded the next row, i.e. moved the order on
+    employee = models.ForeignKey('employees.Employee', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Ажилтан")
+    entered_at = models.DateTimeField(verbose_name="Эхэлсэн")
+    left_at = models.DateTimeField(verbose_name="Дууссан")
+    seconds = models.BigIntegerField(verbose_name="Хугацаа (секунд)")
+
+    class Meta:
+        verbose_name = "Статусын хугацаа"
+        verbose_name_plural = "Статусын хугацаа"
+        indexes = [
+            models.Index(fields=['status', 'seconds'], name='transition_status_idx'),
+            models.Index(fields=['employee', 'status', 'seconds'], name='transition_employee_idx'),
+            models.Index(fields=['item_type', 'status', 'seconds'], name='transition_item_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id} - {self.status} ({self.seconds}s)"
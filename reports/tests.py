@@ -1,3 +1,96 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from customers.models import Customer
+from orders.models import Order, OrderStatusHistory
+from .analytics import WATERMARK_KEY, duration_stats, refresh_transitions
+from .models import StatusTransition, SystemSettings
+
+
+class StatusDurationReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        customer = Customer.objects.create(first_name='Бат', last_name='Болд', phone='99001122')
+        today = timezone.now().date()
+        cls.order = Order.objects.create(
+            customer=customer, order_number='ORD-DUR-1', item_type='men_suit', total_amount=100000,
+            start_date=today, due_date=today + timedelta(days=14), current_status='material_arrived',
+        )
+        OrderStatusHistory.objects.create(order=cls.order, status='order_placed', completed_at=timezone.now() - timedelta(hours=5))
+        OrderStatusHistory.objects.create(order=cls.order, status='material_arrived')
+
+    def setUp(self):
+        # Cached stats are keyed on the watermark, which repeats between tests
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_report_does_not_compute_transitions(self):
+        response = self.client.get(reverse('reports:status_durations'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['refreshed_at'])
+        self.assertContains(response, 'refresh_status_durations')
+        self.assertFalse(StatusTransition.objects.exists())
+        self.assertFalse(SystemSettings.objects.filter(key=WATERMARK_KEY).exists())
+
+    def test_report_serves_last_refresh(self):
+        refresh_transitions()
+        stats = duration_stats()
+        self.assertEqual(stats['statuses']['order_placed'][0], 1)
+        self.assertIsNotNone(stats['refreshed_at'])
+
+        # New history waits for the next refresh instead of being computed by the request
+        OrderStatusHistory.objects.create(order=self.order, status='cutter_cutting')
+        response = self.client.get(reverse('reports:status_durations'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StatusTransition.objects.count(), 1)
+
+        refresh_transitions()
+        self.assertIn('material_arrived', duration_stats()['statuses'])
+
+    def create_order(self, number, status, **fields):
+        today = timezone.now().date()
+        return Order.objects.create(
+            customer=self.order.customer, order_number=number, item_type='men_suit', total_amount=100000,
+            start_date=today, due_date=today + timedelta(days=14), current_status=status, **fields,
+        )
+
+    def test_refresh_rereads_rows_committed_below_the_watermark(self):
+        late = self.create_order('ORD-DUR-2', 'material_arrived')
+        OrderStatusHistory.objects.create(order=late, status='order_placed', completed_at=timezone.now() - timedelta(hours=2))
+        latest = OrderStatusHistory.objects.create(order=late, status='material_arrived')
+        # A refresh that ran before these rows committed already moved past their ids
+        SystemSettings.objects.create(key=WATERMARK_KEY, value=str(latest.pk))
+        OrderStatusHistory.objects.create(order=self.order, status='cutter_cutting')
+
+        refresh_transitions()
+
+        self.assertTrue(StatusTransition.objects.filter(order=late, status='order_placed').exists())
+
+    def test_stuck_orders_are_cached_with_the_stats(self):
+        stuck = self.create_order('ORD-DUR-3', 'order_placed')
+        OrderStatusHistory.objects.create(order=stuck, status='order_placed', completed_at=timezone.now() - timedelta(hours=10))
+        refresh_transitions()
+
+        response = self.client.get(reverse('reports:status_durations'), {'period': 'all_time'})
+        self.assertEqual(response.context['stuck_count'], 1)
+        self.assertEqual([order.pk for order in response.context['stuck_orders']], [stuck.pk])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('reports:status_durations'), {'period': 'all_time'})
+        self.assertEqual(response.context['stuck_count'], 1)
+        history_table = OrderStatusHistory._meta.db_table
+        self.assertFalse([query for query in queries.captured_queries if history_table in query['sql']])
 
-# Create your tests here.
+        # An order that moved on drops out before the cache expires
+        Order.objects.filter(pk=stuck.pk).update(current_status='material_arrived')
+        response = self.client.get(reverse('reports:status_durations'), {'period': 'all_time'})
+        self.assertEqual(response.context['stuck_count'], 0)
+        self.assertEqual(response.context['stuck_orders'], [])
@@ -9,4 +9,5 @@ urlpatterns = [
     path('<int:pk>/', views.ReportDetailView.as_view(), name='report_detail'),
     path('<int:pk>/delete/', views.ReportDeleteView.as_view(), name='report_delete'),
     path('employee-workload/', views.show_employee_workload, name='employee_workload'),
+    path('status-durations/', views.status_durations, name='status_durations'),
 ]
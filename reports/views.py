@@ -4,16 +4,22 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, DeleteView
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.db import models
 from django.db.models import Count, Sum, Avg, Q, F, Case, When, Value, ExpressionWrapper
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
+from .analytics import duration_stats, stuck_orders
 from .models import Report
 from .forms import ReportForm
 from orders.models import Order
+from orders.workflows import FINAL_STATUS, STATUSES
 from customers.models import Customer
 from employees.models import Employee
+from tailor_system.db_router import read_from_replica
+from tailor_system.pagination import KeysetPaginationMixin
+from tailor_system.parallel import run_queries
 
 
 class SuperuserRequiredMixin(LoginRequiredMixin):
@@ -25,11 +31,14 @@ class SuperuserRequiredMixin(LoginRequiredMixin):
         return super().dispatch(request, *args, **kwargs)
 
 
-class ReportListView(SuperuserRequiredMixin, ListView):
+@method_decorator(read_from_replica, name='dispatch')
+class ReportListView(SuperuserRequiredMixin, KeysetPaginationMixin, ListView):
     model = Report
     template_name = 'reports/report_list.html'
     context_object_name = 'reports'
     paginate_by = 20
+    # The page shows statistics, not a report count
+    show_count = False
     
     def get_queryset(self):
         queryset = Report.objects.all().order_by('-created_at')
@@ -128,16 +137,6 @@ class ReportListView(SuperuserRequiredMixin, ListView):
         if end_date:
             current_period_orders = current_period_orders.filter(created_at__date__lte=end_date)
         
-        # Total orders
-        total_orders = current_period_orders.count()
-        total_orders_previous = previous_period_orders.count()
-        
-        # Calculate percentage change
-        if total_orders_previous > 0:
-            order_change_percent = ((total_orders - total_orders_previous) / total_orders_previous * 100)
-        else:
-            order_change_percent = 0 if total_orders == 0 else 100
-        
         # Revenue calculations
         decimal_output = models.DecimalField(max_digits=12, decimal_places=2)
         
@@ -159,32 +158,8 @@ class ReportListView(SuperuserRequiredMixin, ListView):
             output_field=decimal_output
         )
         
-        total_revenue = current_period_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
-        total_revenue_previous = previous_period_orders.aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
-        
-        collected_revenue = current_period_orders.aggregate(total=Sum(collected_expression))['total'] or Decimal('0')
-        collected_revenue_previous = previous_period_orders.aggregate(total=Sum(collected_expression))['total'] or Decimal('0')
-        
-        outstanding_revenue = current_period_orders.aggregate(total=Sum(outstanding_expression))['total'] or Decimal('0')
-        
-        if total_revenue_previous > 0:
-            revenue_change_percent = ((total_revenue - total_revenue_previous) / total_revenue_previous * 100)
-        else:
-            revenue_change_percent = 0 if total_revenue == 0 else 100
-        
-        if collected_revenue_previous > 0:
-            collected_change_percent = ((collected_revenue - collected_revenue_previous) / collected_revenue_previous * 100)
-        else:
-            collected_change_percent = 0 if collected_revenue == 0 else 100
-        
-        # Completed orders
-        completed_orders = current_period_orders.filter(current_status='seamstress_finished').count()
-        completion_rate = (completed_orders / total_orders * 100) if total_orders > 0 else 0
-        
-        # Overdue orders
-        overdue_orders = current_period_orders.filter(
-            due_date__lt=today
-        ).exclude(current_status='seamstress_finished').count()
+        def total(queryset, expression):
+            return lambda: queryset.aggregate(total=Sum(expression))['total'] or Decimal('0')
         
         # New customers
         new_customers_current = Customer.objects.all()
@@ -203,79 +178,112 @@ class ReportListView(SuperuserRequiredMixin, ListView):
         if end_date:
             new_customers_current = new_customers_current.filter(created_at__date__lte=end_date)
         
-        new_customers_this_month = new_customers_current.count()
-        new_customers_last_month = new_customers_previous.count()
-        
-        if new_customers_last_month > 0:
-            customers_change_percent = ((new_customers_this_month - new_customers_last_month) / new_customers_last_month * 100)
-        else:
-            customers_change_percent = 0 if new_customers_this_month == 0 else 100
-        
         # Average completion time (in days)
-        completed_orders_with_date = current_period_orders.filter(
-            current_status='seamstress_finished',
-            completed_date__isnull=False,
-            start_date__isnull=False
-        )
-        
-        avg_completion_days = None
-        if completed_orders_with_date.exists():
-            completion_times = []
-            for order in completed_orders_with_date:
-                if order.completed_date and order.start_date:
-                    days = (order.completed_date - order.start_date).days
-                    completion_times.append(days)
-            
-            if completion_times:
-                avg_completion_days = sum(completion_times) / len(completion_times)
+        def average_completion_days():
+            completion_times = [
+                (completed_date - start).days
+                for completed_date, start in current_period_orders.filter(
+                    current_status=FINAL_STATUS,
+                    completed_date__isnull=False,
+                    start_date__isnull=False
+                ).values_list('completed_date', 'start_date')
+            ]
+            return sum(completion_times) / len(completion_times) if completion_times else None
         
         # Employee performance
         employees_with_orders = Employee.objects.filter(is_active=True).annotate(
-            completed_count=Count('tailor_orders', filter=Q(tailor_orders__current_status='seamstress_finished')) +
-                           Count('cutter_orders', filter=Q(cutter_orders__current_status='seamstress_finished')) +
-                           Count('trouser_maker_orders', filter=Q(trouser_maker_orders__current_status='seamstress_finished'))
+            completed_count=Count('tailor_orders', filter=Q(tailor_orders__current_status=FINAL_STATUS)) +
+                           Count('cutter_orders', filter=Q(cutter_orders__current_status=FINAL_STATUS)) +
+                           Count('trouser_maker_orders', filter=Q(trouser_maker_orders__current_status=FINAL_STATUS))
         ).filter(completed_count__gt=0).order_by('-completed_count')[:3]
         
         # Material statistics
-        unique_materials = Order.objects.exclude(
-            material_code__isnull=True
-        ).exclude(material_code='').values('material_code').distinct().count()
+        material_orders = Order.objects.filter(material__isnull=False).order_by().values('material')
+        
+        # Province statistics, grouped in the database instead of queried province by province
+        def province_customers():
+            return dict(
+                new_customers_current.order_by().values('province')
+                .annotate(count=Count('id')).values_list('province', 'count')
+            )
+        
+        def province_orders():
+            return {
+                row['customer__province']: row
+                for row in current_period_orders.order_by().values('customer__province').annotate(
+                    count=Count('id'),
+                    total=Sum('total_amount'),
+                    collected=Sum(collected_expression),
+                    outstanding=Sum(outstanding_expression)
+                )
+            }
+        
+        # The statistics are independent, so they run concurrently instead of one round-trip each
+        stats = run_queries(
+            total_orders=current_period_orders.count,
+            total_orders_previous=previous_period_orders.count,
+            total_revenue=total(current_period_orders, 'total_amount'),
+            total_revenue_previous=total(previous_period_orders, 'total_amount'),
+            collected_revenue=total(current_period_orders, collected_expression),
+            collected_revenue_previous=total(previous_period_orders, collected_expression),
+            outstanding_revenue=total(current_period_orders, outstanding_expression),
+            completed_orders=current_period_orders.filter(current_status=FINAL_STATUS).count,
+            overdue_orders=current_period_orders.filter(
+                due_date__lt=today
+            ).exclude(current_status=FINAL_STATUS).count,
+            new_customers_this_month=new_customers_current.count,
+            new_customers_last_month=new_customers_previous.count,
+            avg_completion_days=average_completion_days,
+            top_employees=lambda: list(employees_with_orders),
+            unique_materials=material_orders.distinct().count,
+            low_usage_materials=material_orders.annotate(count=Count('id')).filter(count__lt=2).count,
+            province_customers=province_customers,
+            province_orders=province_orders,
+        )
+        
+        total_orders = stats['total_orders']
+        total_orders_previous = stats['total_orders_previous']
+        
+        # Calculate percentage change
+        if total_orders_previous > 0:
+            order_change_percent = ((total_orders - total_orders_previous) / total_orders_previous * 100)
+        else:
+            order_change_percent = 0 if total_orders == 0 else 100
+        
+        total_revenue = stats['total_revenue']
+        total_revenue_previous = stats['total_revenue_previous']
+        collected_revenue = stats['collected_revenue']
+        collected_revenue_previous = stats['collected_revenue_previous']
+        
+        if total_revenue_previous > 0:
+            revenue_change_percent = ((total_revenue - total_revenue_previous) / total_revenue_previous * 100)
+        else:
+            revenue_change_percent = 0 if total_revenue == 0 else 100
+        
+        if collected_revenue_previous > 0:
+            collected_change_percent = ((collected_revenue - collected_revenue_previous) / collected_revenue_previous * 100)
+        else:
+            collected_change_percent = 0 if collected_revenue == 0 else 100
+        
+        # Completed orders
+        completed_orders = stats['completed_orders']
+        completion_rate = (completed_orders / total_orders * 100) if total_orders > 0 else 0
+        
+        new_customers_this_month = stats['new_customers_this_month']
+        new_customers_last_month = stats['new_customers_last_month']
+        
+        if new_customers_last_month > 0:
+            customers_change_percent = ((new_customers_this_month - new_customers_last_month) / new_customers_last_month * 100)
+        else:
+            customers_change_percent = 0 if new_customers_this_month == 0 else 100
         
-        low_usage_materials = Order.objects.exclude(
-            material_code__isnull=True
-        ).exclude(material_code='').values('material_code').annotate(
-            count=Count('id')
-        ).filter(count__lt=2).count()
+        avg_completion_days = stats['avg_completion_days']
         
-        # Province statistics
         province_stats = []
         for province_code, province_name in Customer.PROVINCE_CHOICES:
-            province_customers = Customer.objects.filter(province=province_code)
-            if start_date:
-                province_customers = province_customers.filter(created_at__date__gte=start_date)
-            if end_date:
-                province_customers = province_customers.filter(created_at__date__lte=end_date)
-            
-            customer_count = province_customers.count()
-            
-            # Get orders from these customers
-            province_orders = Order.objects.filter(
-                customer__province=province_code
-            )
-            if start_date:
-                province_orders = province_orders.filter(created_at__date__gte=start_date)
-            if end_date:
-                province_orders = province_orders.filter(created_at__date__lte=end_date)
-            
-            order_count = province_orders.count()
-            province_totals = province_orders.aggregate(
-                total=Sum('total_amount'),
-                collected=Sum(collected_expression),
-                outstanding=Sum(outstanding_expression)
-            )
-            province_revenue = province_totals.get('total') or Decimal('0')
-            province_collected = province_totals.get('collected') or Decimal('0')
-            province_outstanding = province_totals.get('outstanding') or Decimal('0')
+            customer_count = stats['province_customers'].get(province_code, 0)
+            province_totals = stats['province_orders'].get(province_code, {})
+            order_count = province_totals.get('count', 0)
             
             if customer_count > 0 or order_count > 0:
                 province_stats.append({
@@ -283,9 +291,9 @@ class ReportListView(SuperuserRequiredMixin, ListView):
                     'code': province_code,
                     'customers': customer_count,
                     'orders': order_count,
-                    'revenue': province_revenue,
-                    'collected': province_collected,
-                    'outstanding': province_outstanding
+                    'revenue': province_totals.get('total') or Decimal('0'),
+                    'collected': province_totals.get('collected') or Decimal('0'),
+                    'outstanding': province_totals.get('outstanding') or Decimal('0')
                 })
         
         # Sort by customers count descending
@@ -304,22 +312,22 @@ class ReportListView(SuperuserRequiredMixin, ListView):
         context['revenue_change_percent'] = revenue_change_percent
         context['collected_revenue'] = collected_revenue
         context['collected_change_percent'] = collected_change_percent
-        context['outstanding_revenue'] = outstanding_revenue
+        context['outstanding_revenue'] = stats['outstanding_revenue']
         
         context['completed_orders'] = completed_orders
         context['completion_rate'] = completion_rate
         
-        context['overdue_orders'] = overdue_orders
+        context['overdue_orders'] = stats['overdue_orders']
         
         context['new_customers_this_month'] = new_customers_this_month
         context['customers_change_percent'] = customers_change_percent
         
         context['avg_completion_days'] = int(avg_completion_days) if avg_completion_days else None
         
-        context['top_employees'] = employees_with_orders
+        context['top_employees'] = stats['top_employees']
         
-        context['unique_materials'] = unique_materials
-        context['low_usage_materials'] = low_usage_materials
+        context['unique_materials'] = stats['unique_materials']
+        context['low_usage_materials'] = stats['low_usage_materials']
         
         context['province_stats'] = province_stats
         
@@ -355,6 +363,7 @@ class ReportDeleteView(SuperuserRequiredMixin, DeleteView):
 
 
 @login_required
+@read_from_replica
 def show_employee_workload(request):
     """Show employee workload report"""
     if not request.user.is_superuser:
@@ -367,17 +376,17 @@ def show_employee_workload(request):
     employee_data = []
     for employee in employees:
         # Get all orders assigned to this employee (as tailor, cutter, or trouser maker)
-        tailor_orders = employee.tailor_orders.exclude(current_status='seamstress_finished')
-        cutter_orders = employee.cutter_orders.exclude(current_status='seamstress_finished')
-        trouser_maker_orders = employee.trouser_maker_orders.exclude(current_status='seamstress_finished')
+        tailor_orders = employee.tailor_orders.exclude(current_status=FINAL_STATUS)
+        cutter_orders = employee.cutter_orders.exclude(current_status=FINAL_STATUS)
+        trouser_maker_orders = employee.trouser_maker_orders.exclude(current_status=FINAL_STATUS)
         
         # Total active orders
         total_active = tailor_orders.count() + cutter_orders.count() + trouser_maker_orders.count()
         
         # Completed orders
-        completed_tailor = employee.tailor_orders.filter(current_status='seamstress_finished').count()
-        completed_cutter = employee.cutter_orders.filter(current_status='seamstress_finished').count()
-        completed_trouser = employee.trouser_maker_orders.filter(current_status='seamstress_finished').count()
+        completed_tailor = employee.tailor_orders.filter(current_status=FINAL_STATUS).count()
+        completed_cutter = employee.cutter_orders.filter(current_status=FINAL_STATUS).count()
+        completed_trouser = employee.trouser_maker_orders.filter(current_status=FINAL_STATUS).count()
         total_completed = completed_tailor + completed_cutter + completed_trouser
         
         # Overdue orders
@@ -429,4 +438,63 @@ def show_employee_workload(request):
         'total_completed_orders': total_completed_orders,
     }
     
-    return render(request, 'reports/employee_workload.html', context)
\ No newline at end of file
+    return render(request, 'reports/employee_workload.html', context)
+
+STATUS_DURATION_PERIODS = {
+    '30': ('Сүүлийн 30 хоног', 30),
+    '90': ('Сүүлийн 90 хоног', 90),
+    '365': ('Сүүлийн 1 жил', 365),
+    'all_time': ('Бүх хугацаа', None),
+}
+
+
+@login_required
+def status_durations(request):
+    """Time orders spend in each status, per employee, and orders stuck longer than usual"""
+    if not request.user.is_superuser:
+        messages.warning(request, 'Та энэ хуудсанд хандах эрхгүй байна.')
+        return redirect('orders:order_list')
+
+    period = request.GET.get('period', '90')
+    if period not in STATUS_DURATION_PERIODS:
+        period = '90'
+    stats = duration_stats(STATUS_DURATION_PERIODS[period][1])
+
+    status_rows = []
+    for status in STATUSES:
+        if status.code in stats['statuses']:
+            count, average, p50, p90 = stats['statuses'][status.code]
+            status_rows.append({'status': status, 'count': count, 'average': average, 'p50': p50, 'p90': p90})
+    longest = max((row['p90'] for row in status_rows), default=0) or 1
+    for row in status_rows:
+        row['p50_width'] = round(row['p50'] / longest * 100)
+        row['p90_width'] = round(row['p90'] / longest * 100)
+    # The step most orders wait longest in
+    bottleneck = max(status_rows, key=lambda row: row['p50'], default=None)
+
+    employees = Employee.objects.in_bulk({employee_id for employee_id, _ in stats['employees']})
+    rank = {status.code: index for index, status in enumerate(STATUSES)}
+    employee_rows = {}
+    for (employee_id, code), (count, average, p50, p90) in sorted(
+        stats['employees'].items(), key=lambda item: rank.get(item[0][1], len(rank))
+    ):
+        if employee_id not in employees or code not in rank:
+            continue
+        row = employee_rows.setdefault(employee_id, {'employee': employees[employee_id], 'steps': [], 'count': 0})
+        row['steps'].append({'status': STATUSES[rank[code]], 'count': count, 'p50': p50, 'p90': p90})
+        row['count'] += count
+
+    stuck_count, stuck = stuck_orders(stats)
+
+    context = {
+        'periods': [(key, label) for key, (label, _) in STATUS_DURATION_PERIODS.items()],
+        'period': period,
+        'status_rows': status_rows,
+        'bottleneck': bottleneck,
+        'employee_rows': sorted(employee_rows.values(), key=lambda row: row['employee'].full_name),
+        'stuck_orders': stuck,
+        'stuck_count': stuck_count,
+        'total_stays': sum(row['count'] for row in status_rows),
+        'refreshed_at': stats['refreshed_at'],
+    }
+    return render(request, 'reports/status_durations.html', context)
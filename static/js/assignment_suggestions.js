@@ -0,0 +1,126 @@
+// Lists the least loaded fitting employees (orders.assignments) under each assignee dropdown
+// for the chosen item type and due date. Picking one selects it; the header button fills every
+// empty dropdown with the first suggestion.
+document.addEventListener('DOMContentLoaded', function () {
+    const form = document.getElementById('orderForm');
+    const autoAssign = document.getElementById('autoAssignButton');
+    if (!form || !form.dataset.suggestionsUrl || !window.fetch) {
+        return;
+    }
+
+    const FIELDS = ['assigned_cutter', 'assigned_tailor', 'assigned_trouser_maker'];
+    const lists = {};
+    let suggestions = {};
+    let generation = 0;
+
+    FIELDS.forEach(function (field) {
+        const select = document.getElementById('id_' + field);
+        if (!select) {
+            return;
+        }
+        const list = document.createElement('div');
+        list.className = 'mt-2 flex flex-wrap gap-1';
+        select.parentNode.insertBefore(list, select.nextSibling);
+        lists[field] = list;
+    });
+
+    function choose(field, id) {
+        const select = document.getElementById('id_' + field);
+        select.value = id;
+        // Lets the due date estimate follow the new assignee
+        select.dispatchEvent(new Event('change'));
+    }
+
+    function describe(candidate) {
+        let text = candidate.name + ' · ' + candidate.active + ' идэвхтэй';
+        if (candidate.overdue) {
+            text += ', ' + candidate.overdue + ' хоцорсон';
+        }
+        if (candidate.rating !== null) {
+            text += ' · ★' + candidate.rating;
+        }
+        return text;
+    }
+
+    function render() {
+        Object.keys(lists).forEach(function (field) {
+            const list = lists[field];
+            list.textContent = '';
+            (suggestions[field] || []).forEach(function (candidate) {
+                const button = document.createElement('button');
+                button.type = 'button';
+                button.className = 'px-2 py-1 text-xs rounded-full bg-green-50 text-green-800 hover:bg-green-100';
+                button.textContent = describe(candidate);
+                button.addEventListener('click', function () {
+                    choose(field, candidate.id);
+                });
+                list.appendChild(button);
+            });
+        });
+        if (autoAssign) {
+            autoAssign.classList.toggle('hidden', !Object.keys(suggestions).some(function (field) {
+                return suggestions[field].length && lists[field];
+            }));
+        }
+    }
+
+    async function load() {
+        const itemType = document.getElementById('id_item_type');
+        const dueDate = document.getElementById('id_due_date');
+        if (!itemType || !itemType.value) {
+            suggestions = {};
+            render();
+            return;
+        }
+        const params = new URLSearchParams({ item_type: itemType.value });
+        if (dueDate && dueDate.value) {
+            params.set('due_date', dueDate.value);
+        }
+        if (form.dataset.orderId) {
+            params.set('order', form.dataset.orderId);
+        }
+
+        const current = ++generation;
+        try {
+            const response = await fetch(form.dataset.suggestionsUrl + '?' + params, { credentials: 'same-origin' });
+            const data = await response.json();
+            if (current === generation && data.success) {
+                suggestions = data.suggestions;
+                render();
+            }
+        } catch (error) {
+            // The dropdowns still work without suggestions
+        }
+    }
+
+    if (autoAssign) {
+        autoAssign.addEventListener('click', function () {
+            const picked = new Set(FIELDS.map(function (field) {
+                const select = document.getElementById('id_' + field);
+                return select ? select.value : '';
+            }).filter(Boolean));
+            Object.keys(suggestions).forEach(function (field) {
+                const select = document.getElementById('id_' + field);
+                if (!select || select.value) {
+                    return;
+                }
+                // Nobody takes two roles on one order
+                const candidate = suggestions[field].find(function (candidate) {
+                    return !picked.has(String(candidate.id));
+                });
+                if (candidate) {
+                    picked.add(String(candidate.id));
+                    choose(field, candidate.id);
+                }
+            });
+        });
+    }
+
+    ['item_type', 'due_date'].forEach(function (field) {
+        const input = document.getElementById('id_' + field);
+        if (input) {
+            input.addEventListener('change', load);
+        }
+    });
+    load();
+});
@@ -0,0 +1,26 @@
+// Dashboard cards: the page shell renders first, each card's fragment is fetched afterwards
+document.addEventListener('DOMContentLoaded', function () {
+    const cards = document.querySelectorAll('[data-card-url]');
+
+    cards.forEach(function (card) {
+        fetch(card.dataset.cardUrl, {
+            credentials: 'same-origin',
+            headers: { 'X-Requested-With': 'XMLHttpRequest' }
+        })
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error('HTTP ' + response.status);
+                }
+                return response.text();
+            })
+            .then(function (html) {
+                card.innerHTML = html;
+                // Render the icons inside the new fragment
+                lucide.createIcons();
+            })
+            .catch(function (error) {
+                console.error('Dashboard card failed:', card.dataset.cardUrl, error);
+                card.innerHTML = '<p class="text-sm text-red-500 p-4">Мэдээлэл ачаалж чадсангүй</p>';
+            });
+    });
+});
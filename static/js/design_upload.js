@@ -0,0 +1,163 @@
+// Design images on the order form are sent in resumable chunks as soon as they are picked
+// (orders.uploads); the form itself then only carries the upload ids. Without fetch or
+// crypto.subtle (sites served over plain HTTP) the file inputs are posted with the form as before.
+document.addEventListener('DOMContentLoaded', function () {
+    const form = document.getElementById('orderForm');
+    if (!form || !form.dataset.uploadUrl || !window.fetch || !(window.crypto && window.crypto.subtle)) {
+        return;
+    }
+
+    const FIELDS = ['design_front', 'design_back', 'design_side', 'design_reference'];
+    const MAX_ATTEMPTS = 6;
+    const csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+    const submitButtons = form.querySelectorAll('button[type=submit]');
+    const pending = new Set();
+
+    function sleep(ms) {
+        return new Promise(function (resolve) { setTimeout(resolve, ms); });
+    }
+
+    async function sha256(file) {
+        const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+        return Array.from(new Uint8Array(digest)).map(function (byte) {
+            return byte.toString(16).padStart(2, '0');
+        }).join('');
+    }
+
+    // Network errors and server errors are retried with backoff; other answers are returned
+    async function send(url, options) {
+        for (let attempt = 1; ; attempt++) {
+            try {
+                const response = await fetch(url, Object.assign({ credentials: 'same-origin' }, options, {
+                    headers: Object.assign({ 'X-CSRFToken': csrfToken }, options.headers || {}),
+                }));
+                if (response.status < 500) {
+                    return response;
+                }
+            } catch (error) {
+                // Connection lost; try again
+            }
+            if (attempt >= MAX_ATTEMPTS) {
+                throw new Error('Сүлжээний алдаа.');
+            }
+            await sleep(Math.min(1000 * 2 ** attempt, 15000));
+        }
+    }
+
+    async function upload(file, onProgress) {
+        const checksum = await sha256(file);
+        // The same file picked again (even after a reload) continues where it stopped
+        const resumeKey = 'design-upload:' + checksum;
+        let id = localStorage.getItem(resumeKey);
+        let offset = 0;
+        let chunkSize = 0;
+
+        if (id) {
+            const response = await send(form.dataset.uploadUrl + id + '/', { method: 'GET' });
+            if (response.ok) {
+                const data = await response.json();
+                offset = data.offset;
+                chunkSize = data.chunk_size;
+            } else {
+                id = null;
+            }
+        }
+        if (!id) {
+            const body = new URLSearchParams({ filename: file.name, size: file.size, checksum: checksum });
+            const response = await send(form.dataset.uploadUrl, { method: 'POST', body: body });
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.message);
+            }
+            id = data.id;
+            chunkSize = data.chunk_size;
+            localStorage.setItem(resumeKey, id);
+        }
+
+        const base = form.dataset.uploadUrl + id + '/';
+        while (offset < file.size) {
+            onProgress(offset / file.size);
+            const response = await send(base + 'append/?offset=' + offset, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: file.slice(offset, offset + chunkSize),
+            });
+            const data = await response.json();
+            // 409 means the server has a different offset; continue from there
+            if (!response.ok && !(response.status === 409 && data.offset !== undefined)) {
+                throw new Error(data.message);
+            }
+            offset = data.offset;
+        }
+        onProgress(1);
+
+        const response = await send(base + 'complete/', { method: 'POST' });
+        const data = await response.json();
+        localStorage.removeItem(resumeKey);
+        if (!response.ok) {
+            throw new Error(data.message);
+        }
+        return id;
+    }
+
+    function updateSubmit() {
+        submitButtons.forEach(function (button) {
+            button.disabled = pending.size > 0;
+            button.classList.toggle('opacity-50', pending.size > 0);
+        });
+    }
+
+    FIELDS.forEach(function (field) {
+        const input = document.getElementById('id_' + field);
+        const hidden = document.getElementById('id_' + field + '_upload');
+        const area = document.getElementById(field.replace('design_', '') + '-upload-area');
+        if (!input || !hidden || !area) {
+            return;
+        }
+        const status = document.createElement('p');
+        status.className = 'mt-1 text-xs text-gray-500';
+        area.parentNode.insertBefore(status, area.nextSibling);
+        if (hidden.value) {
+            // Form shown again after a validation error; the image is on the server already
+            status.textContent = 'Зураг илгээгдсэн.';
+        }
+
+        let generation = 0;
+        input.addEventListener('change', function () {
+            const file = input.files[0];
+            const current = ++generation;
+            hidden.value = '';
+            status.textContent = '';
+            if (!file) {
+                pending.delete(field);
+                updateSubmit();
+                return;
+            }
+
+            pending.add(field);
+            updateSubmit();
+            upload(file, function (fraction) {
+                if (current === generation) {
+                    status.textContent = 'Илгээж байна... ' + Math.round(fraction * 100) + '%';
+                }
+            }).then(function (id) {
+                if (current !== generation) {
+                    return;
+                }
+                hidden.value = id;
+                // Already on the server; do not send it again with the form
+                input.value = '';
+                status.textContent = 'Зураг илгээгдлээ.';
+            }).catch(function (error) {
+                if (current === generation) {
+                    status.textContent = error.message + ' Зураг захиалгатай хамт илгээгдэнэ.';
+                }
+            }).finally(function () {
+                if (current === generation) {
+                    pending.delete(field);
+                    updateSubmit();
+                }
+            });
+        });
+    });
+});
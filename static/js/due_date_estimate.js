@@ -0,0 +1,86 @@
+// Asks the server for a due date (orders.estimates) whenever the item type, start date or
+// assignees change. New orders take the suggestion until the due date is edited by hand;
+// on existing orders it is only offered.
+document.addEventListener('DOMContentLoaded', function () {
+    const form = document.getElementById('orderForm');
+    const dueDate = document.getElementById('id_due_date');
+    const hint = document.getElementById('dueDateHint');
+    if (!form || !form.dataset.estimateUrl || !dueDate || !hint || !window.fetch) {
+        return;
+    }
+
+    const FIELDS = ['item_type', 'start_date', 'assigned_cutter', 'assigned_tailor', 'assigned_trouser_maker'];
+    const isNew = !form.dataset.orderId;
+    let editedByHand = !isNew;
+    let generation = 0;
+
+    dueDate.addEventListener('input', function () {
+        editedByHand = true;
+    });
+
+    function describe(data) {
+        const parts = [data.days + ' хоног'];
+        Object.values(data.queues).forEach(function (queue) {
+            if (queue.factor > 1) {
+                parts.push(queue.label + ' ' + queue.active_orders + ' идэвхтэй захиалгатай (дундаж ' + queue.average + ')');
+            }
+        });
+        return 'Тооцоолсон: ' + parts.join(', ');
+    }
+
+    function showSuggestion(data) {
+        hint.textContent = describe(data) + ' ';
+        if (dueDate.value === data.due_date) {
+            return;
+        }
+        if (!editedByHand) {
+            dueDate.value = data.due_date;
+            return;
+        }
+        const apply = document.createElement('button');
+        apply.type = 'button';
+        apply.className = 'text-blue-600 hover:text-blue-800 font-medium';
+        apply.textContent = data.due_date + ' болгох';
+        apply.addEventListener('click', function () {
+            dueDate.value = data.due_date;
+            apply.remove();
+        });
+        hint.appendChild(apply);
+    }
+
+    async function estimate() {
+        const params = new URLSearchParams();
+        FIELDS.forEach(function (field) {
+            const input = document.getElementById('id_' + field);
+            if (input && input.value) {
+                params.set(field, input.value);
+            }
+        });
+        if (!params.get('item_type')) {
+            return;
+        }
+        if (form.dataset.orderId) {
+            params.set('order', form.dataset.orderId);
+        }
+
+        const current = ++generation;
+        try {
+            const response = await fetch(form.dataset.estimateUrl + '?' + params, { credentials: 'same-origin' });
+            const data = await response.json();
+            // A later change may have been answered first
+            if (current === generation && data.success) {
+                showSuggestion(data);
+            }
+        } catch (error) {
+            // Keep the default due date
+        }
+    }
+
+    FIELDS.forEach(function (field) {
+        const input = document.getElementById('id_' + field);
+        if (input) {
+            input.addEventListener('change', estimate);
+        }
+    });
+    estimate();
+});
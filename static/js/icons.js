@@ -0,0 +1,44 @@
+// Drop-in for lucide.createIcons() using the icon subset in vendor/lucide-icons.js (built by `manage.py build_assets`)
+(function () {
+    const SVG_NS = 'http://www.w3.org/2000/svg';
+    const DEFAULT_ATTRIBUTES = {
+        xmlns: SVG_NS,
+        width: '24',
+        height: '24',
+        viewBox: '0 0 24 24',
+        fill: 'none',
+        stroke: 'currentColor',
+        'stroke-width': '2',
+        'stroke-linecap': 'round',
+        'stroke-linejoin': 'round'
+    };
+
+    function createIcons() {
+        const icons = window.LUCIDE_ICONS || {};
+
+        document.querySelectorAll('[data-lucide]').forEach(function (element) {
+            // Rendered icons keep data-lucide, so changing it and calling createIcons() again swaps the icon
+            const name = element.getAttribute('data-lucide');
+            if (!(name in icons)) {
+                console.warn('Icon not in the vendored subset:', name);
+                return;
+            }
+
+            const svg = document.createElementNS(SVG_NS, 'svg');
+            Object.keys(DEFAULT_ATTRIBUTES).forEach(function (key) {
+                svg.setAttribute(key, DEFAULT_ATTRIBUTES[key]);
+            });
+            Array.from(element.attributes).forEach(function (attribute) {
+                svg.setAttribute(attribute.name, attribute.value);
+            });
+            const classes = (element.getAttribute('class') || '').split(/\s+/).filter(function (className) {
+                return className && className !== 'lucide' && className.indexOf('lucide-') !== 0;
+            });
+            svg.setAttribute('class', ['lucide', 'lucide-' + name].concat(classes).join(' '));
+            svg.innerHTML = icons[name];
+            element.replaceWith(svg);
+        });
+    }
+
+    window.lucide = { createIcons: createIcons };
+})();
@@ -0,0 +1,34 @@
+// Live order status: rows on the page follow the Server-Sent Events feed of status changes
+document.addEventListener('DOMContentLoaded', function () {
+    const root = document.querySelector('[data-order-events-url]');
+    if (!root || !window.EventSource) {
+        return;
+    }
+
+    const BADGE_CLASSES = 'px-2 py-1 text-xs rounded-full font-medium ';
+
+    // Events after the newest row the page was rendered with; EventSource reconnects by
+    // itself and then resends the last event id it received, which takes precedence
+    let url = root.dataset.orderEventsUrl;
+    if (root.dataset.orderEventsAfter) {
+        url += (url.indexOf('?') === -1 ? '?' : '&') + 'after=' + encodeURIComponent(root.dataset.orderEventsAfter);
+    }
+    const source = new EventSource(url);
+
+    source.addEventListener('status', function (message) {
+        const event = JSON.parse(message.data);
+
+        document.querySelectorAll('[data-order-status="' + event.order_id + '"]').forEach(function (element) {
+            element.textContent = event.current_status_display;
+            if (element.hasAttribute('data-status-badge')) {
+                element.className = BADGE_CLASSES + event.status_color;
+            }
+        });
+        document.querySelectorAll('[data-order-progress-bar="' + event.order_id + '"]').forEach(function (element) {
+            element.style.width = event.progress + '%';
+        });
+        document.querySelectorAll('[data-order-progress="' + event.order_id + '"]').forEach(function (element) {
+            element.textContent = event.progress + '%';
+        });
+    });
+});
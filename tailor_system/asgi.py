@@ -14,3 +14,13 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tailor_system.settings')
 
 application = get_asgi_application()
+
+# Each ASGI request runs in its own thread; pool connections so they outlive it
+from tailor_system.db_pool import pool  # noqa: E402
+
+pool.install()
+
+# Compile templates before the first request reaches this worker
+from tailor_system.startup import warm_up  # noqa: E402
+
+warm_up()
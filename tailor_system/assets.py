@@ -0,0 +1,46 @@
+"""The self-hosted front-end build (``manage.py build_assets``) and whether it is there.
+
+``static/vendor/`` is gitignored and produced at deploy time. Until it exists
+(and, with manifest storage, has been collected) templates link the pinned CDN
+builds instead, so a fresh checkout still renders styled pages with icons.
+"""
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+
+
+# Files written by ``manage.py build_assets`` that the page templates link to
+VENDOR_ASSETS = (
+    'vendor/fonts/fonts.css',
+    'vendor/css/app.css',
+    'vendor/css/landing.css',
+    'vendor/css/login.css',
+    'vendor/lucide-icons.js',
+)
+
+# How to produce them, see README "Frontend assets"
+BUILD_STEPS = 'run "npm install" in frontend/, then "python manage.py build_assets"'
+
+
+def missing_sources():
+    """Vendor assets not found by the staticfiles finders, i.e. not built yet"""
+    return [path for path in VENDOR_ASSETS if not finders.find(path)]
+
+
+def missing_collected():
+    """Vendor assets without an entry in the staticfiles manifest (empty without manifest storage)"""
+    if not isinstance(staticfiles_storage, ManifestFilesMixin):
+        return []
+    missing = []
+    for path in VENDOR_ASSETS:
+        try:
+            staticfiles_storage.stored_name(path)
+        except ValueError:
+            missing.append(path)
+    return missing
+
+
+def vendor_assets_built():
+    """Whether pages can link the vendor build rather than the CDN fallback"""
+    if isinstance(staticfiles_storage, ManifestFilesMixin):
+        return not missing_collected()
+    return not missing_sources()
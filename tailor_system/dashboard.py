@@ -0,0 +1,119 @@
+"""Dashboard cards, each loaded by the browser as its own HTML fragment.
+
+A card is a function building independent ORM callables (run concurrently by
+``gather_queries``) plus an optional step turning their results into the
+template context. Rendered fragments are cached for
+``DASHBOARD_CARD_CACHE_SECONDS[name]`` seconds.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from customers.models import Customer
+from employees.models import Employee
+from materials.models import Material
+from orders.models import Order
+from orders.workflows import FINAL_STATUS
+
+
+def revenue(queryset):
+    return lambda: queryset.aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
+
+
+def month_bounds(today):
+    month_start = today.replace(day=1)
+    if month_start.month == 1:
+        prev_month_start = month_start.replace(year=month_start.year - 1, month=12)
+    else:
+        prev_month_start = month_start.replace(month=month_start.month - 1)
+    return month_start, prev_month_start
+
+
+def counts_queries(today):
+    return {
+        'total_orders': Order.objects.count,
+        'active_orders': Order.objects.exclude(current_status=FINAL_STATUS).count,
+        'completed_orders': Order.objects.filter(current_status=FINAL_STATUS).count,
+        'overdue_orders': Order.objects.filter(due_date__lt=today).exclude(current_status=FINAL_STATUS).count,
+    }
+
+
+def counts_context(stats):
+    return {
+        **stats,
+        'total_change_percent': 8,  # Hardcoded for now, can be calculated from historical data
+        'completed_change_percent': 14,  # Hardcoded for now
+    }
+
+
+def revenue_queries(today):
+    month_start, prev_month_start = month_bounds(today)
+    finished_orders = Order.objects.filter(current_status=FINAL_STATUS)
+    return {
+        'total_revenue': revenue(finished_orders),
+        'current_month_revenue': revenue(finished_orders.filter(completed_date__gte=month_start)),
+        'prev_month_revenue': revenue(finished_orders.filter(completed_date__gte=prev_month_start, completed_date__lt=month_start)),
+    }
+
+
+def revenue_context(stats):
+    current_month_revenue = stats['current_month_revenue']
+    prev_month_revenue = stats['prev_month_revenue']
+    if prev_month_revenue > 0:
+        revenue_change_percent = ((current_month_revenue - prev_month_revenue) / prev_month_revenue * 100)
+    else:
+        revenue_change_percent = 0 if current_month_revenue == 0 else 100
+    return {**stats, 'revenue_change_percent': revenue_change_percent}
+
+
+def customers_queries(today):
+    month_start, _ = month_bounds(today)
+    # Active customers have at least one order in the last 3 months
+    three_months_ago = today - timedelta(days=90)
+    return {
+        'total_customers': Customer.objects.count,
+        'active_customers': Customer.objects.filter(order__created_at__gte=three_months_ago).distinct().count,
+        'new_customers_this_month': Customer.objects.filter(created_at__gte=month_start).count,
+        'total_employees': Employee.objects.filter(is_active=True).count,
+    }
+
+
+def materials_queries(today):
+    return {
+        'total_materials': Material.objects.count,
+        'low_stock_materials': Material.objects.low_stock().count,
+    }
+
+
+def recent_orders_queries(today):
+    return {
+        'recent_orders': lambda: list(Order.objects.select_related('customer').order_by('-created_at')[:12]),
+    }
+
+
+def recent_orders_context(stats):
+    # Sort in Python to prioritize overdue orders
+    stats['recent_orders'].sort(key=lambda x: (not x.is_overdue, x.created_at), reverse=True)
+    return stats
+
+
+# name -> (queries, context builder)
+CARDS = {
+    'counts': (counts_queries, counts_context),
+    'revenue': (revenue_queries, revenue_context),
+    'customers': (customers_queries, None),
+    'materials': (materials_queries, None),
+    'recent_orders': (recent_orders_queries, recent_orders_context),
+}
+
+
+def card_queries(name):
+    queries, _ = CARDS[name]
+    return queries(timezone.now().date())
+
+
+def card_context(name, stats):
+    _, build = CARDS[name]
+    return build(stats) if build else stats
@@ -0,0 +1,89 @@
+"""Database connection reuse for the ASGI entry point.
+
+Under ASGI every request runs its sync code in a fresh thread, so Django's
+thread-local persistent connections (CONN_MAX_AGE) are never reused: each
+request opens a new connection and abandons it when the thread ends. This
+pool hands an already connected ``DatabaseWrapper`` to the request thread on
+``request_started`` and takes it back on ``request_finished``. CONN_MAX_AGE and
+CONN_HEALTH_CHECKS still decide when a pooled connection is dropped.
+"""
+import threading
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+
+class ConnectionPool:
+    """Idle database wrappers per alias, shared between request threads"""
+
+    def __init__(self, size=None):
+        self.size = size if size is not None else getattr(settings, 'ASGI_DB_POOL_SIZE', 10)
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def acquire(self, **kwargs):
+        """Install a pooled wrapper as this thread's connection for every alias"""
+        checked_out = {}
+        for alias in connections:
+            with self._lock:
+                idle = self._idle.setdefault(alias, [])
+                wrapper = idle.pop() if idle else None
+            if wrapper is None:
+                wrapper = connections.create_connection(alias)
+            # Wrappers refuse to run outside the thread that created them unless sharing is on
+            wrapper.inc_thread_sharing()
+            # Drops the connection if it errored or outlived CONN_MAX_AGE and re-arms the health check
+            wrapper.close_if_unusable_or_obsolete()
+            connections[alias] = wrapper
+            checked_out[alias] = wrapper
+        self._local.checked_out = checked_out
+
+    def release(self, **kwargs):
+        """Return this thread's wrappers to the pool, closing the ones that cannot be reused"""
+        checked_out = getattr(self._local, 'checked_out', None)
+        if not checked_out:
+            return
+        self._local.checked_out = None
+        for alias, wrapper in checked_out.items():
+            del connections[alias]
+            if wrapper.in_atomic_block:
+                wrapper.close()
+            else:
+                wrapper.close_if_unusable_or_obsolete()
+            with self._lock:
+                idle = self._idle.setdefault(alias, [])
+                keep = wrapper.connection is not None and len(idle) < self.size
+                if keep:
+                    wrapper.dec_thread_sharing()
+                    idle.append(wrapper)
+            if not keep:
+                wrapper.close()
+                wrapper.dec_thread_sharing()
+
+    def install(self):
+        # Connected after django.db's close_old_connections, so it runs second on both signals
+        request_started.connect(self.acquire, dispatch_uid='tailor_system.db_pool.acquire')
+        request_finished.connect(self.release, dispatch_uid='tailor_system.db_pool.release')
+
+    def uninstall(self):
+        request_started.disconnect(dispatch_uid='tailor_system.db_pool.acquire')
+        request_finished.disconnect(dispatch_uid='tailor_system.db_pool.release')
+        self.close_all()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for wrappers in idle.values():
+            for wrapper in wrappers:
+                wrapper.inc_thread_sharing()
+                wrapper.close()
+                wrapper.dec_thread_sharing()
+
+    def idle_count(self, alias='default'):
+        with self._lock:
+            return len(self._idle.get(alias, []))
+
+
+pool = ConnectionPool()
@@ -0,0 +1,90 @@
+"""Send reads of the heavy analytic pages to a read replica.
+
+Views opt in with ``read_from_replica``; everything else, and every write,
+keeps using the primary. After a POST the session is pinned to the primary
+for READ_REPLICA_STICKY_SECONDS so users see their own changes even if the
+replica lags behind.
+"""
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+
+
+STICKY_SESSION_KEY = '_db_primary_until'
+
+# Session and auth data must never be read stale, or a fresh login could be lost
+PRIMARY_ONLY_APPS = {'sessions', 'auth', 'contenttypes'}
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_alias():
+    """Configured replica alias, or None when no replica database is set up"""
+    alias = getattr(settings, 'READ_REPLICA_ALIAS', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def pin_to_primary(request):
+    """Make the next few requests of this session read from the primary"""
+    if replica_alias() and hasattr(request, 'session'):
+        request.session[STICKY_SESSION_KEY] = time.time() + getattr(settings, 'READ_REPLICA_STICKY_SECONDS', 10)
+
+
+def is_pinned(request):
+    until = request.session.get(STICKY_SESSION_KEY) if hasattr(request, 'session') else None
+    return until is not None and until > time.time()
+
+
+def read_from_replica(view_func):
+    """Run a read-only view, sync or async, with its queries routed to the replica"""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            # Reading the session may hit the database
+            if request.method not in ('GET', 'HEAD') or not replica_alias() or await sync_to_async(is_pinned)(request):
+                return await view_func(request, *args, **kwargs)
+            token = _replica_reads.set(True)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not replica_alias() or is_pinned(request):
+            return view_func(request, *args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    """Route reads to the replica while a ``read_from_replica`` view is running"""
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same rows, so objects loaded from either may be related
+        databases = {'default', replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication
+        if db == replica_alias():
+            return False
+        return None
@@ -0,0 +1,151 @@
+"""Serve uploaded media (order design images) to signed-in users only.
+
+Only the design images and their variants under ``SERVED_PREFIXES`` are served;
+anything else that ends up in MEDIA_ROOT is a 404.
+
+After the permission check the file itself is usually sent by the web server
+in front of Django, so a large image never occupies a Python worker:
+
+- ``MEDIA_ACCEL=nginx``: ``X-Accel-Redirect`` to the ``internal`` location at
+  ``MEDIA_ACCEL_PREFIX``;
+- ``MEDIA_ACCEL=sendfile``: ``X-Sendfile`` with the file's path (Apache
+  mod_xsendfile, lighttpd);
+- unset: a ``FileResponse`` with single-range support. WSGI servers with a
+  ``wsgi.file_wrapper`` (gunicorn) send it with ``os.sendfile``.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+# Directories under MEDIA_ROOT users may read; everything else stays private
+SERVED_PREFIXES = ('order_designs/',)
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Content-addressed files (tailor_system.storage.ContentAddressedStorage) never change
+IMMUTABLE_PREFIX = 'order_designs/blobs/'
+IMMUTABLE_SECONDS = 365 * 24 * 60 * 60
+SHORT_SECONDS = 300
+
+
+class FileRange:
+    """Read at most ``length`` bytes of ``file`` from its current position.
+
+    ``fileno`` is kept so servers can still use ``os.sendfile``; they stop at
+    the response's Content-Length.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def byte_range(header, size):
+    """(start, end) of a single ``Range: bytes=`` request; None to send the whole
+    file, ValueError when the range lies outside it"""
+    match = RANGE.match(header.strip()) if header else None
+    if match is None:
+        # Absent, malformed or multiple ranges: answer with the full file
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def file_response(request, fullpath, stat, content_type):
+    size = stat.st_size
+    requested = None
+    if_range = request.headers.get('If-Range')
+    # A range of an older version is useless; If-Range falls back to the full file then
+    if not if_range or parse_http_date_safe(if_range) == int(stat.st_mtime):
+        try:
+            requested = byte_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = open(fullpath, 'rb')
+    if requested is None:
+        return FileResponse(file, content_type=content_type)
+    start, end = requested
+    file.seek(start)
+    response = FileResponse(FileRange(file, end - start + 1), status=206, content_type=content_type)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+@require_safe
+@login_required
+def serve_media(request, path):
+    if not posixpath.normpath(path).startswith(SERVED_PREFIXES):
+        raise Http404
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(fullpath)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    if if_modified_since is not None and int(stat.st_mtime) <= if_modified_since:
+        response = HttpResponseNotModified()
+    else:
+        content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+        accel = settings.MEDIA_ACCEL
+        if accel == 'nginx':
+            # nginx serves the internal location itself, ranges included
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(path)
+        elif accel == 'sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = fullpath
+        else:
+            response = file_response(request, fullpath, stat, content_type)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    # Browsers may keep images, but shared caches must not (the view requires a login)
+    if path.startswith(IMMUTABLE_PREFIX):
+        patch_cache_control(response, private=True, max_age=IMMUTABLE_SECONDS, immutable=True)
+    else:
+        patch_cache_control(response, private=True, max_age=SHORT_SECONDS)
+    return response
@@ -0,0 +1,121 @@
+"""In-process request metrics shared by the instrumentation middleware and the metrics page"""
+import math
+import re
+import threading
+from collections import Counter, deque
+
+from django.conf import settings
+
+
+# Latency histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500]
+BUCKET_LABELS = [f'≤{bound}ms' for bound in LATENCY_BUCKETS] + [f'>{LATENCY_BUCKETS[-1]}ms']
+
+_NUMBER = re.compile(r'\b\d+\b')
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_QUOTED = re.compile(r"'(?:[^']|'')*'")
+
+
+def fingerprint(sql):
+    """Normalize a SQL statement so queries differing only in literals compare equal"""
+    sql = _QUOTED.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _NUMBER.sub('?', sql)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0
+    index = max(0, math.ceil(fraction * len(values)) - 1)
+    return values[index]
+
+
+class RequestMetrics:
+    """Rolling per-URL-name window of request timings plus named counters"""
+
+    def __init__(self, window=None):
+        self.window = window or getattr(settings, 'REQUEST_METRICS_WINDOW', 500)
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._duplicates = {}
+        self._counters = Counter()
+
+    def record(self, url_name, total_ms, sql_count, sql_ms, duplicates):
+        with self._lock:
+            samples = self._samples.get(url_name)
+            if samples is None:
+                samples = self._samples[url_name] = deque(maxlen=self.window)
+                self._duplicates[url_name] = Counter()
+            samples.append((total_ms, sql_count, sql_ms))
+            dup_counter = self._duplicates[url_name]
+            dup_counter.update(dict(duplicates))
+            if len(dup_counter) > 50:
+                self._duplicates[url_name] = Counter(dict(dup_counter.most_common(20)))
+
+    def increment(self, name, amount=1):
+        """Bump a named counter shown on the metrics page (cache hits, etc.)"""
+        with self._lock:
+            self._counters[name] += amount
+
+    def counters(self):
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def hit_ratios(self):
+        """Cache hit percentage for every counter pair named ``<prefix>.hit`` / ``<prefix>.miss``"""
+        counters = self.counters()
+        ratios = {}
+        for name, hits in counters.items():
+            if name.endswith('.hit'):
+                prefix = name[:-len('.hit')]
+                total = hits + counters.get(f'{prefix}.miss', 0)
+                ratios[prefix] = round(hits / total * 100, 1)
+        for name in counters:
+            # Only misses so far
+            if name.endswith('.miss') and name[:-len('.miss')] not in ratios:
+                ratios[name[:-len('.miss')]] = 0.0
+        return dict(sorted(ratios.items()))
+
+    def summary(self):
+        """Per-URL-name statistics for the metrics page, slowest p90 first"""
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+            duplicates = {name: counter.most_common(3) for name, counter in self._duplicates.items()}
+
+        rows = []
+        for url_name, samples in snapshot.items():
+            latencies = sorted(sample[0] for sample in samples)
+            buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+            for latency in latencies:
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if latency <= bound:
+                        buckets[i] += 1
+                        break
+                else:
+                    buckets[-1] += 1
+            count = len(samples)
+            rows.append({
+                'url_name': url_name,
+                'count': count,
+                'p50': percentile(latencies, 0.5),
+                'p90': percentile(latencies, 0.9),
+                'p99': percentile(latencies, 0.99),
+                'max': latencies[-1],
+                'avg_queries': sum(sample[1] for sample in samples) / count,
+                'max_queries': max(sample[1] for sample in samples),
+                'avg_sql_ms': sum(sample[2] for sample in samples) / count,
+                'histogram': list(zip(BUCKET_LABELS, buckets)),
+                'duplicates': duplicates.get(url_name, []),
+            })
+        rows.sort(key=lambda row: row['p90'], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._duplicates.clear()
+            self._counters.clear()
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,271 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Node, TokenType
+
+from .db_router import pin_to_primary
+from .metrics import fingerprint, request_metrics
+
+
+logger = logging.getLogger('tailor_system.requests')
+nplusone_logger = logging.getLogger('tailor_system.nplusone')
+
+# Active collectors, innermost last; copied into worker threads by asgiref and tailor_system.parallel
+_current_collectors = ContextVar('query_collectors', default=())
+
+
+def collect_queries(execute, sql, params, many, context):
+    """Permanent ``execute_wrapper`` forwarding to every active collector, if any"""
+    for collector in _current_collectors.get():
+        execute = partial(collector, execute)
+    return execute(sql, params, many, context)
+
+
+def install_query_hook(connection, **kwargs):
+    # Kept first so execute_wrapper() blocks opened around a reconnect still pop their own wrapper
+    if collect_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, collect_queries)
+
+
+# Every new connection in any thread (ASGI request threads, query workers) gets the hook
+connection_created.connect(install_query_hook, dispatch_uid='tailor_system.middleware.install_query_hook')
+
+
+@contextmanager
+def capture_queries(threshold=None):
+    """Collect the queries run in this context, including worker threads it fans out to"""
+    # Connections opened before this module was loaded never saw connection_created
+    for connection in connections.all(initialized_only=True):
+        install_query_hook(connection)
+    collector = QueryCollector(threshold)
+    token = _current_collectors.set(_current_collectors.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _current_collectors.reset(token)
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class NPlusOneError(Exception):
+    """Raised in NPLUSONE_MODE='raise' when a request repeats a query past the threshold"""
+
+
+def query_origin():
+    """Innermost template tag and project source line on the current call stack"""
+    template = code = None
+    frame = sys._getframe(1)
+    while frame is not None and not (template and code):
+        filename = frame.f_code.co_filename
+        if template is None and frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            if isinstance(node, Node) and token is not None:
+                wrap = '{{ %s }}' if token.token_type == TokenType.VAR else '{%% %s %%}'
+                template = f'{node.origin.template_name}:{token.lineno} {wrap % token.contents}'
+        elif (code is None and filename.startswith(str(settings.BASE_DIR))
+                and 'site-packages' not in filename and filename != __file__):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            code = f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return {'template': template, 'code': code}
+
+
+class QueryCollector:
+    """Counts and times every SQL statement of one request, from any thread"""
+
+    def __init__(self, threshold=None):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        # N+1 detection: fingerprints repeated more than ``threshold`` times
+        self.threshold = threshold
+        self.fingerprints = {}
+        self.repeats = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+                # Counting raw SQL is cheap; fingerprints are computed once per distinct statement
+                self.statements[sql] += 1
+                if self.threshold is not None:
+                    self.check_repeat(sql)
+
+    def fingerprint(self, sql):
+        cached = self.fingerprints.get(sql)
+        if cached is None:
+            cached = self.fingerprints[sql] = fingerprint(sql)
+        return cached
+
+    def check_repeat(self, sql):
+        key = self.fingerprint(sql)
+        self.repeats[key] += 1
+        # Walk the stack only once per fingerprint, when it first crosses the threshold
+        if self.repeats[key] == self.threshold + 1:
+            self.origins[key] = query_origin()
+
+    def duplicates(self, limit=3):
+        """Most repeated query fingerprints as (fingerprint, count) pairs"""
+        grouped = Counter()
+        for sql, count in self.statements.items():
+            grouped[self.fingerprint(sql)] += count
+        return [(sql, count) for sql, count in grouped.most_common(limit) if count > 1]
+
+    def suspects(self):
+        """Fingerprints repeated past the threshold with where they were issued from"""
+        return [
+            {'sql': key, 'count': self.repeats[key], **origin}
+            for key, origin in self.origins.items()
+        ]
+
+
+class QueryTimingMiddleware:
+    """Record SQL count, SQL time and total time for every request.
+
+    The numbers are kept in a rolling per-URL-name window shown on the superuser
+    metrics page and written as one JSON line to the ``tailor_system.requests``
+    logger: at INFO when the request took ``REQUEST_LOG_SLOW_MS`` or longer, at
+    DEBUG otherwise. Staff users (everyone with ``SERVER_TIMING_PUBLIC``) also
+    get them in a ``Server-Timing`` header.
+
+    With ``NPLUSONE_MODE`` set to 'log' or 'raise', any query fingerprint
+    repeated more than ``NPLUSONE_THRESHOLD`` times in one request is reported
+    with the template tag and source line that issued it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Settings are read per request so override_settings works in tests
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+        started = time.perf_counter()
+        with capture_queries(self.threshold()) as collector:
+            response = self.get_response(request)
+        show_timing = self.public_timing() or self.is_staff(getattr(request, 'user', None))
+        return self.finish(request, response, collector, started, show_timing)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with capture_queries(self.threshold()) as collector:
+            response = await self.get_response(request)
+        show_timing = self.public_timing() or (hasattr(request, 'auser') and self.is_staff(await request.auser()))
+        return self.finish(request, response, collector, started, show_timing)
+
+    def public_timing(self):
+        return getattr(settings, 'SERVER_TIMING_PUBLIC', False)
+
+    def is_staff(self, user):
+        # Timings tell an outsider which pages are slow, so only staff see them
+        return bool(user is not None and user.is_staff)
+
+    def threshold(self):
+        if getattr(settings, 'NPLUSONE_MODE', 'off') == 'off':
+            return None
+        return getattr(settings, 'NPLUSONE_THRESHOLD', 5)
+
+    def finish(self, request, response, collector, started, show_timing=False):
+        total_ms = (time.perf_counter() - started) * 1000
+        sql_ms = collector.duration * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else 'unresolved'
+        duplicates = collector.duplicates()
+
+        if show_timing:
+            response['Server-Timing'] = (
+                f'sql;dur={sql_ms:.1f};desc="{collector.count} queries", '
+                f'total;dur={total_ms:.1f}'
+            )
+        request_metrics.record(url_name, total_ms, collector.count, sql_ms, duplicates)
+        level = logging.INFO if total_ms >= getattr(settings, 'REQUEST_LOG_SLOW_MS', 500) else logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'url_name': url_name,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 1),
+                'sql_ms': round(sql_ms, 1),
+                'sql_count': collector.count,
+                'duplicates': [{'sql': sql[:200], 'count': count} for sql, count in duplicates],
+            }, ensure_ascii=False))
+
+        suspects = collector.suspects()
+        if suspects:
+            request_metrics.increment('nplusone_requests')
+            self.report_nplusone(request, url_name, suspects, getattr(settings, 'NPLUSONE_MODE', 'off'))
+        return response
+
+    def report_nplusone(self, request, url_name, suspects, mode):
+        if mode == 'raise':
+            lines = [f'{request.method} {request.path} ({url_name}) repeats queries:']
+            for suspect in suspects:
+                lines.append(f'  {suspect["count"]}x {suspect["sql"][:300]}')
+                for where in ('template', 'code'):
+                    if suspect[where]:
+                        lines.append(f'      {where}: {suspect[where]}')
+            raise NPlusOneError('\n'.join(lines))
+        nplusone_logger.warning(json.dumps({
+            'path': request.path,
+            'url_name': url_name,
+            'suspects': [{**suspect, 'sql': suspect['sql'][:300]} for suspect in suspects],
+        }, ensure_ascii=False))
+
+
+class ReadYourWritesMiddleware:
+    """Pin the session to the primary database for a while after any write request"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            pin_to_primary(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            # Loading the session may hit the database
+            await sync_to_async(pin_to_primary)(request)
+        return response
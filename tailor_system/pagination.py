@@ -0,0 +1,243 @@
+"""Keyset (cursor) pagination for long lists.
+
+Instead of OFFSET, each page continues from the sort key of the last row shown,
+so page 500 costs the same indexed range scan as page 1. The position travels
+in an opaque ``?cursor=`` token; totals are optional and estimated, because an
+exact COUNT(*) of a large table is as slow as the deep OFFSET it replaces.
+"""
+import base64
+import binascii
+import json
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+CURSOR_VAR = 'cursor'
+
+# Estimated table sizes kept by the database's statistics
+TABLE_ROWS_SQL = {
+    'mysql': 'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+    'postgresql': 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+}
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, values):
+    # Full isoformat keeps microseconds, which DjangoJSONEncoder would drop
+    payload = json.dumps([direction, values], default=lambda value: value.isoformat() if hasattr(value, 'isoformat') else str(value))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, values = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor(token)
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(token)
+    return direction, values
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """Rows strictly after ``values`` in ``ordering``: (a > x) OR (a = x AND b > y) ...
+
+    NULL has no place in such a comparison, so sort keys must never be NULL
+    (annotate nullable columns with ``Coalesce``); a cursor holding one raises
+    InvalidCursor.
+    """
+    if any(value is None for value in values):
+        raise InvalidCursor(values)
+    condition = Q()
+    for index, key in enumerate(ordering):
+        field = key.lstrip('-')
+        descending = key.startswith('-') != reverse
+        step = Q(**{f'{field}__{"lt" if descending else "gt"}': values[index]})
+        for previous, value in zip(ordering[:index], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def approximate_count(queryset, limit):
+    """Row count of ``queryset`` and whether it is only an estimate.
+
+    An unfiltered table uses the database's own statistics; anything else is
+    counted, stopping at ``limit + 1`` rows.
+    """
+    connection = connections[queryset.db]
+    if not queryset.query.where and connection.vendor in TABLE_ROWS_SQL:
+        with connection.cursor() as cursor:
+            cursor.execute(TABLE_ROWS_SQL[connection.vendor], [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # Tables never analyzed report nothing (or -1 on PostgreSQL)
+        if row and row[0] is not None and row[0] >= 0:
+            return row[0], True
+    return queryset.order_by()[:limit + 1].count(), False
+
+
+class KeysetPage:
+    def __init__(self, paginator, object_list, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def next_cursor(self):
+        return self.paginator.cursor('next', self.object_list[-1]) if self._has_next else None
+
+    @cached_property
+    def previous_cursor(self):
+        return self.paginator.cursor('prev', self.object_list[0]) if self._has_previous else None
+
+
+class KeysetPaginator:
+    """Paginate a queryset by its sort key rather than by page number.
+
+    ``ordering`` must end in a unique field so every row has a distinct key.
+    ``count`` is None when ``show_count`` is off, otherwise an estimate (see
+    ``approximate_count``) computed only when a template asks for it.
+    """
+
+    count_limit = 1000
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'), show_count=True):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.show_count = show_count
+
+    def cursor(self, direction, obj):
+        return encode_cursor(direction, [getattr(obj, key.lstrip('-')) for key in self.ordering])
+
+    def page(self, cursor=None):
+        """The page after (or before) ``cursor``, or the first page without one"""
+        direction, values = decode_cursor(cursor, len(self.ordering)) if cursor else ('next', None)
+        reverse = direction == 'prev'
+        ordering = [key[1:] if key.startswith('-') else f'-{key}' for key in self.ordering] if reverse else self.ordering
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, values, reverse))
+        # One extra row tells whether another page follows
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            return KeysetPage(self, rows, has_next=True, has_previous=more)
+        return KeysetPage(self, rows, has_next=more, has_previous=values is not None)
+
+    @cached_property
+    def _count(self):
+        if not self.show_count:
+            return None, False
+        return approximate_count(self.queryset, self.count_limit)
+
+    @property
+    def count(self):
+        count, _ = self._count
+        return count if count is None else min(count, self.count_limit)
+
+    @property
+    def count_is_approximate(self):
+        count, estimated = self._count
+        return estimated or (count is not None and count > self.count_limit)
+
+    @property
+    def count_display(self):
+        """The total as shown to users: "≈12345", "1000+" or exact"""
+        count, estimated = self._count
+        if count is None:
+            return ''
+        if estimated:
+            return f'≈{count}'
+        if count > self.count_limit:
+            return f'{self.count_limit}+'
+        return str(count)
+
+
+class KeysetPaginationMixin:
+    """ListView mixin replacing page numbers with ``?cursor=`` keyset pagination"""
+
+    keyset_ordering = ('-created_at', '-id')
+    show_count = True
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering, self.show_count)
+        try:
+            page = paginator.page(self.request.GET.get(CURSOR_VAR))
+        except InvalidCursor:
+            raise Http404('Хуудас олдсонгүй.')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class KeysetChangeList(ChangeList):
+    """Admin change list paginated by ``keyset_ordering`` while the default sort is in use"""
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        # Column sorting changes the key, so it falls back to numbered pages
+        if ORDER_VAR in self.params or self.show_all:
+            self.keyset_page = self.next_page_url = self.previous_page_url = None
+            return super().get_results(request)
+        # Filter and search links must start again from the first page
+        self.params.pop(CURSOR_VAR, None)
+
+        paginator = KeysetPaginator(self.queryset, self.list_per_page, self.model_admin.keyset_ordering)
+        try:
+            page = paginator.page(request.GET.get(CURSOR_VAR))
+        except InvalidCursor:
+            raise IncorrectLookupParameters
+        self.keyset_page = page
+        self.next_page_url = page.has_next() and self.get_query_string({CURSOR_VAR: page.next_cursor})
+        self.previous_page_url = page.has_previous() and self.get_query_string({CURSOR_VAR: page.previous_cursor})
+        self.paginator = paginator
+        self.result_list = page.object_list
+        self.result_count = paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        # Keeps the stock pagination tag from building a numbered page range
+        self.multi_page = False
+
+
+class KeysetPaginationAdminMixin:
+    """ModelAdmin mixin for tables too large for OFFSET pagination and full counts"""
+
+    keyset_ordering = ('-created_at', '-id')
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,69 @@
+"""Run independent ORM queries concurrently on a shared pool of worker threads.
+
+Every worker thread keeps its own database connection (reused under
+CONN_MAX_AGE), so N independent aggregates cost roughly one round-trip to the
+remote database instead of N. Context variables such as replica routing and the
+per-request query collector are copied into the workers.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PARALLEL_QUERY_WORKERS', 8),
+                thread_name_prefix='query-worker',
+            )
+    return _executor
+
+
+def in_transaction():
+    """Whether this thread has an open transaction that workers would not see"""
+    return any(conn.in_atomic_block for conn in connections.all(initialized_only=True))
+
+
+def _run(func):
+    # Same connection housekeeping the request signals do for request threads
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+def run_queries(**queries):
+    """Call each blocking ORM callable concurrently and return their results by name"""
+    if in_transaction() or len(queries) < 2:
+        return {name: func() for name, func in queries.items()}
+    executor = get_executor()
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, _run, func)
+        for name, func in queries.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+
+async def gather_queries(**queries):
+    """Async counterpart of ``run_queries`` for async views"""
+    # Inside a transaction (e.g. TestCase) everything must run on the request's own connection
+    if await sync_to_async(in_transaction)():
+        return {name: await sync_to_async(func)() for name, func in queries.items()}
+    executor = get_executor()
+    results = await asyncio.gather(*(
+        sync_to_async(_run, thread_sensitive=False, executor=executor)(func)
+        for func in queries.values()
+    ))
+    return dict(zip(queries, results))
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -22,8 +24,12 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-4(ue93#gyx1(c7a3wnn9kh-%0o*b3qk-i2ig&()vvm+3#1j91g'
 
+# DJANGO_ENV=production selects the production profile: no debug, cached templates warmed at worker start
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'development')
+PRODUCTION = DJANGO_ENV == 'production'
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '0' if PRODUCTION else '1') == '1'
 
 ALLOWED_HOSTS = ['*']
 
@@ -47,9 +53,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tailor_system.middleware.QueryTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'tailor_system.middleware.ReadYourWritesMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -74,6 +82,20 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCTION:
+    # Parse every template once per worker instead of searching the app directories on each render.
+    # Explicit loaders cannot be combined with APP_DIRS.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+# Compile every template under templates/ when a WSGI/ASGI worker starts (tailor_system.startup)
+TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', '1' if PRODUCTION else '0') == '1'
+
 WSGI_APPLICATION = 'tailor_system.wsgi.application'
 
 
@@ -90,15 +112,89 @@ WSGI_APPLICATION = 'tailor_system.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'ninjeestailor',
-        'USER': 'gegee',
-        'PASSWORD': 'dellF912;',
-        'HOST': '46.101.198.19',
-        'PORT': '3306',
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.mysql'),
+        'NAME': os.environ.get('DB_NAME', 'ninjeestailor'),
+        'USER': os.environ.get('DB_USER', 'gegee'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'dellF912;'),
+        'HOST': os.environ.get('DB_HOST', '46.101.198.19'),
+        'PORT': os.environ.get('DB_PORT', '3306'),
+        # Reuse connections to the remote host instead of reconnecting on every request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        # Ping a reused connection before the first query of a request
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
     }
 }
 
+# Optional read replica for the report and dashboard pages (tailor_system.db_router)
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        # Tests run against a single database
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['tailor_system.db_router.ReadReplicaRouter']
+READ_REPLICA_ALIAS = 'replica'
+READ_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '10'))  # primary-only reads after a POST
+
+# Cache shared by all worker processes: REDIS_URL (e.g. redis://127.0.0.1:6379/1) or
+# MEMCACHED_LOCATION (e.g. 127.0.0.1:11211). The in-process fallback is only correct
+# with a single worker: order fragment and workload invalidations stay in the process
+# that made them (orders.checks warns about it in production)
+if os.environ.get('REDIS_URL'):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }}
+elif os.environ.get('MEMCACHED_LOCATION'):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.environ['MEMCACHED_LOCATION'],
+    }}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Idle connections kept per database by tailor_system.db_pool when served over ASGI
+ASGI_DB_POOL_SIZE = int(os.environ.get('ASGI_DB_POOL_SIZE', '10'))
+
+# Seconds each dashboard card fragment is cached, on the server and in the browser
+DASHBOARD_CARD_CACHE_SECONDS = {
+    'counts': 30,
+    'recent_orders': 15,
+    'revenue': 300,
+    'customers': 300,
+    'materials': 600,
+}
+
+# Seconds an order detail fragment (orders.fragments) stays cached; history and rating changes invalidate it sooner
+ORDER_FRAGMENT_CACHE_SECONDS = 3600
+
+# Live order status feed (orders.events): events kept for reconnecting clients, keep-alive interval
+ORDER_EVENTS_BUFFER = 500
+ORDER_EVENTS_KEEPALIVE_SECONDS = 15
+
+# Threads (each with its own DB connection) running dashboard and report aggregates concurrently
+PARALLEL_QUERY_WORKERS = int(os.environ.get('PARALLEL_QUERY_WORKERS', '8'))
+
+# Order design images (orders.images): widths of the resized WebP/JPEG variants, threads building them
+DESIGN_IMAGE_WIDTHS = (320, 640, 1280)
+DESIGN_IMAGE_WORKERS = int(os.environ.get('DESIGN_IMAGE_WORKERS', '2'))
+
+# Due date estimates (orders.estimates): days of status history used, stays an item type
+# needs before its own durations replace those of all items (refresh_status_durations recomputes them)
+DUE_DATE_HISTORY_DAYS = 180
+DUE_DATE_MIN_SAMPLES = 20
+
+# Per-employee workload index (orders.workload); saving an order, employee or rating rebuilds it sooner
+WORKLOAD_CACHE_SECONDS = 3600
+
+# Materials whose unreserved stock is below this count as low stock (materials.models.MaterialQuerySet)
+MATERIAL_LOW_STOCK_THRESHOLD = 10
+
 
 
 # Password validation
@@ -141,9 +237,38 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # For production
 
+# Production: fingerprinted names plus .gz/.br copies written by collectstatic (tailor_system.storage)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'tailor_system.storage.CompressedManifestStaticFilesStorage' if PRODUCTION
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
+# Let Django serve STATIC_ROOT (precompressed, far-future cached) when no web server does
+SERVE_STATIC = os.environ.get('DJANGO_SERVE_STATIC', '1' if PRODUCTION else '0') == '1'
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# How tailor_system.media hands files to the web server after the login check:
+# 'nginx' (X-Accel-Redirect to MEDIA_ACCEL_PREFIX, an internal location), 'sendfile' (X-Sendfile), or '' (Django sends them)
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Chunked design image uploads (orders.uploads); the temp dir must be shared by all workers.
+# MAX_PIXELS bounds what resizing a (small, well compressed) upload decodes into memory
+DESIGN_UPLOAD_TEMP_DIR = os.environ.get('DESIGN_UPLOAD_TEMP_DIR', os.path.join(tempfile.gettempdir(), 'tailor_design_uploads'))
+DESIGN_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+DESIGN_UPLOAD_MAX_PIXELS = 50 * 1000 * 1000
+DESIGN_UPLOAD_CHUNK_SIZE = 512 * 1024
+DESIGN_UPLOAD_EXPIRY_HOURS = 24
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 
@@ -162,3 +287,45 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/login/'
+
+
+# Request instrumentation (tailor_system.middleware.QueryTimingMiddleware)
+REQUEST_METRICS_ENABLED = True
+REQUEST_METRICS_WINDOW = 500  # requests kept per URL name for the /metrics/ page
+# Requests at least this slow are logged at INFO, the rest at DEBUG
+REQUEST_LOG_SLOW_MS = int(os.environ.get('REQUEST_LOG_SLOW_MS', '500'))
+# Send the Server-Timing header to every client, not only staff (local development)
+SERVER_TIMING_PUBLIC = os.environ.get('SERVER_TIMING_PUBLIC', '0') == '1'
+
+# N+1 detection: 'off', 'log' (staging) or 'raise' (forced on by the test runner)
+NPLUSONE_MODE = os.environ.get('NPLUSONE_MODE', 'log')
+NPLUSONE_THRESHOLD = 5  # allowed repeats of one query fingerprint per request
+
+TEST_RUNNER = 'tailor_system.test_runner.QueryCheckTestRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'tailor_system.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'tailor_system.nplusone': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'tailor_system.startup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
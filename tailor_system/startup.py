@@ -0,0 +1,41 @@
+"""Work done once when a WSGI/ASGI worker starts, so its first request is not slower than the rest"""
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+
+logger = logging.getLogger('tailor_system.startup')
+
+
+def warm_templates():
+    """Compile every template under the project template directories into the loader cache"""
+    engine = engines['django'].engine
+    count = 0
+    for directory in engine.dirs:
+        directory = Path(directory)
+        for path in sorted(directory.rglob('*.html')):
+            name = path.relative_to(directory).as_posix()
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as exc:
+                # Report it now rather than on the request that first uses it
+                logger.error('Template %s does not compile: %s', name, exc)
+            else:
+                count += 1
+    return count
+
+
+def warm_up():
+    """Load URL patterns and, when TEMPLATE_WARMUP is on, precompile the templates"""
+    if not settings.TEMPLATE_WARMUP:
+        return None
+    started = time.perf_counter()
+    get_resolver().url_patterns
+    count = warm_templates()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info('Warmed up %d templates in %.0f ms', count, elapsed_ms)
+    return elapsed_ms
@@ -0,0 +1,76 @@
+"""Serve collected static files from Django when no web server sits in front of it.
+
+Picks the precompressed ``.br`` / ``.gz`` variant written by
+``CompressedManifestStaticFilesStorage`` when the browser accepts it, and lets
+browsers keep fingerprinted files for a year.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+
+
+# (suffix, Content-Encoding), best first
+ENCODINGS = [('.br', 'br'), ('.gz', 'gzip')]
+
+# Names like app.3f2a9c41b0d7.css change whenever their content does
+FAR_FUTURE_SECONDS = 365 * 24 * 60 * 60
+# Unfingerprinted names may change under the same URL
+SHORT_SECONDS = 60
+
+
+def _hashed_names():
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+hashed_names = SimpleLazyObject(_hashed_names)
+
+
+def accepted_encodings(request):
+    """Content codings the browser accepts (q=0 means refused)"""
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        token, *params = [item.strip() for item in part.split(';')]
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0
+        if token and quality > 0:
+            accepted.add(token.lower())
+    return accepted
+
+
+def serve_static(request, path):
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    accepted = accepted_encodings(request)
+    served, encoding = fullpath, None
+    for suffix, name in ENCODINGS:
+        if name in accepted and os.path.isfile(fullpath + suffix):
+            served, encoding = fullpath + suffix, name
+            break
+
+    response = FileResponse(open(served, 'rb'), content_type=content_type or 'application/octet-stream')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if path in hashed_names:
+        patch_cache_control(response, public=True, max_age=FAR_FUTURE_SECONDS, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=SHORT_SECONDS)
+    return response
@@ -0,0 +1,97 @@
+"""Storage backends.
+
+``CompressedManifestStaticFilesStorage`` fingerprints static files and stores
+compressed copies next to them: ``collectstatic`` writes ``app.3f2a9c.css`` plus ``app.3f2a9c.css.gz`` and, when the
+optional ``brotli`` package is installed, ``app.3f2a9c.css.br``. Nginx
+(``gzip_static`` / ``brotli_static``) or ``tailor_system.static.serve_static``
+then send the smallest variant the browser accepts, without compressing per request.
+
+``ContentAddressedStorage`` names uploads by the SHA-256 of their content, so
+the same photo attached to many orders is stored once.
+"""
+import gzip
+import hashlib
+import os
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Text formats worth compressing; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.html')
+
+# Variants that save less than this fraction are not kept
+MIN_SAVING = 0.05
+
+
+def compress(data):
+    """Compressed variants of ``data`` by file suffix"""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            with self.open(name) as f:
+                data = f.read()
+            for suffix, compressed in compress(data).items():
+                if len(compressed) > len(data) * (1 - MIN_SAVING):
+                    continue
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                with self.open(name + suffix, 'wb') as f:
+                    f.write(compressed)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Store every distinct file once, as ``<directory>/<ab>/<sha256><ext>``.
+
+    The name asked for only contributes its extension. Saving content that is
+    already stored returns the existing name, so several rows may share one
+    file: never delete through a single row; unreferenced files are removed by
+    the ``gc_design_images`` command instead.
+    """
+
+    def __init__(self, directory='blobs', **kwargs):
+        # Same content always maps to the same name, so overwriting is harmless
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+        self.directory = directory
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        checksum = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(self.directory, checksum[:2], checksum + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def is_content_addressed(self, name):
+        return name.startswith(self.directory + '/')
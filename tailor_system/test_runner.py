@@ -0,0 +1,20 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class QueryCheckTestRunner(DiscoverRunner):
+    """Test runner that turns N+1 query warnings into errors.
+
+    Requests made through the test client raise ``NPlusOneError`` when a query
+    fingerprint repeats more than ``NPLUSONE_THRESHOLD`` times. A test that
+    needs the old behaviour can use ``override_settings(NPLUSONE_MODE='log')``.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.query_check = override_settings(REQUEST_METRICS_ENABLED=True, NPLUSONE_MODE='raise')
+        self.query_check.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.query_check.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,47 @@
+"""Collect row-level events into one ``on_commit`` callback per transaction.
+
+A signal receiver that queues ``transaction.on_commit`` for every saved or
+deleted row turns a bulk change of 200k rows into 200k callbacks. Receivers
+that only need the set of affected keys use ``on_commit_once`` instead: the
+keys of one transaction are gathered and handed to a single callback.
+"""
+import weakref
+
+from django.db import transaction
+
+
+# connection -> {batch name: weak reference to the queued callback}
+_batches = weakref.WeakKeyDictionary()
+
+
+def on_commit_once(name, key, flush, using=None):
+    """Add ``key`` to the ``name`` batch of the current transaction; ``flush(keys)`` runs once on commit.
+
+    Outside a transaction ``flush`` runs at once, as ``on_commit`` would.
+
+    Only Django's queue holds the callback. A rolled back transaction or savepoint
+    drops its callbacks, the weak reference dies with ours, and the next key starts
+    a new batch.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        flush({key})
+        return
+
+    batches = _batches.setdefault(connection, {})
+    ref = batches.get(name)
+    callback = ref() if ref is not None else None
+    if callback is None:
+        keys = set()
+
+        def callback():
+            # No reference to the callback itself, so nothing but the queue keeps it alive
+            current = batches.get(name)
+            if current is not None and getattr(current(), 'keys', None) is keys:
+                del batches[name]
+            flush(keys)
+
+        callback.keys = keys
+        transaction.on_commit(callback, using=using, robust=True)
+        batches[name] = weakref.ref(callback)
+    callback.keys.add(key)
@@ -1,8 +1,10 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from . import views
+from .media import serve_media
+from .static import serve_static
 
 # Admin site customization
 admin.site.site_header = "Хувцас оёдлын системийн удирдлага"
@@ -14,15 +16,20 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/cards/<slug:name>/', views.dashboard_card, name='dashboard_card'),
     path('landing/', views.landing_page, name='landing'),
+    path('metrics/', views.request_metrics_view, name='request_metrics'),
     path('orders/', include('orders.urls')),
     path('customers/', include('customers.urls')),
     path('employees/', include('employees.urls')),
     path('materials/', include('materials.urls')),
     path('reports/', include('reports.urls')),
     path('', views.landing_page, name='home'),  # Landing page as home
+    # Order design images, for signed-in users only
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+elif settings.SERVE_STATIC:
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), serve_static)]
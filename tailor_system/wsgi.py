@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tailor_system.settings')
 
 application = get_wsgi_application()
+
+# Compile templates before the first request reaches this worker
+from tailor_system.startup import warm_up  # noqa: E402
+
+warm_up()